@@ -1,4 +1,3 @@
-
 # Solar Power System Relay Control Simulation with Controller Comparison
 # Author: Arshia Keshvari
 # Date: May 10, 2025
@@ -8,9 +7,20 @@
 # It implements hysteresis and time delays to prevent relay wear under fluctuating solar conditions.
 # The visualization demonstrates controller efficiency differences and shows how controlled switching
 # prevents rapid relay toggling.
+#
+# matplotlib is only imported when a plot is requested, so headless batch runs start in
+# about the time it takes to import NumPy.
+#
+# Usage:
+#   python Solar_MPPT_Load_Balancing_Sim.py                       # statistics, then the plot
+#   python Solar_MPPT_Load_Balancing_Sim.py --headless --duration 3600 --seed 7 --output run.npz
+#   python Solar_MPPT_Load_Balancing_Sim.py --headless --duration 86400 --cache-dir .array_cache
+
+import argparse
 
 import numpy as np
-import matplotlib.pyplot as plt
+
+from controllers import ControllerComparison
 
 # Control Parameters
 on_threshold = 45  # Watts - relay activates above this power level
@@ -18,156 +28,160 @@ off_threshold = 35  # Watts - relay deactivates below this power level
 on_delay = 0.5     # Seconds - time above threshold before switching ON
 off_delay = 1.0    # Seconds - time below threshold before switching OFF
 
-# Simulation Setup (10 seconds, 100 steps)
-time = np.linspace(0, 10, 100)
-dt = time[1] - time[0]
-
-# Solar Input with Weather Variability (cloudy day simulation)
-np.random.seed(42)  # For reproducible results
-solar_power = 50 + 30 * np.sin(time) + 20 * np.random.randn(100)
-
-# MPPT Controller Output
-mppt_efficiency = 0.95  # Typical efficiency for MPPT controllers
-mppt_output = np.clip(solar_power * mppt_efficiency, 0, 100)
-
-# PWM Controller Output
-# PWM is less efficient, especially in variable conditions
-# PWM efficiency changes with the ratio of panel voltage to battery voltage
-pwm_base_efficiency = 0.75
-# PWM efficiency drops more in lower light conditions
-pwm_efficiency = pwm_base_efficiency * (0.9 + 0.1 * (solar_power / 100))
-pwm_output = np.clip(solar_power * pwm_efficiency, 0, 100)
-
-# Simple Relay Control (Direct threshold comparison without delays)
-mppt_relay_simple = np.where(mppt_output > 40, 1, 0)
-pwm_relay_simple = np.where(pwm_output > 40, 1, 0)
-
-# Advanced Relay Control (With hysteresis and delays)
-mppt_relay_advanced = np.zeros_like(mppt_relay_simple)
-pwm_relay_advanced = np.zeros_like(pwm_relay_simple)
-
-# Advanced Relay Control Logic for MPPT
-relay_state_mppt = 0
-on_timer_mppt = 0
-off_timer_mppt = 0
-on_delay_steps = int(on_delay / dt)
-off_delay_steps = int(off_delay / dt)
-
-for i in range(1, len(time)):
-    if relay_state_mppt == 0:  # Currently OFF
-        if mppt_output[i] >= on_threshold:
-            on_timer_mppt += 1
-            if on_timer_mppt >= on_delay_steps:
-                relay_state_mppt = 1  # Turn ON after delay
-                on_timer_mppt = 0
-        else:
-            on_timer_mppt = 0
-    elif relay_state_mppt == 1:  # Currently ON
-        if mppt_output[i] <= off_threshold:
-            off_timer_mppt += 1
-            if off_timer_mppt >= off_delay_steps:
-                relay_state_mppt = 0  # Turn OFF after delay
-                off_timer_mppt = 0
-        else:
-            off_timer_mppt = 0
-    
-    mppt_relay_advanced[i] = relay_state_mppt
-
-# Advanced Relay Control Logic for PWM
-relay_state_pwm = 0
-on_timer_pwm = 0
-off_timer_pwm = 0
-
-for i in range(1, len(time)):
-    if relay_state_pwm == 0:  # Currently OFF
-        if pwm_output[i] >= on_threshold:
-            on_timer_pwm += 1
-            if on_timer_pwm >= on_delay_steps:
-                relay_state_pwm = 1  # Turn ON after delay
-                on_timer_pwm = 0
-        else:
-            on_timer_pwm = 0
-    elif relay_state_pwm == 1:  # Currently ON
-        if pwm_output[i] <= off_threshold:
-            off_timer_pwm += 1
-            if off_timer_pwm >= off_delay_steps:
-                relay_state_pwm = 0  # Turn OFF after delay
-                off_timer_pwm = 0
-        else:
-            off_timer_pwm = 0
-    
-    pwm_relay_advanced[i] = relay_state_pwm
-
-# Create subplots for better organization
-fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 10), sharex=True)
-
-# Plot 1: Power Curves and Thresholds
-ax1.plot(time, solar_power, label="Solar Power Input (W)", linestyle="dashed", color="gray")
-ax1.plot(time, mppt_output, label="MPPT Output (W)", color="green", linewidth=2)
-ax1.plot(time, pwm_output, label="PWM Output (W)", color="orange", linewidth=2)
-ax1.axhline(on_threshold, color="green", linestyle=":", label="ON Threshold (45W)")
-ax1.axhline(off_threshold, color="red", linestyle=":", label="OFF Threshold (35W)")
-ax1.set_ylabel("Power (Watts)")
-ax1.set_title("Solar Controller Output Comparison: MPPT vs PWM")
-ax1.legend(loc="best")
-ax1.grid(True)
-
-# Plot 2: Relay States - Using offset for clarity
-# Adding small vertical offsets to make multiple states visible
-ax2.plot(time, mppt_relay_simple*0.2 + 0.0, label="MPPT Simple Relay (ON/OFF immediate)", 
-         drawstyle='steps-post', color="lightgreen", linewidth=2)
-ax2.plot(time, mppt_relay_advanced*0.2 + 0.4, label="MPPT Advanced Relay (with delays)", 
-         drawstyle='steps-post', color="darkgreen", linewidth=2)
-ax2.plot(time, pwm_relay_simple*0.2 + 0.8, label="PWM Simple Relay (ON/OFF immediate)", 
-         drawstyle='steps-post', color="moccasin", linewidth=2)
-ax2.plot(time, pwm_relay_advanced*0.2 + 1.2, label="PWM Advanced Relay (with delays)", 
-         drawstyle='steps-post', color="darkorange", linewidth=2)
-
-# Add relay state labels
-ax2.set_yticks([0.3, 0.7, 1.1, 1.5])
-ax2.set_yticklabels(['1', '2', '3', '4'])
-ax2.set_ylim(-0.1, 1.5)
-
-ax2.set_xlabel("Time (seconds)")
-ax2.set_ylabel("Relay States")
-ax2.set_title("Relay State Comparison: Simple vs Advanced Control")
-ax2.legend(loc="best")
-ax2.grid(True)
-
-plt.tight_layout()
-plt.show()
-
-# Calculate switching statistics
-mppt_simple_switches = np.sum(np.abs(np.diff(mppt_relay_simple)))
-mppt_advanced_switches = np.sum(np.abs(np.diff(mppt_relay_advanced)))
-pwm_simple_switches = np.sum(np.abs(np.diff(pwm_relay_simple)))
-pwm_advanced_switches = np.sum(np.abs(np.diff(pwm_relay_advanced)))
-
-# Calculate relay wear reduction
-if mppt_simple_switches > 0:
-    mppt_reduction = ((mppt_simple_switches - mppt_advanced_switches) / mppt_simple_switches * 100)
-else:
-    mppt_reduction = 0  # Prevent division by zero
-
-if pwm_simple_switches > 0:
-    pwm_reduction = ((pwm_simple_switches - pwm_advanced_switches) / pwm_simple_switches * 100)
-else:
-    pwm_reduction = 0  # Prevent division by zero
-    
-# Print results
-print("==== CONTROLLER EFFICIENCY COMPARISON ====")
-print(f"MPPT average power output: {np.mean(mppt_output):.2f}W")
-print(f"PWM average power output: {np.mean(pwm_output):.2f}W")
-print(f"Efficiency difference: {(np.mean(mppt_output) - np.mean(pwm_output)):.2f}W ({(np.mean(mppt_output)/np.mean(pwm_output)-1)*100:.1f}% MPPT advantage)")
-
-print("\n==== RELAY SWITCHING STATISTICS ====")
-print(f"MPPT Simple Control: {mppt_simple_switches} switches (no delays)")
-print(f"MPPT Advanced Control: {mppt_advanced_switches} switches (with hysteresis & delays)")
-print(f"PWM Simple Control: {pwm_simple_switches} switches (no delays)")
-print(f"PWM Advanced Control: {pwm_advanced_switches} switches (with hysteresis & delays)")
-
-# Calculate relay wear reduction
-mppt_reduction = ((mppt_simple_switches - mppt_advanced_switches) / mppt_simple_switches * 100) if mppt_simple_switches > 0 else 0
-pwm_reduction = ((pwm_simple_switches - pwm_advanced_switches) / pwm_simple_switches * 100) if pwm_simple_switches > 0 else 0
-
-print(f"\nAdvanced control reduces relay switching by {mppt_reduction:.1f}% with MPPT and {pwm_reduction:.1f}% with PWM")
+SAMPLES_PER_SECOND = 10  # 100 steps over the default 10 seconds
+PANEL_POWER = 100  # Watts at 1000 W/m2 when the solar input follows generated weather
+WEATHER_START_HOUR = 10.0  # Generated weather starts mid-morning
+
+# Charge controllers and relay strategies (plug-ins from controllers.py), evaluated for
+# every controller x relay combination in one batched pass over shared arrays:
+# - MPPT: typical efficiency for MPPT controllers
+# - PWM: less efficient, especially in variable conditions; its efficiency changes with the
+#   ratio of panel voltage to battery voltage and drops more in lower light
+controllers = {"mppt": {"efficiency": 0.95}, "pwm": {"base_efficiency": 0.75}}
+relays = {
+    "simple": {"threshold": 40},  # Direct threshold comparison without delays
+    "advanced": {"on_threshold": on_threshold, "off_threshold": off_threshold,  # Hysteresis and delays
+                 "on_delay": on_delay, "off_delay": off_delay},
+}
+
+# Plot label and colours (output, simple relay, advanced relay) per controller
+CONTROLLER_STYLES = {
+    "mppt": ("MPPT", "green", "lightgreen", "darkgreen"),
+    "pwm": ("PWM", "orange", "moccasin", "darkorange"),
+}
+RELAY_LABELS = {"simple": "Simple Relay (ON/OFF immediate)", "advanced": "Advanced Relay (with delays)"}
+
+
+def simulate(duration=10.0, seed=42, weather=False, cache=None):
+    # Simulation Setup (10 seconds, 100 steps by default)
+    time = np.linspace(0, duration, max(2, int(round(duration * SAMPLES_PER_SECOND))))
+    dt = time[1] - time[0]
+
+    # Solar Input with Weather Variability (cloudy day simulation), reproducible per seed;
+    # with `weather`, a panel under generated clouds and ramp events (weather.py)
+    if weather:
+        from weather import WeatherGenerator
+        irradiance = WeatherGenerator(seed=seed, start_hour=WEATHER_START_HOUR).at(time)[0]
+        solar_power = irradiance * (PANEL_POWER / 1000)
+    else:
+        solar_power = 50 + 30 * np.sin(time) + 20 * np.random.RandomState(seed).randn(len(time))
+
+    # With an ArrayCache (array_cache.py), outputs and relay states computed before for the
+    # same input and settings are reused, e.g. when only the relay settings changed
+    comparison = ControllerComparison(controllers, relays, dt, cache).run(solar_power)
+    return time, solar_power, comparison
+
+
+def plot(time, solar_power, comparison):
+    import matplotlib.pyplot as plt  # Deferred: only needed when a plot is requested
+
+    # Create subplots for better organization
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 10), sharex=True)
+
+    # Plot 1: Power Curves and Thresholds
+    ax1.plot(time, solar_power, label="Solar Power Input (W)", linestyle="dashed", color="gray")
+    for controller in comparison.controllers:
+        label, color = CONTROLLER_STYLES[controller][:2]
+        ax1.plot(time, comparison.output(controller), label=f"{label} Output (W)", color=color, linewidth=2)
+    ax1.axhline(on_threshold, color="green", linestyle=":", label="ON Threshold (45W)")
+    ax1.axhline(off_threshold, color="red", linestyle=":", label="OFF Threshold (35W)")
+    ax1.set_ylabel("Power (Watts)")
+    ax1.set_title("Solar Controller Output Comparison: "
+                  + " vs ".join(CONTROLLER_STYLES[controller][0] for controller in comparison.controllers))
+    ax1.legend(loc="best")
+    ax1.grid(True)
+
+    # Plot 2: Relay States - Using offset for clarity
+    # Adding small vertical offsets to make multiple states visible
+    offset = 0.0
+    for controller in comparison.controllers:
+        label, _, *relay_colors = CONTROLLER_STYLES[controller]
+        for relay, color in zip(comparison.relays, relay_colors):
+            ax2.plot(time, comparison.states(relay, controller)*0.2 + offset, label=f"{label} {RELAY_LABELS[relay]}",
+                     drawstyle='steps-post', color=color, linewidth=2)
+            offset += 0.4
+
+    # Add relay state labels
+    rows = len(comparison.controllers) * len(comparison.relays)
+    ax2.set_yticks([0.3 + 0.4 * row for row in range(rows)])
+    ax2.set_yticklabels([str(row + 1) for row in range(rows)])
+    ax2.set_ylim(-0.1, 0.4 * rows - 0.1)
+
+    ax2.set_xlabel("Time (seconds)")
+    ax2.set_ylabel("Relay States")
+    ax2.set_title("Relay State Comparison: Simple vs Advanced Control")
+    ax2.legend(loc="best")
+    ax2.grid(True)
+
+    plt.tight_layout()
+    plt.show()
+
+
+def print_statistics(comparison):
+    # Switching statistics (online accumulators, as used for long and streamed runs)
+    statistics = comparison.statistics()
+    labels = {controller: CONTROLLER_STYLES[controller][0] for controller in comparison.controllers}
+
+    mppt_mean = statistics["mppt"].power.mean
+    pwm_mean = statistics["pwm"].power.mean
+
+    # Print results
+    print("==== CONTROLLER EFFICIENCY COMPARISON ====")
+    for controller, stats in statistics.items():
+        print(f"{labels[controller]} average power output: {stats.power.mean:.2f}W")
+    print(f"Efficiency difference: {(mppt_mean - pwm_mean):.2f}W ({(mppt_mean/pwm_mean-1)*100:.1f}% MPPT advantage)")
+
+    print("\n==== RELAY SWITCHING STATISTICS ====")
+    notes = {"simple": "no delays", "advanced": "with hysteresis & delays"}
+    for controller, stats in statistics.items():
+        for relay in comparison.relays:
+            print(f"{labels[controller]} {relay.title()} Control: {stats.switches(relay)} switches ({notes[relay]})")
+
+    # Relay wear reduction
+    reductions = [f"{stats.wear_reduction('simple', 'advanced'):.1f}% with {labels[controller]}"
+                  for controller, stats in statistics.items()]
+
+    print(f"\nAdvanced control reduces relay switching by {' and '.join(reductions)}")
+
+
+def save(path, time, solar_power, comparison, parameters):
+    # Time, input, controller outputs and relay states as a run (run_store.py): a directory,
+    # or a compressed archive when the path ends in .npz
+    from run_store import save_run
+    data = {"time": time, "solar_power": solar_power}
+    for controller in comparison.controllers:
+        data[f"{controller}_output"] = comparison.output(controller).astype(np.float32)
+        for relay in comparison.relays:
+            data[f"{controller}_{relay}_relay"] = comparison.states(relay, controller)
+    return save_run(path, data, parameters, compress=path.endswith(".npz"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MPPT vs PWM controller and relay switching comparison")
+    parser.add_argument("--headless", action="store_true", help="do not plot (matplotlib is never imported)")
+    parser.add_argument("--duration", type=float, default=10.0, help="simulated seconds (10 samples per second)")
+    parser.add_argument("--seed", type=int, default=42, help="seed for the solar variability")
+    parser.add_argument("--weather", action="store_true", help="generated weather instead of the noisy sine input")
+    parser.add_argument("--output", default=None, help="save the traces and relay states (run directory or .npz)")
+    parser.add_argument("--cache-dir", default=None,
+                        help="reuse controller outputs and relay states cached in this directory")
+    args = parser.parse_args()
+
+    cache = None
+    if args.cache_dir:
+        from array_cache import ArrayCache
+        cache = ArrayCache(args.cache_dir)
+    time, solar_power, comparison = simulate(args.duration, args.seed, args.weather, cache)
+    print_statistics(comparison)
+    if cache is not None:
+        print(f"\nCache: {cache.hits + cache.disk_hits} arrays reused, {cache.misses} computed")
+    if args.output:
+        save(args.output, time, solar_power, comparison,
+             {"duration": args.duration, "seed": args.seed, "weather": args.weather,
+             "controllers": controllers, "relays": relays})
+    if not args.headless:
+        plot(time, solar_power, comparison)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,155 @@
-import tkinter as tk
-from tkinter import ttk
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import argparse
+import os
+import shutil
+import tempfile
 import numpy as np
 import time
 import threading
-import random
-from collections import deque
-import matplotlib.animation as animation
+import queue
+
+from solar_sim_core import SolarBatterySimulator
+from online_stats import SimulationStatistics
+from weather import WeatherGenerator
+from telemetry import TelemetryBuffer
+from history_pyramid import HistoryPyramid, envelope
+from live_plot import BlitRenderer, decimate_minmax, sliding_limits
+from sim_clock import CLOCK_MODES, make_clock
+from profiling import StageProfiler
+from run_store import RunWriter, archive_run, load_run
+from jit_backend import get_backend, use_backend
+
+# Tk and matplotlib are imported by _import_gui() when the dashboard is created, so
+# --headless runs (and modules importing this one) never pay for them
+tk = ttk = plt = FigureCanvasTkAgg = animation = None
+
+TELEMETRY_COLUMNS = ("time", "battery_soc", "solar_power", "load", "source")
+RECORD_COLUMNS = ("time", "battery_soc", "battery_voltage", "solar_power", "load", "source")
+PLOT_WINDOW_SECONDS = 120  # Default time span shown in the plots
+ZOOM_SPANS = {"2 min": 120, "10 min": 600, "1 hour": 3600, "6 hours": 21_600, "1 day": 86_400, "1 week": 604_800}
+RENDER_MODES = ("classic", "blit")
+# Below this many steps a fresh headless process finishes in pure Python before importing
+# Numba and loading the compiled kernel would (about 0.7 s on its own)
+HEADLESS_COMPILED_MIN_STEPS = 500_000
+WEATHER_START_HOUR = 6.0  # Runs with --weather start at dawn
+STOP_POLL_INTERVAL = 50  # Milliseconds between checks that the simulation thread has exited
+
+def _import_gui():
+    global tk, ttk, plt, FigureCanvasTkAgg, animation
+    import tkinter as tk
+    from tkinter import ttk
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    import matplotlib.animation as animation
+
+def make_simulator(seed=None, weather=False):
+    # The dashboard's model, with the generated weather (weather.py) instead of the
+    # intensity and variability settings when `weather` is set
+    return SolarBatterySimulator(
+        seed=seed, weather=WeatherGenerator(seed=seed, start_hour=WEATHER_START_HOUR) if weather else None)
+
+def run_headless(duration, dt=1.0, seed=None, output=None, weather=False):
+    # The dashboard's model without the dashboard: integrate `duration` simulated seconds in
+    # chunks and return the run summary; `output` receives every step (a run directory, or
+    # a compressed archive when it ends in .npz)
+    sim = make_simulator(seed, weather)
+    stats = SimulationStatistics(dt, initial_source=1 if sim.using_inverter else 0)
+    writer = staging = None
+    if output:
+        path = output
+        if output.endswith(".npz"):
+            # The run is staged in a new directory of its own next to the archive, never in a
+            # directory named after `output` (that could hold a recorded run)
+            staging = tempfile.mkdtemp(prefix=".run_", dir=os.path.dirname(os.path.abspath(output)))
+            path = os.path.join(staging, "run")
+        writer = RunWriter(path, columns=RECORD_COLUMNS, parameters={
+            "seed": seed, "dt": dt, "duration": duration, "weather": weather,
+            "battery_capacity": sim.battery_capacity, "inverter_efficiency": sim.inverter_efficiency})
+    backend = get_backend()
+    if backend == "auto" and duration / dt < HEADLESS_COMPILED_MIN_STEPS:
+        backend = "python"
+    try:
+        with use_backend(backend):
+            for chunk in sim.iter_chunks(duration, dt):
+                stats.update_chunk(chunk)
+                if writer is not None:
+                    writer.append(chunk)
+        if writer is not None:
+            writer.close()
+            if staging is not None:
+                archive_run(writer.path, output)
+    finally:
+        if staging is not None:
+            shutil.rmtree(staging)
+    return stats.summary()
 
 class SolarMPPTSimulation:
-    def __init__(self, root):
+    def __init__(self, root, history_size=600, render_mode="classic", frame_interval=100, status_interval=200,
+                 clock="realtime", dt=1.0, seed=None, max_speed=10.0, profile=False, profile_output=None,
+                 record=None, weather=False):
+        _import_gui()
         self.root = root
         self.root.title("Solar MPPT Emergency AC Load Balancing System Simulation")
         self.root.geometry("1200x800")
         self.root.configure(bg="#f0f0f0")
         
-        # System parameters
-        self.solar_power = 0  # Current solar panel output (W)
-        self.battery_voltage = 12.0  # Battery voltage (V)
-        self.battery_capacity = 100.0  # Ah
-        self.battery_soc = 70.0  # State of charge (%)
-        self.mppt_efficiency = 95.0  # MPPT efficiency (%)
-        self.inverter_efficiency = 90.0  # Inverter efficiency (%)
-        self.ac_load = 500.0  # AC load power (W)
-        self.using_inverter = True  # True if using inverter, False if using mains
-        self.pwm_timer = 10.0  # PWM timer for switching (seconds)
-        self.switch_threshold_low = 30.0  # Battery SOC threshold for switching to mains (%)
-        self.switch_threshold_high = 40.0  # Battery SOC threshold for switching back to inverter (%)
-        self.sunlight_intensity = 70.0  # Sunlight intensity (%)
-        self.sunlight_variability = 20.0  # Sunlight variability (%)
+        # Simulation model (headless core) and GUI-only settings
+        self.sim = make_simulator(seed, weather)
         self.simulation_speed = 1.0  # Simulation speed multiplier
+        self.max_speed = max_speed  # Upper end of the speed slider
+        
+        # Clock driving the simulation thread: "realtime" (wall clock x speed), "fixed"
+        # (fixed dt steps as fast as possible) or "catchup" (fixed dt substeps keeping
+        # pace with wall clock x speed); fixed dt with a seed gives reproducible runs
+        self.clock = make_clock(clock, dt)
         
         # Data for plotting
-        self.time_data = deque(maxlen=600)  # 10 minutes of data at 1 second intervals
-        self.battery_data = deque(maxlen=600)
-        self.solar_data = deque(maxlen=600)
-        self.load_data = deque(maxlen=600)
-        self.source_data = deque(maxlen=600)
+        # Columnar ring buffer of the latest samples (e.g. 86400 for 24 h at 1 Hz)
+        self.telemetry = TelemetryBuffer(TELEMETRY_COLUMNS, capacity=history_size)
+        # Min/max/mean pyramid (1 s, 1 min, 15 min, 1 h) for spans longer than that buffer
+        self.history = HistoryPyramid(TELEMETRY_COLUMNS)
+        self.plot_span = PLOT_WINDOW_SECONDS
+        
+        # Rendering: "classic" redraws everything through FuncAnimation, "blit" only redraws
+        # the data lines over a cached background (frame_interval in milliseconds)
+        if render_mode not in RENDER_MODES:
+            raise ValueError(f"Unknown render mode: {render_mode}")
+        self.render_mode = render_mode
+        self.frame_interval = frame_interval
+        self.renderer = None
+        self._frame_job = None
         
         # Simulation state
         self.running = False
-        self.sim_time = 0
+        
+        # Thread hand-off: the simulation thread publishes immutable snapshots (a single
+        # reference swap) and applies parameter changes queued by the Tk thread between
+        # steps; the Tk thread refreshes the status labels from the latest snapshot every
+        # status_interval milliseconds instead of once per simulation step
+        self.snapshot = self.sim.snapshot()
+        self.parameter_updates = queue.SimpleQueue()
+        self.status_interval = status_interval
+        self._status_job = None
+        
+        # Opt-in profiling of the simulation and drawing stages (no-op when disabled);
+        # the summary is shown in the status panel and exported as JSON on stop
+        self.profiler = StageProfiler(enabled=profile)
+        self.profile_output = profile_output
+        self._frame_started = None
+        if profile:
+            self.sim.profiler = self.profiler
+        
+        # Optional recording of every step to a run directory (run_store.py), appended by the
+        # simulation thread through a buffer and flushed on stop; reopen it with load_run().
+        # Recorded time continues from the run's last row (earlier sessions, or before a
+        # reset), so the time column stays increasing and Run.window() can search it
+        self.recorder = None
+        self.record_time_offset = 0.0
+        if record:
+            self.recorder = RunWriter(record, columns=RECORD_COLUMNS, mode="a", parameters={
+                "seed": seed, "clock": clock, "dt": dt, "weather": weather,
+                "battery_capacity": self.sim.battery_capacity, "inverter_efficiency": self.sim.inverter_efficiency})
+            if len(self.recorder):
+                self.record_time_offset = float(load_run(record, columns=["time"])["time"][-1])
         
         # Create the GUI
         self.create_gui()
@@ -62,33 +170,33 @@ class SolarMPPTSimulation:
         
         # Battery controls
         ttk.Label(self.control_frame, text="Battery SOC (%):").grid(row=1, column=0, sticky=tk.W, pady=5)
-        self.battery_soc_var = tk.DoubleVar(value=self.battery_soc)
+        self.battery_soc_var = tk.DoubleVar(value=self.sim.battery_soc)
         ttk.Scale(self.control_frame, from_=0, to=100, variable=self.battery_soc_var, 
                   command=self.update_battery_soc).grid(row=1, column=1, sticky=tk.EW, pady=5)
-        self.battery_soc_label = ttk.Label(self.control_frame, text=f"{self.battery_soc:.1f}%")
+        self.battery_soc_label = ttk.Label(self.control_frame, text=f"{self.sim.battery_soc:.1f}%")
         self.battery_soc_label.grid(row=1, column=2, sticky=tk.W, pady=5)
         
         # Solar controls
         ttk.Label(self.control_frame, text="Sunlight Intensity (%):").grid(row=2, column=0, sticky=tk.W, pady=5)
-        self.sunlight_var = tk.DoubleVar(value=self.sunlight_intensity)
+        self.sunlight_var = tk.DoubleVar(value=self.sim.sunlight_intensity)
         ttk.Scale(self.control_frame, from_=0, to=100, variable=self.sunlight_var, 
                   command=self.update_sunlight).grid(row=2, column=1, sticky=tk.EW, pady=5)
-        self.sunlight_label = ttk.Label(self.control_frame, text=f"{self.sunlight_intensity:.1f}%")
+        self.sunlight_label = ttk.Label(self.control_frame, text=f"{self.sim.sunlight_intensity:.1f}%")
         self.sunlight_label.grid(row=2, column=2, sticky=tk.W, pady=5)
         
         ttk.Label(self.control_frame, text="Sunlight Variability (%):").grid(row=3, column=0, sticky=tk.W, pady=5)
-        self.variability_var = tk.DoubleVar(value=self.sunlight_variability)
+        self.variability_var = tk.DoubleVar(value=self.sim.sunlight_variability)
         ttk.Scale(self.control_frame, from_=0, to=50, variable=self.variability_var, 
                  command=self.update_variability).grid(row=3, column=1, sticky=tk.EW, pady=5)
-        self.variability_label = ttk.Label(self.control_frame, text=f"{self.sunlight_variability:.1f}%")
+        self.variability_label = ttk.Label(self.control_frame, text=f"{self.sim.sunlight_variability:.1f}%")
         self.variability_label.grid(row=3, column=2, sticky=tk.W, pady=5)
         
         # Load controls
         ttk.Label(self.control_frame, text="AC Load (W):").grid(row=4, column=0, sticky=tk.W, pady=5)
-        self.load_var = tk.DoubleVar(value=self.ac_load)
+        self.load_var = tk.DoubleVar(value=self.sim.ac_load)
         ttk.Scale(self.control_frame, from_=0, to=2000, variable=self.load_var, 
                  command=self.update_load).grid(row=4, column=1, sticky=tk.EW, pady=5)
-        self.load_label = ttk.Label(self.control_frame, text=f"{self.ac_load:.1f}W")
+        self.load_label = ttk.Label(self.control_frame, text=f"{self.sim.ac_load:.1f}W")
         self.load_label.grid(row=4, column=2, sticky=tk.W, pady=5)
         
         # MPPT/Switching settings
@@ -96,31 +204,31 @@ class SolarMPPTSimulation:
         ttk.Label(self.control_frame, text="Switching Controls", font=("Arial", 12, "bold")).grid(row=6, column=0, columnspan=2, pady=5)
         
         ttk.Label(self.control_frame, text="Low Battery Threshold (%):").grid(row=7, column=0, sticky=tk.W, pady=5)
-        self.threshold_low_var = tk.DoubleVar(value=self.switch_threshold_low)
+        self.threshold_low_var = tk.DoubleVar(value=self.sim.switch_threshold_low)
         ttk.Scale(self.control_frame, from_=10, to=50, variable=self.threshold_low_var, 
                  command=self.update_threshold_low).grid(row=7, column=1, sticky=tk.EW, pady=5)
-        self.threshold_low_label = ttk.Label(self.control_frame, text=f"{self.switch_threshold_low:.1f}%")
+        self.threshold_low_label = ttk.Label(self.control_frame, text=f"{self.sim.switch_threshold_low:.1f}%")
         self.threshold_low_label.grid(row=7, column=2, sticky=tk.W, pady=5)
         
         ttk.Label(self.control_frame, text="High Battery Threshold (%):").grid(row=8, column=0, sticky=tk.W, pady=5)
-        self.threshold_high_var = tk.DoubleVar(value=self.switch_threshold_high)
+        self.threshold_high_var = tk.DoubleVar(value=self.sim.switch_threshold_high)
         ttk.Scale(self.control_frame, from_=20, to=60, variable=self.threshold_high_var, 
                  command=self.update_threshold_high).grid(row=8, column=1, sticky=tk.EW, pady=5)
-        self.threshold_high_label = ttk.Label(self.control_frame, text=f"{self.switch_threshold_high:.1f}%")
+        self.threshold_high_label = ttk.Label(self.control_frame, text=f"{self.sim.switch_threshold_high:.1f}%")
         self.threshold_high_label.grid(row=8, column=2, sticky=tk.W, pady=5)
         
         ttk.Label(self.control_frame, text="PWM Timer (s):").grid(row=9, column=0, sticky=tk.W, pady=5)
-        self.pwm_timer_var = tk.DoubleVar(value=self.pwm_timer)
+        self.pwm_timer_var = tk.DoubleVar(value=self.sim.pwm_timer)
         ttk.Scale(self.control_frame, from_=1, to=30, variable=self.pwm_timer_var, 
                  command=self.update_pwm_timer).grid(row=9, column=1, sticky=tk.EW, pady=5)
-        self.pwm_timer_label = ttk.Label(self.control_frame, text=f"{self.pwm_timer:.1f}s")
+        self.pwm_timer_label = ttk.Label(self.control_frame, text=f"{self.sim.pwm_timer:.1f}s")
         self.pwm_timer_label.grid(row=9, column=2, sticky=tk.W, pady=5)
         
         # Simulation speed
         ttk.Separator(self.control_frame, orient='horizontal').grid(row=10, column=0, columnspan=3, sticky=tk.EW, pady=10)
         ttk.Label(self.control_frame, text="Simulation Speed:").grid(row=11, column=0, sticky=tk.W, pady=5)
         self.speed_var = tk.DoubleVar(value=self.simulation_speed)
-        ttk.Scale(self.control_frame, from_=0.1, to=10, variable=self.speed_var, 
+        ttk.Scale(self.control_frame, from_=0.1, to=self.max_speed, variable=self.speed_var, 
                  command=self.update_speed).grid(row=11, column=1, sticky=tk.EW, pady=5)
         self.speed_label = ttk.Label(self.control_frame, text=f"{self.simulation_speed:.1f}x")
         self.speed_label.grid(row=11, column=2, sticky=tk.W, pady=5)
@@ -144,6 +252,13 @@ class SolarMPPTSimulation:
         self.load_status_label = ttk.Label(self.status_frame, text="AC Load: 500.0 W", font=("Arial", 11))
         self.load_status_label.grid(row=3, column=0, sticky=tk.W, pady=2, padx=5)
         
+        self.frame_time_label = ttk.Label(self.status_frame, text="Frame Time: -- ms", font=("Arial", 11))
+        self.frame_time_label.grid(row=4, column=0, sticky=tk.W, pady=2, padx=5)
+        
+        if self.profiler.enabled:
+            self.profile_label = ttk.Label(self.status_frame, text="Profile: --", font=("Arial", 9), justify=tk.LEFT)
+            self.profile_label.grid(row=5, column=0, sticky=tk.W, pady=2, padx=5)
+        
         # Control buttons
         self.button_frame = ttk.Frame(self.control_frame)
         self.button_frame.grid(row=15, column=0, columnspan=3, pady=10)
@@ -156,6 +271,14 @@ class SolarMPPTSimulation:
         
         self.reset_button = ttk.Button(self.button_frame, text="Reset Simulation", command=self.reset_simulation)
         self.reset_button.grid(row=0, column=2, padx=5)
+        
+        # Plot zoom
+        ttk.Label(self.control_frame, text="Plot Span:").grid(row=16, column=0, sticky=tk.W, pady=5)
+        self.plot_span_var = tk.StringVar(value="2 min")
+        span_box = ttk.Combobox(self.control_frame, textvariable=self.plot_span_var, values=list(ZOOM_SPANS),
+                                state="readonly", width=10)
+        span_box.grid(row=16, column=1, sticky=tk.W, pady=5)
+        span_box.bind("<<ComboboxSelected>>", self.update_plot_span)
     
     def init_plots(self):
         # Create figure for plotting
@@ -196,56 +319,107 @@ class SolarMPPTSimulation:
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.display_frame)
         self.canvas.draw()
         self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        
+        if self.profiler.enabled:
+            self.canvas.mpl_connect("draw_event", self.on_draw_profile)
+        
+        if self.render_mode == "blit":
+            self.renderer = BlitRenderer(self.canvas, [self.battery_line, self.solar_line, self.load_line, self.source_line],
+                                         frame_budget=self.frame_interval / 1000)
     
     # Update functions for controls
+    def simulation_thread_alive(self):
+        return hasattr(self, 'sim_thread') and self.sim_thread.is_alive()
+    
+    def set_parameter(self, name, value):
+        # While running (or still stopping), the simulation thread or the stop applies the
+        # change before the next step
+        if self.running or self.simulation_thread_alive():
+            self.parameter_updates.put((name, value))
+        else:
+            setattr(self.sim, name, value)
+            self.snapshot = self.sim.snapshot()
+    
+    def apply_parameter_updates(self):
+        # Called on the simulation thread between steps
+        while True:
+            try:
+                name, value = self.parameter_updates.get_nowait()
+            except queue.Empty:
+                return
+            setattr(self.sim, name, value)
+    
     def update_battery_soc(self, value):
-        self.battery_soc = float(value)
-        self.battery_soc_label.config(text=f"{self.battery_soc:.1f}%")
+        self.set_parameter("battery_soc", float(value))
+        self.battery_soc_label.config(text=f"{float(value):.1f}%")
         self.update_status_display()
     
     def update_sunlight(self, value):
-        self.sunlight_intensity = float(value)
-        self.sunlight_label.config(text=f"{self.sunlight_intensity:.1f}%")
+        self.set_parameter("sunlight_intensity", float(value))
+        self.sunlight_label.config(text=f"{float(value):.1f}%")
         self.update_status_display()
     
     def update_variability(self, value):
-        self.sunlight_variability = float(value)
-        self.variability_label.config(text=f"{self.sunlight_variability:.1f}%")
+        self.set_parameter("sunlight_variability", float(value))
+        self.variability_label.config(text=f"{float(value):.1f}%")
     
     def update_load(self, value):
-        self.ac_load = float(value)
-        self.load_label.config(text=f"{self.ac_load:.1f}W")
+        self.set_parameter("ac_load", float(value))
+        self.load_label.config(text=f"{float(value):.1f}W")
         self.update_status_display()
     
     def update_threshold_low(self, value):
-        self.switch_threshold_low = float(value)
-        self.threshold_low_label.config(text=f"{self.switch_threshold_low:.1f}%")
-        if self.switch_threshold_low >= self.switch_threshold_high:
-            self.switch_threshold_high = self.switch_threshold_low + 5
-            self.threshold_high_var.set(self.switch_threshold_high)
-            self.threshold_high_label.config(text=f"{self.switch_threshold_high:.1f}%")
+        threshold_low = float(value)
+        self.set_parameter("switch_threshold_low", threshold_low)
+        self.threshold_low_label.config(text=f"{threshold_low:.1f}%")
+        if threshold_low >= self.threshold_high_var.get():
+            threshold_high = threshold_low + 5
+            self.set_parameter("switch_threshold_high", threshold_high)
+            self.threshold_high_var.set(threshold_high)
+            self.threshold_high_label.config(text=f"{threshold_high:.1f}%")
     
     def update_threshold_high(self, value):
-        self.switch_threshold_high = float(value)
-        self.threshold_high_label.config(text=f"{self.switch_threshold_high:.1f}%")
-        if self.switch_threshold_high <= self.switch_threshold_low:
-            self.switch_threshold_low = self.switch_threshold_high - 5
-            self.threshold_low_var.set(self.switch_threshold_low)
-            self.threshold_low_label.config(text=f"{self.switch_threshold_low:.1f}%")
+        threshold_high = float(value)
+        self.set_parameter("switch_threshold_high", threshold_high)
+        self.threshold_high_label.config(text=f"{threshold_high:.1f}%")
+        if threshold_high <= self.threshold_low_var.get():
+            threshold_low = threshold_high - 5
+            self.set_parameter("switch_threshold_low", threshold_low)
+            self.threshold_low_var.set(threshold_low)
+            self.threshold_low_label.config(text=f"{threshold_low:.1f}%")
     
     def update_pwm_timer(self, value):
-        self.pwm_timer = float(value)
-        self.pwm_timer_label.config(text=f"{self.pwm_timer:.1f}s")
+        self.set_parameter("pwm_timer", float(value))
+        self.pwm_timer_label.config(text=f"{float(value):.1f}s")
     
     def update_speed(self, value):
         self.simulation_speed = float(value)
         self.speed_label.config(text=f"{self.simulation_speed:.1f}x")
     
+    def update_plot_span(self, event=None):
+        self.plot_span = ZOOM_SPANS[self.plot_span_var.get()]
+        if self.renderer is not None:
+            self.renderer.invalidate()
+        if not self.running and len(self.telemetry) > 0:
+            self.update_plot_data()
+            self.canvas.draw_idle()
+    
     def update_status_display(self):
-        self.power_source_label.config(text=f"Power Source: {'Inverter' if self.using_inverter else 'AC Mains'}")
-        self.solar_output_label.config(text=f"Solar Output: {self.solar_power:.1f} W")
-        self.battery_status_label.config(text=f"Battery: {self.battery_soc:.1f}% ({self.battery_voltage:.1f}V)")
-        self.load_status_label.config(text=f"AC Load: {self.ac_load:.1f} W")
+        # Reads only the latest published snapshot, never the live model
+        snapshot = self.snapshot
+        self.power_source_label.config(text=f"Power Source: {'Inverter' if snapshot.using_inverter else 'AC Mains'}")
+        self.solar_output_label.config(text=f"Solar Output: {snapshot.solar_power:.1f} W")
+        self.battery_status_label.config(text=f"Battery: {snapshot.battery_soc:.1f}% ({snapshot.battery_voltage:.1f}V)")
+        self.load_status_label.config(text=f"AC Load: {snapshot.ac_load:.1f} W")
+    
+    def refresh_status(self):
+        # Coalesced status refresh on the Tk thread
+        with self.profiler.stage("status_refresh"):
+            self.update_status_display()
+        if self.profiler.enabled:
+            self.profile_label.config(text=self.profiler.format_summary())
+        if self.running:
+            self._status_job = self.root.after(self.status_interval, self.refresh_status)
     
     def start_simulation(self):
         if not self.running:
@@ -257,30 +431,66 @@ class SolarMPPTSimulation:
             self.sim_thread = threading.Thread(target=self.run_simulation)
             self.sim_thread.daemon = True
             self.sim_thread.start()
+            self._status_job = self.root.after(self.status_interval, self.refresh_status)
             
             # Start animation
-            self.ani = animation.FuncAnimation(self.fig, self.update_plot, interval=100)
-            self.canvas.draw()
+            if self.render_mode == "blit":
+                self.renderer.invalidate()
+                self._frame_job = self.root.after(0, self.render_frame)
+            else:
+                self.ani = animation.FuncAnimation(self.fig, self.update_plot, interval=self.frame_interval)
+                self.canvas.draw()
     
-    def stop_simulation(self):
+    def stop_simulation(self, then=None):
+        # `then` runs on the Tk thread once the model is back in its hands
         self.running = False
-        self.start_button.config(state=tk.NORMAL)
         self.stop_button.config(state=tk.DISABLED)
         if hasattr(self, 'ani'):
             self.ani.event_source.stop()
+        if self._frame_job is not None:
+            self.root.after_cancel(self._frame_job)
+            self._frame_job = None
+        if self._status_job is not None:
+            self.root.after_cancel(self._status_job)
+            self._status_job = None
+        
+        # Let the simulation thread finish its current step, then take over the model again
+        if self.simulation_thread_alive():
+            self.sim_thread.join(timeout=1.0)
+        self.take_over_model(then)
     
-    def reset_simulation(self):
-        self.stop_simulation()
+    def take_over_model(self, then=None):
+        # The model stays the simulation thread's until that thread has exited: keep polling
+        # (the window stays responsive) rather than touching it from two threads
+        if self.simulation_thread_alive():
+            self.root.after(STOP_POLL_INTERVAL, self.take_over_model, then)
+            return
+        self.start_button.config(state=tk.NORMAL)
+        self.apply_parameter_updates()
+        self.snapshot = self.sim.snapshot()
+        self.update_status_display()
         
+        if self.profiler.enabled and self.profile_output:
+            self.profiler.export(self.profile_output)
+        if self.recorder is not None:
+            self.recorder.flush()
+        if then is not None:
+            then()
+    
+    def reset_simulation(self):
+        self.stop_simulation(then=self.reset_model)
+    
+    def reset_model(self):
         # Reset data
-        self.time_data.clear()
-        self.battery_data.clear()
-        self.solar_data.clear()
-        self.load_data.clear()
-        self.source_data.clear()
+        self.telemetry.clear()
+        self.history.clear()
         
-        # Reset simulation time
-        self.sim_time = 0
+        # Reset simulation time and the PWM timer, and restart the (seeded) solar random stream;
+        # the recording carries on from the time reached so far
+        self.record_time_offset += self.sim.sim_time
+        self.sim.sim_time = 0
+        self.sim.last_switch_time = None
+        self.sim.reseed()
         
         # Reset plots
         for line in [self.battery_line, self.solar_line, self.load_line, self.source_line]:
@@ -289,146 +499,174 @@ class SolarMPPTSimulation:
         self.canvas.draw()
         self.update_status_display()
     
-    def calculate_solar_power(self):
-        # Simulate solar panel output based on intensity and variability
-        max_solar_power = 1000  # Maximum possible solar power (W)
-        base_power = (self.sunlight_intensity / 100) * max_solar_power
-        
-        # Add variability
-        if self.sunlight_variability > 0:
-            variability_factor = random.uniform(-self.sunlight_variability, self.sunlight_variability) / 100
-            solar_power = base_power * (1 + variability_factor)
-        else:
-            solar_power = base_power
-        
-        # Apply MPPT efficiency
-        self.solar_power = max(0, solar_power * (self.mppt_efficiency / 100))
-        return self.solar_power
-    
-    def update_battery(self, solar_power, load_power, time_delta):
-        # Calculate power balance
-        if self.using_inverter:
-            # Inverter mode: battery supplies load power
-            power_from_battery = load_power / (self.inverter_efficiency / 100)
-        else:
-            # AC Mains mode: battery doesn't supply load
-            power_from_battery = 0
-        
-        # Calculate net power to battery
-        net_power = solar_power - power_from_battery
-        
-        # Update battery state of charge
-        battery_energy_wh = self.battery_capacity * self.battery_voltage
-        energy_change_wh = net_power * (time_delta / 3600)  # Convert seconds to hours
-        
-        # Factor to account for charging efficiency (higher when charging, lower when discharging)
-        if net_power > 0:
-            efficiency = 0.95  # 95% charging efficiency
-        else:
-            efficiency = 1.0  # 100% discharging efficiency (already accounted for in inverter)
-        
-        energy_change_wh *= efficiency
-        
-        # Update battery energy
-        current_energy_wh = (self.battery_soc / 100) * battery_energy_wh
-        new_energy_wh = current_energy_wh + energy_change_wh
-        
-        # Calculate new SOC
-        new_soc = (new_energy_wh / battery_energy_wh) * 100
-        self.battery_soc = max(0, min(100, new_soc))
-        
-        # Update battery voltage based on SOC (simplified model)
-        if self.battery_soc > 80:
-            self.battery_voltage = 12.7 + (self.battery_soc - 80) * 0.03 / 20
-        elif self.battery_soc > 50:
-            self.battery_voltage = 12.2 + (self.battery_soc - 50) * 0.5 / 30
-        elif self.battery_soc > 20:
-            self.battery_voltage = 11.8 + (self.battery_soc - 20) * 0.4 / 30
-        else:
-            self.battery_voltage = 11.0 + (self.battery_soc) * 0.8 / 20
-    
-    def check_power_switching(self):
-        # Check if we need to switch power source based on battery SOC
-        if self.using_inverter and self.battery_soc <= self.switch_threshold_low:
-            self.using_inverter = False
-            self.last_switch_time = self.sim_time
-        elif not self.using_inverter and self.battery_soc >= self.switch_threshold_high:
-            # Only switch back after PWM timer has elapsed
-            if hasattr(self, 'last_switch_time') and (self.sim_time - self.last_switch_time) >= self.pwm_timer:
-                self.using_inverter = True
-    
     def run_simulation(self):
-        last_time = time.time()
+        sim = self.sim
+        profiler = self.profiler
+        recorder = self.recorder
+        time_offset = self.record_time_offset
+        self.clock.start()
         
         while self.running:
-            current_time = time.time()
-            real_delta = current_time - last_time
-            sim_delta = real_delta * self.simulation_speed  # Scale by simulation speed
+            profiler.interval("tick_interval")
+            with profiler.stage("tick"):
+                # Apply slider changes queued by the Tk thread
+                self.apply_parameter_updates()
+                
+                # Advance the model (solar power, battery state and source switching) by the
+                # steps the clock hands out for this iteration
+                for sim_delta in self.clock.tick(self.simulation_speed):
+                    sim.step(sim_delta)
+                    
+                    # Store data for plotting
+                    with profiler.stage("telemetry_append"):
+                        self.telemetry.append(sim.sim_time, sim.battery_soc, sim.solar_power,
+                                              sim.ac_load, 1 if sim.using_inverter else 0)
+                        self.history.append(sim.sim_time, sim.battery_soc, sim.solar_power,
+                                            sim.ac_load, 1 if sim.using_inverter else 0)
+                    if recorder is not None:
+                        recorder.append_row(time_offset + sim.sim_time, sim.battery_soc, sim.battery_voltage,
+                                            sim.solar_power, sim.ac_load, 1 if sim.using_inverter else 0)
+                
+                # Publish the new state for the Tk thread (one atomic reference swap)
+                self.snapshot = sim.snapshot()
             
-            # Update simulation time
-            self.sim_time += sim_delta
-            
-            # Calculate solar power
-            solar_power = self.calculate_solar_power()
-            
-            # Update battery state
-            self.update_battery(solar_power, self.ac_load, sim_delta)
-            
-            # Check power source switching
-            self.check_power_switching()
-            
-            # Update status display (in main thread)
-            self.root.after(0, self.update_status_display)
-            
-            # Store data for plotting
-            self.time_data.append(self.sim_time)
-            self.battery_data.append(self.battery_soc)
-            self.solar_data.append(solar_power)
-            self.load_data.append(self.ac_load)
-            self.source_data.append(1 if self.using_inverter else 0)
-            
-            # Update last time
-            last_time = current_time
-            
-            # Sleep a bit to not overload CPU
-            time.sleep(0.05)
+            # Wait (or yield) before the next iteration
+            self.clock.wait()
+    
+    def on_draw_profile(self, event):
+        # Classic mode: FuncAnimation draws after update_plot returns, so a frame ends here
+        if self._frame_started is not None:
+            self.profiler.record("frame_time", time.perf_counter() - self._frame_started)
+            self._frame_started = None
     
     def update_plot(self, frame):
+        if self.profiler.enabled:
+            self.profiler.interval("frame_interval", self.frame_interval / 1000)
+            self._frame_started = time.perf_counter()
+        with self.profiler.stage("plot_update"):
+            return self.update_plot_data()
+    
+    def plot_window(self):
+        """Data for the selected plot span, bounded by the plot width whatever the span.
+
+        Uses the raw telemetry (min/max decimated) while it still holds the whole span, else
+        the history pyramid level with at most two buckets per pixel column, drawn as its
+        min/max envelope. Returns (latest time, {line: (x, y)}, max solar, max load).
+        """
+        latest = self.telemetry.latest("time")
+        span = self.plot_span
+        columns = self.ax1.bbox.width
+        lines = (self.battery_line, self.solar_line, self.load_line, self.source_line)
+        
+        if len(self.history) <= len(self.telemetry) or self.telemetry.view("time")[0] <= latest - span:
+            # Zero-copy views of one consistent window of the ring buffer
+            visible = self.telemetry.window(self.telemetry.count_since("time", latest - span))
+            time_array = visible[0]
+            data = {line: decimate_minmax(time_array, values, columns) for line, values in zip(lines, visible[1:])}
+            # Running maxima kept by the buffer
+            max_solar = self.telemetry.maximum("solar_power", default=100)
+            max_load = self.telemetry.maximum("load", default=500)
+        else:
+            width, buckets = self.history.query(span, max_points=int(2 * columns))
+            centre = buckets["time"] + width / 2
+            data = {line: envelope(centre, buckets[f"{name}_min"], buckets[f"{name}_max"])
+                    for line, name in zip(lines, TELEMETRY_COLUMNS[1:])}
+            max_solar = buckets["solar_power_max"].max(initial=100)
+            max_load = buckets["load_max"].max(initial=500)
+        return latest, data, max_solar, max_load
+    
+    def update_plot_data(self):
         # Update plot data if we have data
-        if len(self.time_data) > 0:
-            time_array = np.array(self.time_data)
+        if len(self.telemetry) > 0:
+            latest_time, data, max_solar, max_load = self.plot_window()
+            for line, (x, y) in data.items():
+                line.set_data(x, y)
             
-            # Update battery and solar lines
-            self.battery_line.set_data(time_array, np.array(self.battery_data))
-            self.solar_line.set_data(time_array, np.array(self.solar_data))
-            
-            # Update load line
-            self.load_line.set_data(time_array, np.array(self.load_data))
-            
-            # Update source line
-            self.source_line.set_data(time_array, np.array(self.source_data))
-            
-            # Adjust x-axis limits to show the most recent data (last 120 seconds)
-            if max(time_array) > 120:
-                x_min = max(time_array) - 120
-            else:
-                x_min = 0
-            x_max = max(time_array) + 5
+            # Adjust x-axis limits to show the most recent data (the selected span)
+            x_min = max(0, latest_time - self.plot_span)
+            x_max = latest_time + self.plot_span / 24
             
             for ax in [self.ax1, self.ax2, self.ax3]:
                 ax.set_xlim(x_min, x_max)
             
             # Adjust y-axis limits for battery and solar
-            max_solar = max(np.array(self.solar_data)) if len(self.solar_data) > 0 else 100
             self.ax1.set_ylim(0, max(100, max_solar * 1.1))
             
             # Adjust y-axis limits for load
-            max_load = max(np.array(self.load_data)) if len(self.load_data) > 0 else 500
             self.ax2.set_ylim(0, max_load * 1.1)
             
         return self.battery_line, self.solar_line, self.load_line, self.source_line
 
+    def render_frame(self):
+        # Blitted frame: only the visible window, decimated to the plot width, with axis
+        # limits (and the cached background) changed only when they actually move
+        if not self.running:
+            return
+        
+        self.profiler.interval("frame_interval", self.frame_interval / 1000)
+        elapsed = 0.0
+        if len(self.telemetry) > 0:
+            latest_time, data, max_solar, max_load = self.plot_window()
+            x_min, x_max = sliding_limits(latest_time, self.plot_span, margin=self.plot_span / 24)
+            
+            for ax in [self.ax1, self.ax2, self.ax3]:
+                self.renderer.set_limits(ax, xlim=(x_min, x_max))
+            self.renderer.set_limits(self.ax1, ylim=(0, max(100, max_solar * 1.1)))
+            self.renderer.set_limits(self.ax2, ylim=(0, max_load * 1.1))
+            
+            elapsed = self.renderer.render(data)
+            self.profiler.record("frame_time", elapsed)
+            stats = self.renderer.frame_stats()
+            self.frame_time_label.config(text=f"Frame Time: {stats['last_ms']:.1f} ms "
+                                              f"(avg {stats['mean_ms']:.1f}, late {stats['late_frames']})")
+        
+        # Throttle: leave the Tk loop at least as much idle time as the frame took
+        delay = max(self.frame_interval, int(elapsed * 2000))
+        self._frame_job = self.root.after(delay, self.render_frame)
+
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = SolarMPPTSimulation(root)
-    root.mainloop()
+    parser = argparse.ArgumentParser(description="Solar MPPT emergency AC load balancing dashboard")
+    parser.add_argument("--render-mode", choices=RENDER_MODES, default="classic")
+    parser.add_argument("--history-size", type=int, default=600, help="samples kept for plotting")
+    parser.add_argument("--clock", choices=CLOCK_MODES, default="realtime",
+                        help="realtime (wall clock x speed), fixed (as fast as possible) or catchup")
+    parser.add_argument("--dt", type=float, default=1.0, help="timestep of the fixed and catchup clocks and of headless runs (seconds)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the solar variability")
+    parser.add_argument("--max-speed", type=float, default=10.0,
+                        help="upper end of the speed slider (e.g. 3600 with --clock catchup)")
+    parser.add_argument("--profile", action="store_true", help="time each simulation and drawing stage")
+    parser.add_argument("--profile-output", default=None, help="JSON file written with the profile on stop")
+    parser.add_argument("--record", default=None, help="run directory every step is appended to (run_store.py)")
+    parser.add_argument("--weather", action="store_true",
+                        help="generated weather (day/night, clouds) instead of the sunlight sliders")
+    parser.add_argument("--headless", action="store_true",
+                        help="run the model without the dashboard (Tk and matplotlib are never imported)")
+    parser.add_argument("--duration", type=float, default=86_400.0, help="headless: simulated seconds")
+    parser.add_argument("--output", default=None, help="headless: run directory or .npz receiving every step")
+    args = parser.parse_args()
+    
+    if args.output and not args.headless:
+        parser.error("--output requires --headless (use --record to save a dashboard run)")
+    
+    if args.headless:
+        start = time.perf_counter()
+        summary = run_headless(args.duration, args.dt, args.seed, args.output, args.weather)
+        print(f"{summary['steps']:,} steps of {args.dt:g} s in {time.perf_counter() - start:.2f} s: "
+              f"final SOC {summary['final_soc']:.1f}%, min SOC {summary['battery_soc']['min']:.1f}%, "
+              f"{summary['switch_events']} source switches, {summary['time_on_mains_s'] / 3600:.2f} h on mains")
+        if args.output:
+            print(f"Run written to {os.path.abspath(args.output)}")
+    else:
+        _import_gui()
+        root = tk.Tk()
+        app = SolarMPPTSimulation(root, history_size=args.history_size, render_mode=args.render_mode,
+                                  clock=args.clock, dt=args.dt, seed=args.seed,
+                                  max_speed=args.max_speed, profile=args.profile or bool(args.profile_output),
+                                  profile_output=args.profile_output, record=args.record, weather=args.weather)
+        root.mainloop()
+        if app.recorder is not None:
+            # Window closed: stop the simulation thread before writing out the last buffered rows
+            app.running = False
+            if hasattr(app, 'sim_thread'):
+                app.sim_thread.join(timeout=1.0)
+            app.recorder.close()
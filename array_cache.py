@@ -0,0 +1,220 @@
+# Array Cache - content-addressed cache for intermediate arrays
+#
+# Description:
+# Keeps arrays that are expensive to recompute (controller outputs, relay states) under a
+# key hashed from everything they were computed from: the bytes of the input trace, the
+# parameters, and the function that computed them (module, name and bytecode, so editing a
+# controller invalidates its entries). A stage's key can include the key of the stage it
+# reads from, so changing one relay setting only misses the relay stage that uses it.
+# Every key is also salted with CACHE_VERSION, the source of the simulation modules (the
+# keyed functions' own modules and SOURCE_MODULES, so editing a callee such as
+# relay_engine.advanced_relay invalidates too) and the active JIT backend.
+#
+# Two levels:
+# - an in-memory LRU bounded by total bytes, for repeated runs within one session,
+# - optionally a directory of .npy files bounded by total size, shared between sessions
+#   and processes. Hits refresh a file's modification time and the least recently used
+#   files are evicted first (never the file just written, nor a file handed out with
+#   keep(key)). Files are written under a temporary name and renamed, so a concurrent reader
+#   never sees a partial file, and other processes can memory-map an entry from keep(key).
+# Cached arrays are read-only: a hit hands out the cached array (memory-mapped when it comes
+# from disk), not a copy.
+#
+# Usage:
+#   cache = ArrayCache(".array_cache")
+#   key = array_key(solar_power, constant_efficiency, {"efficiency": 0.95})
+#   output = cache.get_or_compute(key, lambda: compute_output(solar_power))
+
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+import types
+from collections import OrderedDict
+
+import numpy as np
+
+from jit_backend import get_backend, numba_available
+
+CACHE_VERSION = 1  # Bump to invalidate every cached array
+SOURCE_MODULES = ("controllers", "relay_engine", "pv_models", "battery_models", "solar_sim_core", "jit_backend")
+DEFAULT_DIRECTORY = ".array_cache"
+MEMORY_BYTES = 256 * 2 ** 20
+DISK_BYTES = 2 * 2 ** 30
+
+
+_sources = {}  # Module name -> digest of its source file, per process
+_backends = {}  # jit_backend.get_backend() -> backend the kernels actually run on, per process
+
+
+def _source_digest(name):
+    digest = _sources.get(name)
+    if digest is None:
+        module = sys.modules.get(name)
+        path = getattr(module, "__file__", None)
+        if path is None:
+            spec = importlib.util.find_spec(name)
+            path = spec.origin if spec is not None else None
+        try:
+            with open(path, "rb") as file:
+                digest = hashlib.sha1(file.read()).hexdigest()
+        except (OSError, TypeError):
+            digest = ""  # Built-in or missing: keyed by name only
+        _sources[name] = digest
+    return digest
+
+
+def _salt():
+    # What every key depends on besides its parts
+    selected = get_backend()
+    backend = _backends.get(selected)
+    if backend is None:
+        backend = selected
+        if backend == "auto":
+            backend = "numba" if numba_available() else "python"
+        _backends[selected] = backend
+    sources = [(name, _source_digest(name)) for name in SOURCE_MODULES]
+    return json.dumps([CACHE_VERSION, backend, sources])
+
+
+def _array_digest(array):
+    digest = hashlib.sha1(f"{array.dtype.str}{array.shape}".encode())
+    digest.update(np.ascontiguousarray(array))  # The buffer itself, without a bytes copy
+    return digest.hexdigest()
+
+
+def _encode(value):
+    # JSON stand-ins for arrays, NumPy scalars and functions (by code, not by address)
+    if isinstance(value, np.ndarray):
+        return _array_digest(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    code = getattr(value, "__code__", None)
+    if code is not None:
+        consts = [const for const in code.co_consts if not isinstance(const, types.CodeType)]
+        body = hashlib.sha1(code.co_code + repr((consts, value.__defaults__)).encode()).hexdigest()
+        return [value.__module__, _source_digest(value.__module__), value.__qualname__, body]
+    return str(value)
+
+
+def array_key(*parts):
+    """Hash of arrays (by content), functions (by code) and JSON-like parameters (salted, see _salt)."""
+    digest = hashlib.sha1(_salt().encode())
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(_array_digest(part).encode())
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=_encode).encode())
+    return digest.hexdigest()[:20]
+
+
+class ArrayCache:
+    def __init__(self, directory=None, memory_bytes=MEMORY_BYTES, disk_bytes=DISK_BYTES):
+        """In-memory LRU of up to `memory_bytes`, backed by `directory` (up to `disk_bytes`) if given."""
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory = OrderedDict()  # key -> array, least recently used first
+        self._memory_size = 0
+        self._kept = set()  # Paths handed out by keep(), never evicted by this cache
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def path(self, key):
+        # The entry's .npy file in the cache directory (present once it has been put)
+        return os.path.join(self.directory, f"{key}.npy")
+
+    def keep(self, key):
+        # Path of a stored entry for other readers (e.g. worker processes memory-mapping it);
+        # this cache no longer evicts it
+        path = self.path(key)
+        self._kept.add(path)
+        return path
+
+    def _remember(self, key, array):
+        if array.nbytes > self.memory_bytes:
+            return
+        if key in self._memory:
+            self._memory_size -= self._memory.pop(key).nbytes
+        self._memory[key] = array
+        self._memory_size += array.nbytes
+        while self._memory_size > self.memory_bytes:
+            self._memory_size -= self._memory.popitem(last=False)[1].nbytes
+
+    def get(self, key):
+        # The cached array, or None
+        array = self._memory.get(key)
+        if array is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return array
+        if self.directory is not None:
+            path = self.path(key)
+            try:
+                array = np.load(path, mmap_mode="r")
+                os.utime(path)
+            except (OSError, ValueError):
+                array = None  # Missing, evicted or unreadable: computed again
+            if array is not None:
+                self.disk_hits += 1
+                self._remember(key, array)
+                return array
+        self.misses += 1
+        return None
+
+    def put(self, key, array):
+        # Store `array` as is (it is made read-only) and return it
+        array = np.asarray(array)
+        array.flags.writeable = False
+        self._remember(key, array)
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+            temporary = os.path.join(self.directory, f"{key}.{os.getpid()}.tmp")
+            with open(temporary, "wb") as file:
+                np.save(file, array)
+            os.replace(temporary, self.path(key))
+            self._evict(keep=self.path(key))
+        return array
+
+    def get_or_compute(self, key, compute):
+        array = self.get(key)
+        return self.put(key, compute()) if array is None else array
+
+    def _files(self):
+        # (modification time, size, path) of the cached files, oldest first
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".npy"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue  # Evicted by another process
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        return sorted(files)
+
+    def _evict(self, keep=None):
+        files = self._files()
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.disk_bytes:
+                break
+            if path == keep or path in self._kept:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def disk_size(self):
+        return sum(size for _, size, _ in self._files()) if self.directory and os.path.isdir(self.directory) else 0
+
+    def clear(self):
+        self._memory.clear()
+        self._memory_size = 0
+        if self.directory is not None and os.path.isdir(self.directory):
+            for _, _, path in self._files():
+                os.remove(path)
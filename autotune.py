@@ -0,0 +1,294 @@
+# Autotune - search relay and SOC switching parameters against a trace
+#
+# Description:
+# Replaces the hand-picked switching constants with a search that minimises a cost:
+# - relay mode tunes on_threshold, off_threshold, on_delay and off_delay of the advanced
+#   relay (Solar_MPPT_Load_Balancing_Sim.py) on a charge controller's output power,
+#   cost = switch_weight * switches + energy_weight * (Wh of output lost while the relay is
+#   OFF + Wh short of the relay's load_power while it is ON),
+# - soc mode tunes switch_threshold_low, switch_threshold_high and pwm_timer of the
+#   battery/switching model (SolarMPPTSimulation / solar_sim_core.py) on solar and load
+#   series, cost = switch_weight * source switches + mains_weight * hours on mains.
+# The trace is a recorded site log (site_logs.py) or the simulator's own synthetic solar.
+#
+# Why it is fast:
+# - Everything that does not depend on the tuned parameters is computed once and kept in the
+#   on-disk ArrayCache (array_cache.py: .npy files keyed with array_key, bounded in size and
+#   written atomically): the controller output for relay mode, the solar and load series for
+#   soc mode. Workers memory-map the cache instead of receiving copies, and a repeated run
+#   with the same trace skips the precomputation entirely.
+# - Relay candidates are scored by the relay engine's timer kernel (relay_engine.relay_timers,
+#   compiled through jit_backend.py), run for a whole batch of candidates keeping only the
+#   switch count and energy totals, so no relay state array is allocated per candidate.
+# - SOC candidates only run the battery/switching kernel over the cached series, chunk by
+#   chunk, reduced with the online statistics.
+# - Candidates are evaluated in batches across processes, and the search refines a coarse
+#   grid around the best point each round instead of evaluating one fine grid.
+#
+# Usage (from the repository root):
+#   python autotune.py relay --days 365 --dt 1 --controller mppt
+#   python autotune.py soc --log site.csv --dt 1 --rounds 4 --points 6
+
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from array_cache import DEFAULT_DIRECTORY, ArrayCache, array_key
+from controllers import CONTROLLERS
+from jit_backend import compiled
+from online_stats import SimulationStatistics
+from relay_engine import delay_steps, relay_timers
+from solar_sim_core import CHUNK_STEPS, SolarBatterySimulator
+
+# Search ranges (the GUI slider ranges for the SOC parameters)
+RELAY_SPACE = {"on_threshold": (30.0, 70.0), "off_threshold": (20.0, 60.0), "on_delay": (0.0, 5.0), "off_delay": (0.0, 10.0)}
+SOC_SPACE = {"switch_threshold_low": (10.0, 50.0), "switch_threshold_high": (20.0, 60.0), "pwm_timer": (1.0, 30.0)}
+
+BATCH_SIZE = 16  # Candidates per worker task
+
+_loaded = {}  # Memory-mapped cache files, per process
+_NO_STATES = np.empty((0, 0), dtype=np.int8)  # relay_timers() keeps no states for candidates
+
+
+def input_cache(cache_dir):
+    # The run's on-disk cache; nothing is kept in memory, the workers memory-map the files
+    return ArrayCache(cache_dir, memory_bytes=0)
+
+
+def cached_array(cache, key, compute):
+    # Path of the .npy for `key` in `cache`, computing (and saving) it on a miss; the path
+    # stays in place (kept from eviction) for the rest of the run
+    cache.get_or_compute(key, compute)
+    return cache.keep(key)
+
+
+def _load(path):
+    array = _loaded.get(path)
+    if array is None:
+        array = _loaded[path] = np.load(path, mmap_mode="r")
+    return array
+
+
+class RelayObjective:
+    def __init__(self, output_path, dt, load_power=40.0, switch_weight=1.0, energy_weight=1.0):
+        self.output_path = output_path  # Cached controller output (.npy)
+        self.dt = dt
+        self.load_power = load_power  # Power (W) the relay's load draws while connected
+        self.switch_weight = switch_weight
+        self.energy_weight = energy_weight
+
+    @staticmethod
+    def valid(candidate):
+        return candidate["off_threshold"] < candidate["on_threshold"]
+
+    def evaluate(self, candidates):
+        power = _load(self.output_path)
+        on_threshold = np.array([c["on_threshold"] for c in candidates], dtype=float)
+        off_threshold = np.array([c["off_threshold"] for c in candidates], dtype=float)
+        on_steps = np.array([delay_steps(c["on_delay"], self.dt) for c in candidates], dtype=np.int64)
+        off_steps = np.array([delay_steps(c["off_delay"], self.dt) for c in candidates], dtype=np.int64)
+        switches = np.zeros(len(candidates), dtype=np.int64)
+        off_energy = np.zeros(len(candidates))
+        shortfall = np.zeros(len(candidates))
+
+        # The relay engine's timer loop over the one trace for every candidate, keeping only
+        # the totals (no state array), compiled unless the JIT backend is "python"
+        kernel = compiled(relay_timers) or relay_timers
+        kernel(np.asarray(power)[np.newaxis], on_threshold, off_threshold, on_steps, off_steps,
+               float(self.load_power), _NO_STATES, switches, off_energy, shortfall)
+
+        results = []
+        for k in range(len(candidates)):
+            energy_lost_wh = float(off_energy[k]) * self.dt / 3600
+            shortfall_wh = float(shortfall[k]) * self.dt / 3600
+            results.append({
+                "switches": int(switches[k]),
+                "energy_lost_wh": energy_lost_wh,
+                "shortfall_wh": shortfall_wh,
+                "cost": self.switch_weight * int(switches[k]) + self.energy_weight * (energy_lost_wh + shortfall_wh),
+            })
+        return results
+
+
+class SocObjective:
+    def __init__(self, solar_path, load_path, dt, params=None, switch_weight=1.0, mains_weight=1.0):
+        self.solar_path = solar_path  # Cached solar power series (.npy)
+        self.load_path = load_path  # Cached load series (.npy), or None for the constant ac_load
+        self.dt = dt
+        self.params = dict(params or {})  # Fixed simulator parameters (capacity, load, ...)
+        self.switch_weight = switch_weight
+        self.mains_weight = mains_weight
+
+    @staticmethod
+    def valid(candidate):
+        return candidate["switch_threshold_low"] < candidate["switch_threshold_high"]
+
+    def _samples(self, solar, load):
+        # The cached series as iter_replay() input, one chunk at a time
+        for start in range(0, len(solar), CHUNK_STEPS):
+            end = min(start + CHUNK_STEPS, len(solar))
+            sample = {"time": np.arange(start, end) * self.dt, "solar_power": np.asarray(solar[start:end])}
+            if load is not None:
+                sample["load"] = np.asarray(load[start:end])
+            yield sample
+
+    def evaluate(self, candidates):
+        solar = _load(self.solar_path)
+        load = _load(self.load_path) if self.load_path else None
+        results = []
+        for candidate in candidates:
+            sim = SolarBatterySimulator(**{**self.params, **candidate})
+            stats = SimulationStatistics(self.dt, initial_source=1 if sim.using_inverter else 0)
+            for chunk in sim.iter_replay(self._samples(solar, load), self.dt):
+                stats.update_chunk(chunk)
+            hours_on_mains = stats.time_on_mains / 3600
+            results.append({
+                "switches": stats.source.switches,
+                "hours_on_mains": hours_on_mains,
+                "min_soc": stats.battery_soc.minimum,
+                "cost": self.switch_weight * stats.source.switches + self.mains_weight * hours_on_mains,
+            })
+        return results
+
+
+def _evaluate_batch(objective, candidates):
+    return objective.evaluate(candidates)
+
+
+def _grid(ranges, points):
+    names = list(ranges)
+    axes = [np.unique(np.linspace(low, high, points)) for low, high in ranges.values()]
+    for values in itertools.product(*axes):
+        yield {name: float(value) for name, value in zip(names, values)}
+
+
+def tune(objective, space, rounds=3, points=5, max_workers=None, batch_size=BATCH_SIZE):
+    """Minimise objective's cost over `space` ({name: (low, high)}) by successive grid refinement.
+
+    Each round evaluates a `points`-per-axis grid (skipping invalid and already evaluated
+    candidates) and narrows every range to one grid step around the best candidate.
+    Returns (best candidate, its metrics, list of (candidate, metrics) evaluated).
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    ranges = dict(space)
+    evaluated = {}
+    executor = ProcessPoolExecutor(max_workers) if max_workers > 1 else None
+    try:
+        for _ in range(rounds):
+            candidates = [candidate for candidate in _grid(ranges, points)
+                          if objective.valid(candidate) and tuple(candidate.values()) not in evaluated]
+            batches = [candidates[start:start + batch_size] for start in range(0, len(candidates), batch_size)]
+            if executor is None:
+                scored = map(objective.evaluate, batches)
+            else:
+                scored = executor.map(_evaluate_batch, itertools.repeat(objective), batches)
+            for batch, metrics in zip(batches, scored):
+                for candidate, result in zip(batch, metrics):
+                    evaluated[tuple(candidate.values())] = (candidate, result)
+            if not evaluated:
+                raise ValueError("No valid candidate in the search space")
+
+            best = min(evaluated.values(), key=lambda item: item[1]["cost"])[0]
+            for name, (low, high) in space.items():
+                step = (ranges[name][1] - ranges[name][0]) / max(points - 1, 1)
+                ranges[name] = (max(low, best[name] - step), min(high, best[name] + step))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    best, metrics = min(evaluated.values(), key=lambda item: item[1]["cost"])
+    return best, metrics, list(evaluated.values())
+
+
+def load_trace(path, dt, columns=("solar_power", "load")):
+    # A recorded site log resampled to the fixed timestep, as whole arrays
+    from site_logs import read_log, resample
+    parts = {name: [] for name in columns}
+    for chunk in resample(read_log(path, columns=columns), dt):
+        for name in columns:
+            parts[name].append(chunk[name])
+    return {name: np.concatenate(values) if values else np.empty(0) for name, values in parts.items()}
+
+
+def relay_objective(args):
+    if args.log:
+        trace = load_trace(args.log, args.dt, ("solar_power",))["solar_power"]
+        source = array_key(trace)
+    else:
+        source = {"synthetic": "relay", "days": args.days, "dt": args.dt, "seed": args.seed}
+        trace = None
+
+    def controller_output():
+        # Cloudy-day solar input as in Solar_MPPT_Load_Balancing_Sim.py, through the controller
+        solar = trace
+        if solar is None:
+            rng = np.random.default_rng(args.seed)
+            t = np.arange(int(args.days * 86_400 / args.dt)) * args.dt
+            solar = 50 + 30 * np.sin(t / 60) + 20 * rng.standard_normal(t.size)
+        function, params = CONTROLLERS[args.controller]
+        output = np.empty(len(solar))
+        function(solar, output, **params)
+        return output
+
+    path = cached_array(input_cache(args.cache_dir), array_key("relay", source, args.controller), controller_output)
+    objective = RelayObjective(path, args.dt, args.load_power, args.switch_weight, args.energy_weight)
+    return objective, RELAY_SPACE
+
+
+def soc_objective(args):
+    params = {"battery_capacity": args.battery_capacity, "ac_load": args.ac_load}
+    cache = input_cache(args.cache_dir)
+    load_path = None
+    if args.log:
+        trace = load_trace(args.log, args.dt)
+        key = array_key(trace["solar_power"], trace["load"])
+        solar_path = cached_array(cache, f"{key}_solar", lambda: trace["solar_power"])
+        load_path = cached_array(cache, f"{key}_load", lambda: trace["load"])
+    else:
+        # The simulator's own solar model: independent of the tuned parameters, so drawn once
+        steps = int(round(args.days * 86_400 / args.dt))
+        key = array_key("soc", args.days, args.dt, args.seed)
+        solar_path = cached_array(cache, f"{key}_solar",
+                                  lambda: SolarBatterySimulator(seed=args.seed).solar_power_series(steps))
+    objective = SocObjective(solar_path, load_path, args.dt, params, args.switch_weight, args.mains_weight)
+    return objective, SOC_SPACE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search switching parameters that minimise a cost on a trace")
+    parser.add_argument("mode", choices=("relay", "soc"))
+    parser.add_argument("--log", default=None, help="recorded site log (default: synthetic trace)")
+    parser.add_argument("--days", type=float, default=30.0, help="length of the synthetic trace")
+    parser.add_argument("--dt", type=float, default=1.0, help="timestep (seconds)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--controller", default="mppt", help="relay mode: registered controller model")
+    parser.add_argument("--load-power", type=float, default=40.0, help="relay mode: power the relay's load draws (W)")
+    parser.add_argument("--battery-capacity", type=float, default=100.0, help="soc mode (Ah)")
+    parser.add_argument("--ac-load", type=float, default=500.0, help="soc mode, without a log (W)")
+    parser.add_argument("--switch-weight", type=float, default=1.0, help="cost per switching operation")
+    parser.add_argument("--energy-weight", type=float, default=1.0, help="relay mode: cost per Wh lost or short")
+    parser.add_argument("--mains-weight", type=float, default=1.0, help="soc mode: cost per hour on mains")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--points", type=int, default=5, help="grid points per parameter and round")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--cache-dir", default=DEFAULT_DIRECTORY)
+    parser.add_argument("--output", default=None, help="JSON file with every evaluated candidate")
+    args = parser.parse_args()
+
+    objective, space = relay_objective(args) if args.mode == "relay" else soc_objective(args)
+    best, metrics, evaluated = tune(objective, space, args.rounds, args.points, args.workers)
+
+    print(f"{len(evaluated)} candidates evaluated")
+    print("Best parameters: " + ", ".join(f"{name}={value:g}" for name, value in best.items()))
+    print("Metrics: " + ", ".join(f"{name}={value:g}" for name, value in metrics.items()))
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump([{**candidate, **result} for candidate, result in evaluated], output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
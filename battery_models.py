@@ -0,0 +1,144 @@
+# Battery Models - open-circuit voltage (OCV) curves
+#
+# Description:
+# Battery voltage as a function of state of charge, stored as precomputed lookup tables
+# instead of an if/elif chain. A curve is a set of SOC breakpoints with the voltage at
+# each breakpoint, optionally for several temperatures. Values in between are linearly
+# interpolated (np.interp on arrays, a bisect lookup on plain floats), so the same curve
+# serves the per-tick dashboard, the long-horizon integration loop and fleet-wide arrays.
+#
+# The "flooded_lead_acid" preset is the original simplified model of the dashboard
+# (11.0 V at 0%, 11.8 V at 20%, 12.2 V at 50%, 12.7 V at 80%, 12.73 V at 100%, 25 C).
+# The other presets are typical 12 V resting-voltage tables and are approximate.
+
+from bisect import bisect_right
+
+import numpy as np
+
+REFERENCE_TEMPERATURE = 25.0  # C, temperature of the preset tables
+PRESET_TEMPERATURES = (-20.0, 0.0, 25.0, 45.0)
+
+# SOC breakpoints (%), voltages at 25 C (V, 12 V pack) and temperature coefficient (V/C)
+CHEMISTRY_PRESETS = {
+    "flooded_lead_acid": {
+        "soc": (0.0, 20.0, 50.0, 80.0, 100.0),
+        "voltage": (11.0, 11.8, 12.2, 12.7, 12.73),
+        "temperature_coefficient": 0.0012,
+    },
+    "agm": {
+        "soc": (0.0, 20.0, 40.0, 60.0, 80.0, 100.0),
+        "voltage": (11.5, 11.9, 12.2, 12.4, 12.6, 12.85),
+        "temperature_coefficient": 0.0012,
+    },
+    "lifepo4": {
+        "soc": (0.0, 10.0, 20.0, 30.0, 40.0, 50.0, 60.0, 70.0, 80.0, 90.0, 100.0),
+        "voltage": (10.0, 12.0, 12.8, 12.9, 13.0, 13.05, 13.1, 13.2, 13.25, 13.3, 13.4),
+        "temperature_coefficient": 0.0005,
+    },
+}
+
+
+class OCVCurve:
+    def __init__(self, soc_points, voltages, temperatures=None):
+        self.soc_points = np.asarray(soc_points, dtype=float)
+        voltages = np.asarray(voltages, dtype=float)
+        if self.soc_points.ndim != 1 or np.any(np.diff(self.soc_points) <= 0):
+            raise ValueError("soc_points must be a strictly increasing 1-D sequence")
+
+        if temperatures is None:
+            if voltages.shape != self.soc_points.shape:
+                raise ValueError("voltages must have one value per SOC point")
+            self.temperatures = np.array([REFERENCE_TEMPERATURE])
+            self.voltages = voltages[np.newaxis, :]
+        else:
+            self.temperatures = np.asarray(temperatures, dtype=float)
+            if np.any(np.diff(self.temperatures) <= 0):
+                raise ValueError("temperatures must be strictly increasing")
+            if voltages.shape != (len(self.temperatures), len(self.soc_points)):
+                raise ValueError("voltages must be a (temperatures, soc_points) table")
+            self.voltages = voltages
+
+        self._tables = {}
+
+    @classmethod
+    def preset(cls, chemistry):
+        # Temperature-indexed curve for one of CHEMISTRY_PRESETS
+        try:
+            spec = CHEMISTRY_PRESETS[chemistry]
+        except KeyError:
+            raise ValueError(f"Unknown battery chemistry: {chemistry} "
+                             f"(choose from {', '.join(CHEMISTRY_PRESETS)})") from None
+        base = np.asarray(spec["voltage"])
+        offsets = (np.asarray(PRESET_TEMPERATURES) - REFERENCE_TEMPERATURE) * spec["temperature_coefficient"]
+        table = base[np.newaxis, :] + offsets[:, np.newaxis]
+        # Keep the reference row exactly as specified
+        table[PRESET_TEMPERATURES.index(REFERENCE_TEMPERATURE)] = base
+        return cls(spec["soc"], table, PRESET_TEMPERATURES)
+
+    def _temperature_weights(self, temperature):
+        # Row index and blend weight for a temperature (clamped to the table range)
+        temps = self.temperatures
+        if len(temps) == 1:
+            return 0, 0.0
+        temperature = min(max(float(temperature), temps[0]), temps[-1])
+        row = min(bisect_right(temps.tolist(), temperature) - 1, len(temps) - 2)
+        weight = (temperature - temps[row]) / (temps[row + 1] - temps[row])
+        return row, weight
+
+    def table(self, temperature=None):
+        """(soc_points, voltages, slopes) lists for one temperature, cached per temperature."""
+        temperature = REFERENCE_TEMPERATURE if temperature is None else float(temperature)
+        cached = self._tables.get(temperature)
+        if cached is None:
+            row, weight = self._temperature_weights(temperature)
+            if weight == 0.0:
+                voltages = self.voltages[row]
+            else:
+                voltages = (1 - weight) * self.voltages[row] + weight * self.voltages[row + 1]
+            soc_points = self.soc_points.tolist()
+            voltages = voltages.tolist()
+            # Same slope formula np.interp uses, so scalar and array lookups agree exactly
+            slopes = [(voltages[j + 1] - voltages[j]) / (soc_points[j + 1] - soc_points[j])
+                      for j in range(len(soc_points) - 1)]
+            cached = (soc_points, voltages, slopes)
+            self._tables[temperature] = cached
+        return cached
+
+    def voltage(self, soc, temperature=None):
+        """Battery voltage for a SOC (%) value or array, at one temperature or one per SOC value."""
+        if isinstance(soc, (int, float)) and (temperature is None or isinstance(temperature, (int, float))):
+            return _lookup(float(soc), *self.table(temperature))
+        if temperature is None or np.ndim(temperature) == 0:
+            soc_points, voltages, slopes = self.table(temperature)
+            if np.ndim(soc) == 0:
+                return _lookup(float(soc), soc_points, voltages, slopes)
+            return np.interp(soc, soc_points, voltages)
+
+        # One temperature per value: blend the two neighbouring temperature rows
+        soc, temperature = np.broadcast_arrays(np.asarray(soc, dtype=float), np.asarray(temperature, dtype=float))
+        first = temperature.flat[0] if temperature.size else REFERENCE_TEMPERATURE
+        if np.all(temperature == first):
+            return np.interp(soc, *self.table(first)[:2])
+        if len(self.temperatures) == 1:
+            return np.interp(soc, self.soc_points, self.voltages[0])
+
+        temps = self.temperatures
+        clamped = np.clip(temperature, temps[0], temps[-1])
+        row = np.clip(np.searchsorted(temps, clamped, side="right") - 1, 0, len(temps) - 2)
+        weight = (clamped - temps[row]) / (temps[row + 1] - temps[row])
+        rows = np.stack([np.interp(soc, self.soc_points, voltages) for voltages in self.voltages])
+        lower = np.take_along_axis(rows, row[np.newaxis], axis=0)[0]
+        upper = np.take_along_axis(rows, row[np.newaxis] + 1, axis=0)[0]
+        return (1 - weight) * lower + weight * upper
+
+
+def _lookup(soc, soc_points, voltages, slopes):
+    # Scalar piecewise-linear lookup matching np.interp (clamped at both ends)
+    if soc != soc:
+        return soc  # NaN passes through, as in np.interp
+    if soc < soc_points[0]:
+        return voltages[0]
+    if soc >= soc_points[-1]:
+        return voltages[-1]
+    j = bisect_right(soc_points, soc) - 1
+    return slopes[j] * (soc - soc_points[j]) + voltages[j]
@@ -0,0 +1,91 @@
+# Array Cache Benchmark
+#
+# Description:
+# Sweeps one relay strategy's threshold over one trace with the controller comparison of
+# Solar_MPPT_Load_Balancing_Sim.py (simple and advanced relay), once per strategy, three ways:
+# - without a cache: every setting recomputes the controller outputs and both relays,
+# - with an in-memory ArrayCache: the outputs and the other relay's states come from an
+#   earlier run, and the trace is hashed once for the sweep (run(..., trace_key)),
+# - with a fresh ArrayCache on a warm directory per setting, as separate sessions would:
+#   the unchanged stages are memory-mapped from disk and the trace is hashed every run.
+# Checks that the cached runs give the same outputs and relay states, and reports the time
+# of run() per setting.
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_array_cache [--samples 1000000] [--settings 8] [--controllers 2]
+
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from array_cache import ArrayCache, array_key
+from controllers import ControllerComparison
+
+from .bench_controllers import controller_names
+
+DT = 0.1
+RELAYS = {"simple": {"threshold": 40},
+          "advanced": {"on_threshold": 45, "off_threshold": 35, "on_delay": 0.5, "off_delay": 1.0}}
+SWEPT = {"simple": ("threshold", 35, 50), "advanced": ("on_threshold", 42, 55)}  # Parameter and range
+
+
+def settings(relay, count):
+    parameter, low, high = SWEPT[relay]
+    for value in np.linspace(low, high, count).tolist():
+        yield {**RELAYS, relay: {**RELAYS[relay], parameter: value}}
+
+
+def sweep(controllers, solar_power, relay, count, cache_factory, hash_once=False):
+    # Digests of the results (taken outside the timing) and seconds per setting
+    results = []
+    elapsed = 0.0
+    trace_key = array_key(solar_power) if hash_once else None
+    for relays in settings(relay, count):
+        start = time.perf_counter()
+        result = ControllerComparison(controllers, relays, DT, cache_factory()).run(solar_power, trace_key)
+        elapsed += time.perf_counter() - start
+        results.append(array_key(result.outputs, result.relay_states))
+    return results, elapsed / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Relay setting sweeps with and without the array cache")
+    parser.add_argument("--samples", type=int, default=1_000_000)
+    parser.add_argument("--settings", type=int, default=8)
+    parser.add_argument("--controllers", type=int, default=2, help="MPPT and PWM, then efficiency variants")
+    args = parser.parse_args()
+    controllers = controller_names(args.controllers)
+
+    rng = np.random.default_rng(0)
+    t = np.arange(args.samples) * DT
+    solar_power = 50 + 30 * np.sin(t / 60) + 20 * rng.standard_normal(args.samples)
+    ControllerComparison(controllers, RELAYS, DT).run(solar_power[:1000])  # Load the relay kernel
+    print(f"{args.settings} relay settings over {args.samples:,} samples, {len(controllers)} controllers:")
+
+    for relay in SWEPT:
+        directory = tempfile.mkdtemp(prefix="array_cache_bench_")
+        try:
+            # Warm both caches with the unchanged stages, as an earlier run would have
+            memory = ArrayCache()
+            sweep(controllers, solar_power, relay, 1, lambda: memory)
+            sweep(controllers, solar_power, relay, 1, lambda: ArrayCache(directory))
+            reference, uncached = sweep(controllers, solar_power, relay, args.settings, lambda: None)
+            in_memory_results, in_memory = sweep(controllers, solar_power, relay, args.settings, lambda: memory,
+                                                 hash_once=True)
+            on_disk_results, on_disk = sweep(controllers, solar_power, relay, args.settings,
+                                             lambda: ArrayCache(directory))
+        finally:
+            shutil.rmtree(directory)
+
+        same = in_memory_results == reference == on_disk_results
+        print(f"  sweeping the {relay} relay's {SWEPT[relay][0]} (results identical: {same}):")
+        for name, seconds in [("no cache", uncached), ("in-memory cache", in_memory),
+                              ("fresh cache per setting, warm directory", on_disk)]:
+            print(f"    {name:<42}{seconds * 1000:8.1f} ms per setting ({uncached / seconds:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# Autotune Benchmark
+#
+# Description:
+# Scores a batch of relay candidates from the autotune search grid on one long controller
+# output trace, two ways:
+# - per candidate: the relay state array of advanced_relay, then the switch count and the
+#   energy lost / short from it (what a hand-written sweep would do),
+# - batched through RelayObjective (the compiled kernel keeps only the totals).
+# Checks that both give the same metrics and reports the time per candidate, then times a
+# full successive-refinement search and extrapolates the per-candidate path to it.
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_autotune [--samples 1000000] [--candidates 64]
+
+import argparse
+import itertools
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from autotune import RELAY_SPACE, RelayObjective, _grid, cached_array, input_cache, tune
+from relay_engine import advanced_relay, delay_steps
+
+DT = 0.5
+LOAD_POWER = 40.0
+
+
+def controller_output(samples, seed=42):
+    rng = np.random.default_rng(seed)
+    t = np.arange(samples) * DT
+    return np.clip((50 + 30 * np.sin(t / 60) + 20 * rng.standard_normal(samples)) * 0.95, 0, 100)
+
+
+def per_candidate(power, candidates):
+    results = []
+    for candidate in candidates:
+        relay = advanced_relay(power, candidate["on_threshold"], candidate["off_threshold"],
+                               delay_steps(candidate["on_delay"], DT), delay_steps(candidate["off_delay"], DT))
+        on = relay == 1
+        results.append({
+            "switches": int(np.count_nonzero(np.diff(relay))),
+            "energy_lost_wh": float(power[~on].sum()) * DT / 3600,
+            "shortfall_wh": float(np.maximum(LOAD_POWER - power[on], 0).sum()) * DT / 3600,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-candidate versus batched relay autotuning")
+    parser.add_argument("--samples", type=int, default=1_000_000)
+    parser.add_argument("--candidates", type=int, default=64)
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix="autotune_bench_")
+    try:
+        power = controller_output(args.samples)
+        objective = RelayObjective(cached_array(input_cache(cache_dir), "output", lambda: power), DT, LOAD_POWER)
+        candidates = list(itertools.islice((candidate for candidate in _grid(RELAY_SPACE, 5)
+                                            if objective.valid(candidate)), args.candidates))
+        objective.evaluate(candidates[:1])  # Warm-up (kernel compilation)
+
+        start = time.perf_counter()
+        expected = per_candidate(power, candidates)
+        loop_time = time.perf_counter() - start
+        start = time.perf_counter()
+        result = objective.evaluate(candidates)
+        batched_time = time.perf_counter() - start
+        for candidate, before, after in zip(candidates, expected, result):
+            if before["switches"] != after["switches"] or not all(
+                    np.isclose(before[name], after[name]) for name in ("energy_lost_wh", "shortfall_wh")):
+                raise AssertionError(f"{candidate}: per candidate {before} != batched {after}")
+
+        start = time.perf_counter()
+        best, metrics, evaluated = tune(objective, RELAY_SPACE)
+        tune_time = time.perf_counter() - start
+
+        print(f"{len(candidates)} relay candidates, {args.samples:,} samples: identical metrics")
+        print(f"  per candidate  {loop_time / len(candidates) * 1000:8.2f} ms / candidate")
+        print(f"  batched        {batched_time / len(candidates) * 1000:8.2f} ms / candidate")
+        print(f"  search: {len(evaluated)} candidates in {tune_time:.2f} s "
+              f"(~{loop_time / len(candidates) * len(evaluated):.0f} s scoring them one by one), "
+              f"best {', '.join(f'{name}={value:g}' for name, value in best.items())}")
+    finally:
+        shutil.rmtree(cache_dir)
+
+
+if __name__ == "__main__":
+    main()
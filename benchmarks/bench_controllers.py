@@ -0,0 +1,107 @@
+# Controller Comparison Benchmark
+#
+# Description:
+# Compares N controller models x the simple and advanced relay strategies on one long
+# cloudy trace, two ways:
+# - per controller, as Solar_MPPT_Load_Balancing_Sim.py used to: an output array, a simple
+#   relay array and an advanced relay array per controller, then the switch statistics,
+# - batched through ControllerComparison (one shared output array, one state array, each
+#   relay strategy called once for all rows, buffers reused across runs).
+# Checks that both give the same outputs and switch counts, and reports the runtime and
+# the peak memory allocated by each (tracemalloc, in a separate untimed pass).
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_controllers [--controllers 12] [--samples 1000000]
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from controllers import CONTROLLERS, ControllerComparison, constant_efficiency, register_controller
+from online_stats import ControllerStatistics
+from relay_engine import advanced_relay, delay_steps, simple_relay
+
+DT = 0.1
+
+
+def cloudy_trace(samples, seed=42):
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0, samples / 10, samples)
+    return 50 + 30 * np.sin(t) + 20 * rng.standard_normal(samples)
+
+
+def controller_names(count):
+    # The registered models plus MPPT variants of decreasing efficiency up to `count`
+    names = list(CONTROLLERS)
+    for index in range(count - len(names)):
+        name = f"mppt_{94 - index}"
+        register_controller(name, constant_efficiency, efficiency=(94 - index) / 100)
+        names.append(name)
+    return names[:count]
+
+
+def per_controller(solar_power, names):
+    statistics = {}
+    for name in names:
+        function, params = CONTROLLERS[name]
+        output = np.empty_like(solar_power)
+        function(solar_power, output, **params)
+        simple = simple_relay(output, 40)
+        advanced = advanced_relay(output, 45, 35, delay_steps(0.5, DT), delay_steps(1.0, DT))
+        stats = ControllerStatistics(DT)
+        stats.update_many(output, simple=simple, advanced=advanced)
+        statistics[name] = (stats.power.mean, stats.switches("simple"), stats.switches("advanced"))
+    return statistics
+
+
+def batched(comparison, solar_power):
+    result = comparison.run(solar_power)
+    switches = result.switches()
+    means = result.outputs.mean(axis=1)
+    return {name: (means[index], int(switches[0, index]), int(switches[1, index]))
+            for index, name in enumerate(result.controllers)}
+
+
+def timed(function, *args):
+    function(*args)  # Warm-up (kernel compilation, buffers)
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def peak_memory(function, *args):
+    tracemalloc.start()
+    function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-controller versus batched controller comparison")
+    parser.add_argument("--controllers", type=int, default=12)
+    parser.add_argument("--samples", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    solar_power = cloudy_trace(args.samples)
+    names = controller_names(args.controllers)
+    comparison = ControllerComparison(names, ["simple", "advanced"], DT)
+
+    expected, loop_time = timed(per_controller, solar_power, names)
+    result, batched_time = timed(batched, comparison, solar_power)
+    for name in names:
+        if not np.isclose(expected[name][0], result[name][0]) or expected[name][1:] != result[name][1:]:
+            raise AssertionError(f"{name}: per-controller {expected[name]} != batched {result[name]}")
+
+    loop_memory = peak_memory(per_controller, solar_power, names)
+    batched_memory = peak_memory(batched, comparison, solar_power)
+
+    print(f"{len(names)} controllers x 2 relay strategies, {args.samples:,} samples: identical results")
+    print(f"  per controller  {loop_time:8.3f} s   peak {loop_memory / 1e6:8.1f} MB")
+    print(f"  batched         {batched_time:8.3f} s   peak {batched_memory / 1e6:8.1f} MB (buffers reused)")
+
+
+if __name__ == "__main__":
+    main()
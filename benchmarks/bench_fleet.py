@@ -0,0 +1,68 @@
+# Fleet Simulation Benchmark
+#
+# Description:
+# Reports site-steps per second for the vectorized fleet_sim.FleetSimulator versus
+# stepping one solar_sim_core.SolarBatterySimulator object per site.
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_fleet [--sites 5000] [--steps 600]
+
+import argparse
+import time
+
+import numpy as np
+
+from fleet_sim import FleetSimulator
+from solar_sim_core import SolarBatterySimulator
+
+
+def site_parameters(sites, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "battery_capacity": rng.uniform(50, 300, sites),
+        "ac_load": rng.uniform(200, 1500, sites),
+        "sunlight_intensity": rng.uniform(20, 90, sites),
+        "pwm_timer": rng.uniform(5, 30, sites),
+    }
+
+
+def bench_objects(params, steps, dt):
+    sims = [SolarBatterySimulator(seed=site, **{name: float(values[site]) for name, values in params.items()})
+            for site in range(len(params["ac_load"]))]
+    start = time.perf_counter()
+    for _ in range(steps):
+        for sim in sims:
+            sim.step(dt)
+    return time.perf_counter() - start
+
+
+def bench_fleet(params, steps, dt):
+    fleet = FleetSimulator(len(params["ac_load"]), seed=0, **params)
+    start = time.perf_counter()
+    for _ in range(steps):
+        fleet.step(dt)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fleet simulation benchmark")
+    parser.add_argument("--sites", type=int, default=5000)
+    parser.add_argument("--steps", type=int, default=600)
+    parser.add_argument("--object-steps", type=int, default=20,
+                        help="steps for the (slow) one-object-per-site path")
+    parser.add_argument("--dt", type=float, default=1.0)
+    args = parser.parse_args()
+
+    params = site_parameters(args.sites)
+    object_time = bench_objects(params, args.object_steps, args.dt)
+    fleet_time = bench_fleet(params, args.steps, args.dt)
+
+    object_rate = args.sites * args.object_steps / object_time
+    fleet_rate = args.sites * args.steps / fleet_time
+    print(f"Sites: {args.sites:,}")
+    print(f"Scalar objects: {object_rate / 1e6:8.3f} M site-steps/s")
+    print(f"Vectorized fleet: {fleet_rate / 1e6:6.3f} M site-steps/s ({fleet_rate / object_rate:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# Headless Simulation Core Benchmark
+#
+# Description:
+# Times solar_sim_core.SolarBatterySimulator.run over a day, a month and a year of
+# simulated time at a fixed 1 s step.
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_headless_core [--record-every 60]
+
+import argparse
+import time
+
+from solar_sim_core import SolarBatterySimulator
+
+DURATIONS = (("day", 86_400), ("month", 30 * 86_400), ("year", 365 * 86_400))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless simulation core benchmark")
+    parser.add_argument("--dt", type=float, default=1.0)
+    parser.add_argument("--record-every", type=int, default=60,
+                        help="keep every Nth step in the returned arrays")
+    args = parser.parse_args()
+
+    # Warm-up run so one-off compilation is not counted
+    SolarBatterySimulator(seed=0).run(3600, dt=args.dt)
+
+    for label, duration in DURATIONS:
+        sim = SolarBatterySimulator(seed=0, ac_load=800.0, sunlight_intensity=45.0)
+        start = time.perf_counter()
+        result = sim.run(duration, dt=args.dt, record_every=args.record_every)
+        elapsed = time.perf_counter() - start
+        steps = int(round(duration / args.dt))
+        print(f"{label:<6} {steps:>12,} steps  {elapsed:7.2f} s  "
+              f"({steps / elapsed / 1e6:6.2f} M steps/s, final SOC {result['battery_soc'][-1]:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
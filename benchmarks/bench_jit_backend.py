@@ -0,0 +1,150 @@
+# JIT Backend Equivalence Check and Benchmark
+#
+# Description:
+# Verifies that every compiled kernel (battery/switching integration, MPPT tracking, relay
+# timers) produces exactly the same output as its pure-Python implementation on randomised
+# inputs, then prints a table of one-year (1 s step) runtimes for both backends.
+# Pure-Python times are measured over --python-days of data and scaled to a year.
+# Exits with status 1 if any kernel disagrees.
+# The same equivalence is asserted by tests/test_jit_equivalence.py (python -m pytest tests).
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_jit_backend [--python-days 2] [--cases 20]
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from jit_backend import get_backend, numba_available, use_backend
+from pv_models import TRACKER_METHODS, MPPTracker
+from relay_engine import advanced_relay
+from solar_sim_core import RESULT_FIELDS, SolarBatterySimulator
+
+YEAR_STEPS = 365 * 86_400
+
+
+def random_parameters(rng):
+    low = float(rng.uniform(10, 60))
+    return {
+        "battery_capacity": float(rng.uniform(20, 300)),
+        "battery_soc": float(rng.uniform(0, 100)),
+        "ac_load": float(rng.uniform(0, 2000)),
+        "sunlight_intensity": float(rng.uniform(0, 100)),
+        "sunlight_variability": float(rng.choice([0.0, rng.uniform(0, 60)])),
+        "switch_threshold_low": low,
+        "switch_threshold_high": low + float(rng.uniform(1, 30)),
+        "pwm_timer": float(rng.uniform(0, 60)),
+        "battery_temperature": float(rng.uniform(-20, 45)),
+        "ocv_curve": str(rng.choice(["flooded_lead_acid", "agm", "lifepo4"])),
+        "mppt_tracker": rng.choice([None, *TRACKER_METHODS]),
+    }
+
+
+def check_core(cases, seed=0):
+    rng = np.random.default_rng(seed)
+    for case in range(cases):
+        params = random_parameters(rng)
+        dt = float(rng.choice([0.1, 1.0, 5.0, 60.0]))
+        results = []
+        for backend in ("python", "numba"):
+            with use_backend(backend):
+                results.append(SolarBatterySimulator(seed=case, **params).run(5000 * dt, dt))
+        for name in RESULT_FIELDS:
+            if not np.array_equal(results[0][name], results[1][name]):
+                raise AssertionError(f"core: {name} differs for case {case} ({params}, dt={dt})")
+    return cases
+
+
+def check_tracker(cases, seed=0):
+    rng = np.random.default_rng(seed)
+    for case in range(cases):
+        method = str(rng.choice(list(TRACKER_METHODS)))
+        irradiance = rng.uniform(0, 1200) * (1 + rng.uniform(-0.5, 0.5, 5000))
+        temperature = float(rng.uniform(-10, 60))
+        outputs = []
+        for backend in ("python", "numba"):
+            with use_backend(backend):
+                outputs.append(MPPTracker(method, temperature=temperature).track(irradiance, compiled=True))
+        if not np.array_equal(*outputs):
+            raise AssertionError(f"tracker: {method} differs for case {case}")
+    return cases
+
+
+def check_relay(cases, seed=0):
+    rng = np.random.default_rng(seed)
+    for case in range(cases):
+        power = rng.uniform(0, 100, (int(rng.integers(1, 5)), int(rng.integers(1, 2000))))
+        on_threshold = float(rng.uniform(20, 70))
+        args = (on_threshold, on_threshold - float(rng.uniform(-10, 30)),
+                int(rng.integers(0, 12)), int(rng.integers(0, 12)))
+        expected = advanced_relay(power, *args, backend="python")
+        if not np.array_equal(expected, advanced_relay(power, *args, backend="numba")):
+            raise AssertionError(f"relay: differs for case {case} ({args})")
+    return cases
+
+
+def time_core(steps, tracker=None):
+    sim = SolarBatterySimulator(seed=0, mppt_tracker=tracker)
+    start = time.perf_counter()
+    sim.run(steps, 1.0, record_every=60)
+    return time.perf_counter() - start
+
+
+def time_tracker(steps):
+    irradiance = 700 * (1 + np.random.default_rng(0).uniform(-0.2, 0.2, steps))
+    tracker = MPPTracker()
+    start = time.perf_counter()
+    tracker.track(irradiance, compiled=True)
+    return time.perf_counter() - start
+
+
+def time_relay(steps):
+    rng = np.random.default_rng(0)
+    power = np.clip(50 + 30 * np.sin(np.arange(steps) / 600) + 20 * rng.standard_normal(steps), 0, 100)
+    start = time.perf_counter()
+    # The relay engine picks its own backend per call; follow the selected JIT backend
+    advanced_relay(power, backend="python" if get_backend() == "python" else "numba")
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JIT backend equivalence check and benchmark")
+    parser.add_argument("--cases", type=int, default=20, help="random cases per kernel")
+    parser.add_argument("--python-days", type=float, default=2.0,
+                        help="simulated days timed with the pure-Python backend (scaled to a year)")
+    args = parser.parse_args()
+
+    if not numba_available():
+        print("Numba is not installed: only the pure-Python backend is available")
+        return
+
+    try:
+        print(f"Equivalence: core {check_core(args.cases)}, tracker {check_tracker(args.cases)}, "
+              f"relay {check_relay(args.cases)} random cases identical on both backends")
+    except AssertionError as error:
+        print(f"FAILED: {error}")
+        sys.exit(1)
+
+    python_steps = int(args.python_days * 86_400)
+    scale = YEAR_STEPS / python_steps
+    kernels = (
+        ("core run (constant MPPT)", lambda steps: time_core(steps)),
+        ("core run (P&O tracker)", lambda steps: time_core(steps, "perturb_observe")),
+        ("MPPT tracker only", time_tracker),
+        ("relay timers", time_relay),
+    )
+
+    print(f"\n{'One year at 1 s':<26}{'python (s)':>12}{'numba (s)':>12}{'speedup':>10}")
+    for label, timer in kernels:
+        with use_backend("python"):
+            python_time = timer(python_steps) * scale
+        with use_backend("numba"):
+            timer(3600)  # Warm-up (compilation or on-disk cache load)
+            numba_time = timer(YEAR_STEPS)
+        print(f"{label:<26}{python_time:12.1f}{numba_time:12.2f}{python_time / numba_time:9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
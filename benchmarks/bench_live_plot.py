@@ -0,0 +1,111 @@
+# Live Plot Benchmark
+#
+# Description:
+# Frame cost of the dashboard plots with a full history, rendered off-screen (Agg):
+# the classic path (all lines reset and a full canvas draw every frame) versus the
+# blitted path (visible window decimated to the plot width, cached background).
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_live_plot [--history 86400] [--frames 50]
+
+import argparse
+import time
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from live_plot import BlitRenderer, decimate_minmax, sliding_limits
+from telemetry import TelemetryBuffer
+
+COLUMNS = ("time", "battery_soc", "solar_power", "load", "source")
+WINDOW = 120
+
+
+def build_figure():
+    # Same layout as SolarMPPTSimulation.init_plots
+    fig = Figure(figsize=(10, 8), dpi=100)
+    fig.subplots_adjust(hspace=0.4)
+    ax1 = fig.add_subplot(3, 1, 1)
+    battery_line, = ax1.plot([], [], 'b-', label='Battery SOC (%)')
+    solar_line, = ax1.plot([], [], 'y-', label='Solar Output (W)')
+    ax1.legend(loc='upper left')
+    ax1.grid(True)
+    ax2 = fig.add_subplot(3, 1, 2)
+    load_line, = ax2.plot([], [], 'g-', label='AC Load (W)')
+    ax2.legend(loc='upper left')
+    ax2.grid(True)
+    ax3 = fig.add_subplot(3, 1, 3)
+    ax3.set_ylim(-0.5, 1.5)
+    source_line, = ax3.plot([], [], 'r-', drawstyle='steps-post')
+    ax3.grid(True)
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+    return canvas, (ax1, ax2, ax3), (battery_line, solar_line, load_line, source_line)
+
+
+def filled_buffer(history, rate=1.0, seed=0):
+    rng = np.random.default_rng(seed)
+    buffer = TelemetryBuffer(COLUMNS, capacity=history)
+    for i in range(history):
+        buffer.append(i / rate, 50 + 20 * np.sin(i / 500), 600 + rng.uniform(-120, 120), 500.0, float(i // 900 % 2))
+    return buffer
+
+
+def classic_frame(buffer, axes, lines, canvas):
+    time_array, *columns = buffer.window()
+    for line, values in zip(lines, columns):
+        line.set_data(time_array, values)
+    latest = time_array[-1]
+    for ax in axes:
+        ax.set_xlim(max(0, latest - WINDOW), latest + 5)
+    axes[0].set_ylim(0, max(100, buffer.maximum("solar_power") * 1.1))
+    axes[1].set_ylim(0, buffer.maximum("load") * 1.1)
+    canvas.draw()
+
+
+def blit_frame(buffer, axes, lines, renderer):
+    x_min, x_max = sliding_limits(buffer.latest("time"), WINDOW)
+    time_array, *columns = buffer.window(buffer.count_since("time", x_min))
+    width = axes[0].bbox.width
+    data = {line: decimate_minmax(time_array, values, width) for line, values in zip(lines, columns)}
+    for ax in axes:
+        renderer.set_limits(ax, xlim=(x_min, x_max))
+    renderer.set_limits(axes[0], ylim=(0, max(100, buffer.maximum("solar_power") * 1.1)))
+    renderer.set_limits(axes[1], ylim=(0, buffer.maximum("load") * 1.1))
+    renderer.render(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live plot frame-time benchmark")
+    parser.add_argument("--history", type=int, default=86_400)
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=1.0, help="samples per simulated second")
+    args = parser.parse_args()
+
+    buffer = filled_buffer(args.history, args.rate)
+
+    canvas, axes, lines = build_figure()
+    start = time.perf_counter()
+    for _ in range(args.frames):
+        buffer.append(buffer.latest("time") + 1 / args.rate, 50.0, 600.0, 500.0, 1.0)
+        classic_frame(buffer, axes, lines, canvas)
+    classic = (time.perf_counter() - start) / args.frames
+
+    canvas, axes, lines = build_figure()
+    renderer = BlitRenderer(canvas, lines)
+    start = time.perf_counter()
+    for _ in range(args.frames):
+        buffer.append(buffer.latest("time") + 1 / args.rate, 50.0, 600.0, 500.0, 1.0)
+        blit_frame(buffer, axes, lines, renderer)
+    blitted = (time.perf_counter() - start) / args.frames
+    stats = renderer.frame_stats()
+
+    print(f"History: {len(buffer):,} samples, {args.frames} frames")
+    print(f"Classic full redraw: {classic * 1000:8.1f} ms/frame")
+    print(f"Blitted + decimated: {blitted * 1000:8.1f} ms/frame (render max {stats['max_ms']:.1f} ms, "
+          f"{stats['late_frames']} over the {renderer.frame_budget * 1000:.0f} ms budget)")
+
+
+if __name__ == "__main__":
+    main()
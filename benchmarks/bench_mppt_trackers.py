@@ -0,0 +1,54 @@
+# MPPT Tracker Benchmark
+#
+# Description:
+# Times a year of simulated time at 1 s through solar_sim_core.SolarBatterySimulator with
+# the constant MPPT efficiency and with each pv_models tracker, and reports the tracking
+# efficiency (tracked / available power) of each tracker under the simulator's fluctuating
+# sunlight.
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_mppt_trackers [--days 365]
+
+import argparse
+import time
+
+import numpy as np
+
+from pv_models import TRACKER_METHODS, MPPTracker
+from solar_sim_core import SolarBatterySimulator
+
+
+def tracking_efficiency(method, steps, seed=0):
+    rng = np.random.default_rng(seed)
+    irradiance = 700 * (1 + rng.uniform(-0.2, 0.2, steps))
+    tracker = MPPTracker(method)
+    tracked = tracker.track(irradiance, compiled=True)
+    return tracked.sum() / tracker.pv_array.max_power(irradiance).sum()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MPPT tracker benchmark")
+    parser.add_argument("--days", type=float, default=365)
+    parser.add_argument("--dt", type=float, default=1.0)
+    args = parser.parse_args()
+    duration = args.days * 86_400
+
+    baseline = None
+    for method in (None, *TRACKER_METHODS):
+        # Warm-up run so one-off compilation is not counted
+        SolarBatterySimulator(seed=0, mppt_tracker=method).run(3600, dt=args.dt)
+
+        sim = SolarBatterySimulator(seed=0, mppt_tracker=method)
+        start = time.perf_counter()
+        result = sim.run(duration, dt=args.dt, record_every=60)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+
+        label = method or "constant efficiency"
+        efficiency = "" if method is None else f", tracking efficiency {tracking_efficiency(method, 100_000):.1%}"
+        print(f"{label:<24} {elapsed:6.2f} s ({elapsed / baseline:.1f}x), "
+              f"mean solar {result['solar_power'].mean():6.1f} W{efficiency}")
+
+
+if __name__ == "__main__":
+    main()
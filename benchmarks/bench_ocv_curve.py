@@ -0,0 +1,61 @@
+# OCV Curve Benchmark
+#
+# Description:
+# Compares battery_models.OCVCurve with the if/elif voltage chain the dashboard used in
+# update_battery, for plain floats and for arrays of SOC values.
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_ocv_curve [--samples 1000000]
+
+import argparse
+import timeit
+
+import numpy as np
+
+from battery_models import OCVCurve
+
+
+def voltage_chain(soc):
+    # Original simplified model from update_battery
+    if soc > 80:
+        return 12.7 + (soc - 80) * 0.03 / 20
+    elif soc > 50:
+        return 12.2 + (soc - 50) * 0.5 / 30
+    elif soc > 20:
+        return 11.8 + (soc - 20) * 0.4 / 30
+    else:
+        return 11.0 + (soc) * 0.8 / 20
+
+
+def best_time(func, number):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCV curve microbenchmark")
+    parser.add_argument("--samples", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    curve = OCVCurve.preset("flooded_lead_acid")
+    soc = np.random.default_rng(0).uniform(0, 100, args.samples)
+    soc_list = soc.tolist()
+    temperature = np.random.default_rng(1).uniform(-10, 40, args.samples)
+
+    chain = np.array([voltage_chain(value) for value in soc_list])
+    print(f"Max difference to the if/elif chain: {np.abs(curve.voltage(soc) - chain).max():.2e} V")
+
+    scalar_chain = best_time(lambda: voltage_chain(soc_list[0]), 100_000)
+    scalar_curve = best_time(lambda: curve.voltage(soc_list[0]), 100_000)
+    loop_chain = best_time(lambda: [voltage_chain(value) for value in soc_list], 1)
+    array_curve = best_time(lambda: curve.voltage(soc), 5)
+    array_curve_temp = best_time(lambda: curve.voltage(soc, temperature), 3)
+
+    print(f"Scalar if/elif chain:        {scalar_chain * 1e9:10.0f} ns/call")
+    print(f"Scalar OCVCurve lookup:      {scalar_curve * 1e9:10.0f} ns/call")
+    print(f"Chain over {args.samples:,} samples: {loop_chain * 1e3:9.1f} ms")
+    print(f"OCVCurve array (np.interp):  {array_curve * 1e3:9.1f} ms ({loop_chain / array_curve:.0f}x)")
+    print(f"OCVCurve array, per-sample temperature: {array_curve_temp * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# Run Store Benchmark
+#
+# Description:
+# Writes a long 1 s headless run chunk by chunk with RunWriter, then reports the on-disk
+# size against float64 .npy columns, CSV (estimated from a sample) and the compressed
+# archive, the time to reopen the run (memory-mapped) and the time to read a one-hour
+# plotting window and a decimated whole-run overview from it. Also checks that the
+# reloaded columns match the simulator output (float32 rounding for measurements).
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_run_store [--days 30] [--directory /tmp/run_store_bench]
+
+import argparse
+import csv
+import io
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from run_store import RunWriter, archive_run, load_run
+from solar_sim_core import SolarBatterySimulator
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def csv_bytes_per_row(chunk, rows=10_000):
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow(list(chunk))
+    writer.writerows(zip(*(chunk[name][:rows].tolist() for name in chunk)))
+    return len(text.getvalue().encode()) / rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run store write/reload benchmark")
+    parser.add_argument("--days", type=float, default=30.0, help="simulated days at 1 s")
+    parser.add_argument("--directory", default=None, help="where to write the run (default: a temporary directory)")
+    args = parser.parse_args()
+
+    root = args.directory or tempfile.mkdtemp(prefix="run_store_bench_")
+    path = os.path.join(root, "run")
+    duration = args.days * 86_400
+    sim = SolarBatterySimulator(seed=0, ac_load=800.0)
+    checksums = {}
+
+    start = time.perf_counter()
+    with RunWriter(path, parameters={"seed": 0, "ac_load": 800.0, "dt": 1.0}) as writer:
+        for chunk in sim.iter_chunks(duration, 1.0):
+            writer.append(chunk)
+            for name, values in chunk.items():
+                checksums[name] = checksums.get(name, 0.0) + float(np.sum(values, dtype=float))
+            sample = chunk
+    write_time = time.perf_counter() - start
+    rows = len(writer)
+
+    start = time.perf_counter()
+    run = load_run(path)
+    open_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    window = run.window(duration / 2, duration / 2 + 3600)
+    overview = run["battery_soc"][::max(1, rows // 2000)].copy()
+    read_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    archive = archive_run(path)
+    archive_time = time.perf_counter() - start
+
+    raw_size = directory_size(path)
+    float64_size = rows * 8 * len(run.columns)
+    print(f"{rows:,} rows ({args.days:g} days at 1 s), columns: {', '.join(run.columns)}")
+    print(f"  write (simulate + append)   {write_time:8.2f} s")
+    print(f"  reopen (memory-mapped)      {open_time * 1000:8.2f} ms")
+    print(f"  1 h window + overview read  {read_time * 1000:8.2f} ms ({len(window['time'])} + {len(overview)} samples)")
+    print(f"  archive (.npz, compressed)  {archive_time:8.2f} s")
+    print(f"  size: run {raw_size / 1e6:.1f} MB, float64 .npy {float64_size / 1e6:.1f} MB, "
+          f"CSV ~{csv_bytes_per_row(sample) * rows / 1e6:.0f} MB, archive {os.path.getsize(archive) / 1e6:.1f} MB")
+
+    mismatched = [name for name, expected in checksums.items()
+                  if not np.isclose(float(np.sum(run[name], dtype=float)), expected, rtol=1e-6)]
+    print(f"  reloaded columns differ from the simulator output: {', '.join(mismatched)}" if mismatched
+          else "  reloaded columns match the simulator output")
+
+    del run, window
+    if args.directory is None:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
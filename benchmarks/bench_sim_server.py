@@ -0,0 +1,122 @@
+# Simulation Server Benchmark
+#
+# Description:
+# Starts a SimulationServer in-process on a free loopback port and, for a few seconds of
+# wall-clock time, connects:
+# - many subscribers streaming every site,
+# - one slow subscriber that stops reading (its socket fills up, so its queue keeps only
+#   the newest states and reports the dropped ones),
+# - one control client that pushes a load change and polls it back with "get".
+# Reports simulated seconds per wall-clock second, states and messages received per
+# subscriber (several states per message when a client lags), the slow client's drops and
+# the control round trip time.
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_sim_server [--sites 500] [--subscribers 100] [--seconds 10] [--queue-size 16]
+
+import argparse
+import asyncio
+import json
+import socket
+import time
+
+from sim_server import SimulationServer
+
+
+async def subscriber(port, counts, stop):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b'{"op": "subscribe"}\n')
+    await writer.drain()
+    await reader.readline()  # "subscribed"
+    counts["messages"] = counts["states"] = counts["dropped"] = 0
+    while not stop.is_set():
+        try:
+            line = await asyncio.wait_for(reader.readline(), 0.5)
+        except asyncio.TimeoutError:
+            continue
+        # Counted without decoding, so the clients do not starve the server of CPU
+        counts["messages"] += 1
+        counts["states"] += line.count(b'{"time":')
+        counts["dropped"] += int(line[line.index(b":", 16) + 1:line.index(b",", 16)])
+    writer.close()
+
+
+async def slow_subscriber(port, address, stop):
+    # Subscribes with a tiny receive buffer, then never reads
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.setblocking(False)
+    await asyncio.get_running_loop().sock_connect(sock, ("127.0.0.1", port))
+    reader, writer = await asyncio.open_connection(sock=sock, limit=1024)
+    writer.write(b'{"op": "subscribe"}\n')
+    await writer.drain()
+    address.append(sock.getsockname())
+    await stop.wait()
+    writer.close()
+
+
+async def control(port):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port, limit=2 ** 24)
+
+    async def request(message):
+        writer.write(json.dumps(message).encode() + b"\n")
+        await writer.drain()
+        return json.loads(await reader.readline())
+
+    start = time.perf_counter()
+    ack = await request({"op": "set", "id": 1, "sites": [0, 1], "params": {"ac_load": 123.0}})
+    round_trip = time.perf_counter() - start
+    await asyncio.sleep(0.3)  # At least one publish
+    state = (await request({"op": "get", "id": 2, "sites": [0, 1, 2], "fields": ["ac_load"]}))["states"][0]
+    writer.close()
+    return ack, state, round_trip
+
+
+async def run(args):
+    server = SimulationServer(args.sites, speed=args.speed, rate=args.rate, seed=0, weather=True,
+                              queue_size=args.queue_size)
+    await server.start(port=0)
+    stop = asyncio.Event()
+    counts = [{} for _ in range(args.subscribers)]
+    tasks = [asyncio.create_task(subscriber(server.port, count, stop)) for count in counts]
+    address = []
+    tasks.append(asyncio.create_task(slow_subscriber(server.port, address, stop)))
+
+    start = time.perf_counter()
+    ack, state, round_trip = await control(server.port)
+    await asyncio.sleep(max(0.0, args.seconds - (time.perf_counter() - start)))
+    elapsed = time.perf_counter() - start
+    simulated = server.fleet.sim_time
+    slow = [sub for sub in server.subscribers if sub.writer.get_extra_info("peername") == address[0]][0]
+    queued, slow_dropped = slow.queue.qsize(), slow.dropped
+    stop.set()
+    await asyncio.gather(*tasks)
+    published = server.published
+    await server.stop()
+
+    states = [count["states"] for count in counts]
+    messages = [count["messages"] for count in counts]
+    dropped = [count["dropped"] for count in counts]
+    print(f"{args.sites} sites, {args.subscribers} subscribers + 1 slow, {elapsed:.1f} s:")
+    print(f"  simulated {simulated / elapsed:.0f} s per second ({args.speed:g}x requested), "
+          f"{published / elapsed:.1f} states published per second ({args.rate:g} requested)")
+    print(f"  per subscriber: {min(states)}-{max(states)} states in {min(messages)}-{max(messages)} messages")
+    print(f"  per subscriber: {min(dropped)}-{max(dropped)} states dropped")
+    print(f"  slow subscriber: {queued}/{args.queue_size} states queued, {slow_dropped} dropped since its last message")
+    print(f"  set ack {ack['type']} in {round_trip * 1000:.2f} ms, get -> ac_load {state['ac_load']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulation server streaming benchmark")
+    parser.add_argument("--sites", type=int, default=500)
+    parser.add_argument("--subscribers", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--speed", type=float, default=600.0)
+    parser.add_argument("--rate", type=float, default=25.0)
+    parser.add_argument("--queue-size", type=int, default=16, help="states queued per subscriber")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# Site Log Replay Benchmark
+#
+# Description:
+# Writes a synthetic irregularly-sampled site log as CSV and .npy, then replays it through
+# site_logs.read_log/resample and SolarBatterySimulator.iter_replay, reporting rows/s and
+# the peak Python heap (tracemalloc) to show that memory stays flat as logs grow.
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_site_logs [--rows 1000000]
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from site_logs import read_log, resample
+from solar_sim_core import SolarBatterySimulator
+
+
+def write_logs(directory, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    times = np.cumsum(rng.uniform(0.5, 1.5, rows))
+    solar = np.maximum(0, 800 * np.sin(times / 86_400 * 2 * np.pi)) * rng.uniform(0.7, 1.0, rows)
+    load = 300 + 200 * rng.random(rows)
+
+    csv_path = os.path.join(directory, "site.csv")
+    with open(csv_path, "w") as log:
+        log.write("time,solar_power,load\n")
+        for start in range(0, rows, 100_000):
+            block = np.column_stack((times, solar, load))[start:start + 100_000]
+            np.savetxt(log, block, delimiter=",", fmt="%.6f")
+
+    npy_path = os.path.join(directory, "site.npy")
+    np.save(npy_path, np.column_stack((times, solar, load)))
+    return csv_path, npy_path
+
+
+def replay(path, dt):
+    steps = 0
+    for chunk in SolarBatterySimulator().iter_replay(resample(read_log(path), dt), dt):
+        steps += len(chunk["time"])
+    return steps
+
+
+def measure(path, dt):
+    # Timed pass, then a second pass under tracemalloc (which slows allocation-heavy code)
+    start = time.perf_counter()
+    steps = replay(path, dt)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    replay(path, dt)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return steps, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Site log replay benchmark")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--dt", type=float, default=1.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_logs(directory, args.rows)
+        SolarBatterySimulator().run(60)  # Warm-up (one-off compilation)
+        for path in paths:
+            steps, elapsed, peak = measure(path, args.dt)
+            size = os.path.getsize(path) / 1e6
+            print(f"{os.path.basename(path):<9} {size:8.1f} MB  {args.rows / elapsed / 1e6:6.2f} M rows/s  "
+                  f"{steps:,} steps  peak heap {peak / 1e6:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
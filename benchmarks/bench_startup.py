@@ -0,0 +1,67 @@
+# Startup Benchmark
+#
+# Description:
+# Measures what a short batch job pays before it simulates anything: the wall time of fresh
+# interpreter processes that import NumPy, import matplotlib (the cost the headless entry
+# points avoid), and run both scripts with --headless over a short duration. Also checks
+# that the headless runs leave matplotlib and Tk unimported.
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_startup [--repeat 5]
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+CASES = {
+    "python (no imports)": ["-c", "pass"],
+    "import numpy": ["-c", "import numpy"],
+    "import matplotlib.pyplot": ["-c", "import matplotlib.pyplot"],
+    "relay script --headless": ["Solar_MPPT_Load_Balancing_Sim.py", "--headless"],
+    "dashboard --headless (1 h)": ["Solar_System_GUI_Plot_Simulation.py", "--headless", "--duration", "3600"],
+    "dashboard --headless (1 week)": ["Solar_System_GUI_Plot_Simulation.py", "--headless", "--duration", "604800"],
+}
+
+# Runs a script headless in-process and prints the plotting modules it imported
+IMPORT_CHECK = """
+import runpy, sys
+script = sys.argv[1]
+sys.argv = sys.argv[1:]
+runpy.run_path(script, run_name="__main__")
+print("imported:" + ",".join(name for name in ("matplotlib", "tkinter") if name in sys.modules))
+"""
+
+
+def wall_time(arguments, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *arguments], check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times)
+
+
+def plotting_imports(arguments):
+    result = subprocess.run([sys.executable, "-c", IMPORT_CHECK, *arguments], check=True,
+                            capture_output=True, text=True)
+    return result.stdout.rsplit("imported:", 1)[1].strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process startup time of the headless entry points")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, arguments in CASES.items():
+        best, median = wall_time(arguments, args.repeat)
+        print(f"  {name:<30}{best * 1000:8.0f} ms best {median * 1000:8.0f} ms median")
+    for name, arguments in CASES.items():
+        if "--headless" in arguments:
+            imported = plotting_imports(arguments)
+            print(f"  {name}: {'imports ' + imported if imported else 'no matplotlib/Tk import'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# Weather Generator Benchmark
+#
+# Description:
+# Times solar input generation three ways and compares how the series behave:
+# - per tick, as the dashboard's calculate_solar_power() draws it (one RNG call per step),
+# - the white-noise series of solar_power_series() (one vectorized draw per chunk),
+# - WeatherGenerator (clear-sky envelope, AR(1) cloud cover and ramp events), for one site
+#   and for a fleet of sites at once, extrapolated to a year of 1 s data.
+# The lag-60 s autocorrelation of the available power shows the difference between white
+# noise and passing clouds.
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_weather [--sites 1000] [--hours 6]
+
+import argparse
+import time
+
+import numpy as np
+
+from solar_sim_core import SolarBatterySimulator
+from weather import WeatherGenerator
+
+YEAR = 365 * 86_400
+
+
+def autocorrelation(values, lag):
+    values = values - values.mean()
+    return float(np.dot(values[:-lag], values[lag:]) / np.dot(values, values))
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def per_tick(steps):
+    sim = SolarBatterySimulator(seed=0)
+    return np.array([sim.calculate_solar_power() for _ in range(steps)])
+
+
+def weather_series(sites, seconds):
+    weather = WeatherGenerator(seed=0, sites=sites, latitude=np.linspace(30, 60, sites), start_hour=9)
+    count = 0
+    first = None
+    for _, irradiance in weather.chunks(seconds):
+        count += irradiance.size
+        if first is None:
+            first = irradiance[0].copy()
+    return count, first
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solar input generation: per tick, white noise and weather")
+    parser.add_argument("--sites", type=int, default=1000)
+    parser.add_argument("--hours", type=float, default=6.0, help="simulated hours per measurement")
+    args = parser.parse_args()
+    seconds = args.hours * 3600
+    steps = int(seconds)
+
+    ticks, tick_time = timed(per_tick, steps)
+    noise, noise_time = timed(SolarBatterySimulator(seed=0).solar_power_series, steps)
+    (count, single), single_time = timed(weather_series, 1, seconds)
+    (fleet_count, _), fleet_time = timed(weather_series, args.sites, seconds)
+
+    print(f"{args.hours:g} h of 1 s solar input ({steps:,} steps per site):")
+    rows = [
+        ("per tick (calculate_solar_power)", tick_time, steps, ticks),
+        ("white noise (solar_power_series)", noise_time, steps, noise),
+        ("weather, 1 site", single_time, count, single),
+        (f"weather, {args.sites} sites", fleet_time, fleet_count, None),
+    ]
+    for name, elapsed, samples, series in rows:
+        year = elapsed / samples * YEAR * (args.sites if series is None else 1)
+        correlation = "" if series is None else f"   lag-60 s autocorrelation {autocorrelation(series, 60):5.2f}"
+        print(f"  {name:<34}{elapsed / samples * 1e9:8.1f} ns/sample   one year: {year:8.1f} s{correlation}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+# Benchmark Suite
+#
+# Description:
+# Times every simulation hot path and appends the results to a JSON-lines history file so
+# that runs can be compared across commits (in the spirit of asv, without the dependency):
+# - relay engine at several sample counts (and the original per-sample timer loop),
+# - the headless core over a year at 1 s, and the per-tick step() used by the dashboard,
+# - the event-driven engine over a month of piecewise-constant outage inputs,
+# - writing a million-row run with RunWriter and reopening it memory-mapped,
+# - history pyramid appends, and zoom queries over a week of history,
+# - one dashboard plot update with a full 600-point and 86,400-point history (classic full
+#   redraw and blitted path, off-screen with Agg),
+# - the relay switching statistics of Solar_MPPT_Load_Balancing_Sim.py, and the batched
+#   comparison of 12 controllers x 2 relay strategies (controllers.py), also rerun with a
+#   warm ArrayCache (array_cache.py) after a change of the simple relay's threshold,
+# - scoring a batch of 16 relay candidates for the autotuner (autotune.py),
+# - starting Solar_MPPT_Load_Balancing_Sim.py --headless in a fresh process,
+# - generating one hour of 1 s weather for 1000 sites (weather.py).
+# Each benchmark builds its inputs in a setup function (not timed), runs once to warm up
+# (compilation, caches), then reports the best/median of several repeats. Fast calls are
+# looped so each repeat lasts at least MIN_SAMPLE_TIME, as timeit's autorange does.
+#
+# Usage (from the repository root):
+#   python -m benchmarks.suite                    # run everything, append to the history
+#   python -m benchmarks.suite --filter relay     # only benchmarks whose name contains "relay"
+#   python -m benchmarks.suite --compare          # also compare with the previous run
+#   python -m benchmarks.suite --list
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+DEFAULT_HISTORY = os.path.join(os.path.dirname(__file__), "history.jsonl")
+MIN_SAMPLE_TIME = 0.05  # Seconds per repeat for fast benchmarks
+REGRESSION_RATIO = 1.2  # Slower than this x the previous best is flagged
+
+BENCHMARKS = {}  # name -> (setup, repeat)
+
+
+def benchmark(name, repeat=5):
+    # Register a setup function returning the callable to time
+    def register(setup):
+        BENCHMARKS[name] = (setup, repeat)
+        return setup
+    return register
+
+
+def cloudy_trace(samples, seed=42):
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0, samples / 10, samples)
+    return np.clip((50 + 30 * np.sin(t) + 20 * rng.standard_normal(samples)) * 0.95, 0, 100)
+
+
+def _relay_setup(samples):
+    from relay_engine import advanced_relay
+    trace = cloudy_trace(samples)
+    return lambda: advanced_relay(trace, 45, 35, 5, 10)
+
+
+for _samples in (1_000, 100_000, 10_000_000):
+    benchmark(f"relay_engine[{_samples}]", repeat=5 if _samples < 10_000_000 else 3)(
+        lambda samples=_samples: _relay_setup(samples))
+
+
+@benchmark("relay_timer_loop[100000]")
+def _relay_loop_setup():
+    from benchmarks.bench_relay_engine import original_relay_loop as _relay_loop
+    trace = cloudy_trace(100_000)
+    return lambda: _relay_loop(trace, 45, 35, 5, 10)
+
+
+@benchmark("core_run_year", repeat=3)
+def _core_year_setup():
+    from solar_sim_core import SolarBatterySimulator
+    return lambda: SolarBatterySimulator(seed=0, ac_load=800.0, sunlight_intensity=45.0).run(
+        365 * 86_400, dt=1.0, record_every=60)
+
+
+@benchmark("core_step[10000]")
+def _core_step_setup():
+    from solar_sim_core import SolarBatterySimulator
+    sim = SolarBatterySimulator(seed=0)
+
+    def steps():
+        for _ in range(10_000):
+            sim.step(1.0)
+    return steps
+
+
+@benchmark("event_engine_month")
+def _event_engine_setup():
+    from benchmarks.bench_event_engine import PARAMETERS, outage_inputs
+    from event_sim import EventDrivenSimulator
+    times, solar, load = outage_inputs(30)
+    return lambda: EventDrivenSimulator(**PARAMETERS).run(times, solar, load, 30 * 86_400.0)
+
+
+@benchmark("run_store_write_reload[1000000]", repeat=3)
+def _run_store_setup():
+    import shutil
+    import tempfile
+    from run_store import RunWriter, load_run
+    rng = np.random.default_rng(0)
+    chunk = {"time": np.arange(100_000, dtype=float), "battery_soc": rng.uniform(0, 100, 100_000),
+             "battery_voltage": rng.uniform(11, 13, 100_000), "solar_power": rng.uniform(0, 1000, 100_000),
+             "load": np.full(100_000, 500.0), "source": rng.integers(0, 2, 100_000).astype(np.int8)}
+
+    def write_reload():
+        root = tempfile.mkdtemp(prefix="run_store_")
+        try:
+            with RunWriter(root) as writer:
+                for _ in range(10):
+                    writer.append(chunk)
+            run = load_run(root)
+            return float(run["battery_soc"][::1000].sum())
+        finally:
+            shutil.rmtree(root)
+    return write_reload
+
+
+def _filled_pyramid(seconds):
+    from history_pyramid import HistoryPyramid
+    pyramid = HistoryPyramid(("time", "battery_soc", "solar_power", "load", "source"))
+    trace = cloudy_trace(seconds)
+    for second, value in enumerate(trace.tolist(), 1):
+        pyramid.append(float(second), 50.0, value * 10, 500.0, 1.0)
+    return pyramid
+
+
+@benchmark("history_pyramid_append[10000]")
+def _pyramid_append_setup():
+    pyramid = _filled_pyramid(3600)
+
+    def append():
+        start = pyramid.samples
+        for second in range(start + 1, start + 10_001):
+            pyramid.append(float(second), 50.0, 600.0, 500.0, 1.0)
+    return append
+
+
+def _pyramid_query_setup(span):
+    pyramid = _filled_pyramid(604_800)
+    return lambda: pyramid.query(span, max_points=1600)
+
+
+for _span in (3_600, 86_400, 604_800):
+    benchmark(f"history_pyramid_query[{_span}]")(lambda span=_span: _pyramid_query_setup(span))
+
+
+def _plot_setup(history, mode):
+    from benchmarks.bench_live_plot import blit_frame, build_figure, classic_frame, filled_buffer
+    from live_plot import BlitRenderer
+    buffer = filled_buffer(history)
+    canvas, axes, lines = build_figure()
+    renderer = BlitRenderer(canvas, lines) if mode == "blit" else None
+
+    def frame():
+        buffer.append(buffer.latest("time") + 1.0, 50.0, 600.0, 500.0, 1.0)
+        if renderer is None:
+            classic_frame(buffer, axes, lines, canvas)
+        else:
+            blit_frame(buffer, axes, lines, renderer)
+    return frame
+
+
+for _history in (600, 86_400):
+    for _mode in ("classic", "blit"):
+        benchmark(f"plot_update_{_mode}[{_history}]")(
+            lambda history=_history, mode=_mode: _plot_setup(history, mode))
+
+
+@benchmark("switching_statistics[1000000]")
+def _statistics_setup():
+    from online_stats import ControllerStatistics
+    from relay_engine import advanced_relay, simple_relay
+    traces = np.vstack([cloudy_trace(1_000_000, seed) for seed in (1, 2)])
+    simple = simple_relay(traces, 40)
+    advanced = advanced_relay(traces, 45, 35, 5, 10)
+
+    def switching_statistics():
+        # Same statistics as the end of Solar_MPPT_Load_Balancing_Sim.py, for both controllers
+        results = []
+        for simple_row, advanced_row, output in zip(simple, advanced, traces):
+            stats = ControllerStatistics(0.1)
+            stats.update_many(output, simple=simple_row, advanced=advanced_row)
+            results.append((stats.switches("simple"), stats.switches("advanced"),
+                            stats.wear_reduction(), stats.power.mean))
+        return results
+    return switching_statistics
+
+
+@benchmark("controller_comparison[12x1000000]")
+def _controller_comparison_setup():
+    from benchmarks.bench_controllers import batched, controller_names
+    from controllers import ControllerComparison
+    trace = cloudy_trace(1_000_000)
+    comparison = ControllerComparison(controller_names(12), ["simple", "advanced"], 0.1)
+    return lambda: batched(comparison, trace)
+
+
+@benchmark("controller_comparison_cached[12x1000000]")
+def _controller_comparison_cached_setup():
+    import itertools
+    from array_cache import ArrayCache, array_key
+    from benchmarks.bench_controllers import controller_names
+    from controllers import ControllerComparison
+    trace = cloudy_trace(1_000_000)
+    trace_key = array_key(trace)
+    cache = ArrayCache()
+    calls = itertools.count()  # A new simple relay threshold per call: only that relay is computed
+
+    def run():
+        relays = {"simple": {"threshold": 40 + next(calls) % 1000 / 100}, "advanced": {}}
+        return ControllerComparison(controller_names(12), relays, 0.1, cache).run(trace, trace_key).switches()
+    return run
+
+
+@benchmark("autotune_relay_batch[16x1000000]", repeat=3)
+def _autotune_relay_batch_setup():
+    import tempfile
+    from autotune import RELAY_SPACE, RelayObjective, _grid, cached_array, input_cache
+    from benchmarks.bench_autotune import DT, controller_output
+    power = controller_output(1_000_000)
+    cache = input_cache(tempfile.mkdtemp(prefix="autotune_suite_"))
+    objective = RelayObjective(cached_array(cache, "output", lambda: power), DT)
+    candidates = [candidate for candidate in _grid(RELAY_SPACE, 3) if objective.valid(candidate)][:16]
+    return lambda: objective.evaluate(candidates)
+
+
+@benchmark("relay_script_headless_startup", repeat=5)
+def _relay_script_headless_startup_setup():
+    from benchmarks.bench_startup import CASES, wall_time
+    return lambda: wall_time(CASES["relay script --headless"], 1)
+
+
+@benchmark("weather_generate[1000x3600]", repeat=5)
+def _weather_generate_setup():
+    from weather import WeatherGenerator
+    weather = WeatherGenerator(seed=0, sites=1000, latitude=np.linspace(30, 60, 1000), start_hour=9)
+    return lambda: weather.series(3600)
+
+
+def measure(func, repeat):
+    func()  # Warm-up
+    start = time.perf_counter()
+    func()
+    single = time.perf_counter() - start
+    number = max(1, int(MIN_SAMPLE_TIME / single)) if single > 0 else 1000
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return {
+        "best": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, dirty
+
+
+def machine_info():
+    try:
+        import numba
+        numba_version = numba.__version__
+    except ImportError:
+        numba_version = None
+    return {
+        "node": platform.node(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "numba": numba_version,
+    }
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as history:
+        return [json.loads(line) for line in history if line.strip()]
+
+
+def format_time(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.2f} ns"
+
+
+def compare(record, history):
+    # Compare with the most recent earlier run on the same machine
+    previous = [entry for entry in history if entry["machine"]["node"] == record["machine"]["node"]]
+    if not previous:
+        print("\nNo earlier run on this machine to compare with")
+        return
+    baseline = previous[-1]
+    print(f"\nCompared with {str(baseline['commit'])[:10]} ({baseline['timestamp']}):")
+    for name, result in record["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        ratio = result["best"] / before["best"]
+        flag = "  REGRESSION" if ratio > REGRESSION_RATIO else ("  improved" if ratio < 1 / REGRESSION_RATIO else "")
+        print(f"  {name:<34}{format_time(before['best'])} -> {format_time(result['best'])}  ({ratio:5.2f}x){flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulation benchmark suite")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=None, help="override the repeat count of every benchmark")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="JSON-lines results history")
+    parser.add_argument("--no-save", action="store_true", help="do not append this run to the history")
+    parser.add_argument("--compare", action="store_true", help="compare with the previous run in the history")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    args = parser.parse_args()
+
+    selected = [name for name in BENCHMARKS if args.filter in name]
+    if args.list:
+        print("\n".join(selected))
+        return
+    if not selected:
+        sys.exit(f"No benchmark matches {args.filter!r}")
+
+    commit, dirty = git_revision()
+    record = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "dirty": dirty,
+        "machine": machine_info(),
+        "results": {},
+    }
+
+    for name in selected:
+        setup, repeat = BENCHMARKS[name]
+        result = measure(setup(), args.repeat or repeat)
+        record["results"][name] = result
+        print(f"{name:<36}{format_time(result['best'])} best  {format_time(result['median'])} median  "
+              f"(+/- {result['stdev'] / result['mean']:.1%}, {result['repeat']} x {result['number']})")
+
+    history = load_history(args.history)
+    if args.compare:
+        compare(record, history)
+    if not args.no_save:
+        with open(args.history, "a") as output:
+            output.write(json.dumps(record) + "\n")
+        print(f"\nResults appended to {args.history}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2 @@
+# pytest configuration - the modules live at the repository root, and pytest puts the
+# directory of this conftest.py on sys.path, so tests/ can import them directly.
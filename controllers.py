@@ -0,0 +1,195 @@
+# Controllers - registry of charge controller models and relay strategies
+#
+# Description:
+# Plug-in registries for the controller comparison of Solar_MPPT_Load_Balancing_Sim.py:
+# - a charge controller turns a solar power trace into an output power trace,
+#   function(solar_power, out, **params), writing into the row `out` it is given,
+# - a relay strategy turns a 2-D array of output power (one row per controller) into
+#   relay states, function(power, out, dt, **params), writing into the int8 array `out`.
+# Registering a function again under another name with different parameters adds a
+# variant (e.g. MPPT controllers of several efficiencies) without new code.
+#
+# ControllerComparison runs N controllers x M relay strategies over one trace in a single
+# batched pass: the outputs fill rows of one shared (N, samples) array, each relay
+# strategy processes all rows in one call into one (M, N, samples) state array, and the
+# switching statistics are reduced over those arrays. The buffers are kept between runs
+# and only grow when a longer trace comes in, so comparing more controllers adds rows,
+# not code or per-controller copies.
+#
+# With an ArrayCache (array_cache.py), the outputs are cached under a hash of the trace and
+# the controllers (functions and parameters), and each relay strategy's states under a
+# hash of the outputs' key, the strategy and dt. Rerunning a comparison after changing
+# relay settings then only recomputes the relay strategies whose settings changed.
+
+import numpy as np
+
+from array_cache import array_key
+from online_stats import ControllerStatistics
+from relay_engine import advanced_relay, delay_steps
+
+CONTROLLERS = {}  # name -> (function, default parameters)
+RELAY_STRATEGIES = {}  # name -> (function, default parameters)
+
+SWITCH_BLOCK = 65_536  # Samples compared at a time when counting switches
+
+
+def _register(registry, name, function, params):
+    def register(function):
+        registry[name] = (function, params)
+        return function
+    return register if function is None else register(function)
+
+
+def register_controller(name, function=None, **params):
+    """Register function(solar_power, out, **params) as controller `name` (usable as a decorator)."""
+    return _register(CONTROLLERS, name, function, params)
+
+
+def register_relay(name, function=None, **params):
+    """Register function(power, out, dt, **params) as relay strategy `name` (usable as a decorator)."""
+    return _register(RELAY_STRATEGIES, name, function, params)
+
+
+@register_controller("mppt", efficiency=0.95)
+def constant_efficiency(solar_power, out, efficiency, limit=100):
+    # MPPT-style controller: a fixed conversion efficiency, output clipped to [0, limit]
+    np.multiply(solar_power, efficiency, out=out)
+    np.clip(out, 0, limit, out=out)
+
+
+@register_controller("pwm", base_efficiency=0.75)
+def pwm_efficiency(solar_power, out, base_efficiency, limit=100):
+    # PWM controller: efficiency drops in low light (ratio of panel to battery voltage)
+    np.divide(solar_power, 100, out=out)
+    out *= 0.1
+    out += 0.9
+    out *= base_efficiency
+    out *= solar_power
+    np.clip(out, 0, limit, out=out)
+
+
+register_controller("ideal", constant_efficiency, efficiency=1.0)
+
+
+@register_relay("simple", threshold=40)
+def threshold_relay(power, out, dt, threshold):
+    # Direct threshold comparison without delays
+    np.greater(power, threshold, out=out, casting="unsafe")
+
+
+@register_relay("advanced", on_threshold=45, off_threshold=35, on_delay=0.5, off_delay=1.0)
+def hysteresis_relay(power, out, dt, on_threshold, off_threshold, on_delay, off_delay):
+    # Hysteresis with ON/OFF delays (seconds, converted to whole samples)
+    advanced_relay(power, on_threshold, off_threshold, delay_steps(on_delay, dt), delay_steps(off_delay, dt),
+                   out=out)
+
+
+def _selection(names, registry, kind):
+    # A list of names, or a dict of name -> parameter overrides
+    if names is None:
+        names = list(registry)
+    overrides = names if isinstance(names, dict) else {name: {} for name in names}
+    selection = []
+    for name, params in overrides.items():
+        if name not in registry:
+            raise KeyError(f"Unknown {kind}: {name} (registered: {', '.join(registry)})")
+        function, defaults = registry[name]
+        selection.append((name, function, {**defaults, **params}))
+    return selection
+
+
+class ComparisonResult:
+    def __init__(self, controllers, relays, outputs, states, dt):
+        # Views into the comparison buffers: valid until the next run()
+        self.controllers = controllers
+        self.relays = relays
+        self.outputs = outputs  # (controllers, samples)
+        self.relay_states = states  # (relays, controllers, samples)
+        self.dt = dt
+
+    def output(self, controller):
+        return self.outputs[self.controllers.index(controller)]
+
+    def states(self, relay, controller):
+        return self.relay_states[self.relays.index(relay), self.controllers.index(controller)]
+
+    def switches(self):
+        # (relays, controllers) switch counts, compared block by block to bound the temporaries
+        states = self.relay_states
+        counts = np.zeros(states.shape[:2], dtype=int)
+        for start in range(1, states.shape[2], SWITCH_BLOCK):
+            end = min(start + SWITCH_BLOCK, states.shape[2])
+            counts += np.count_nonzero(states[:, :, start:end] != states[:, :, start - 1:end - 1], axis=2)
+        return counts
+
+    def statistics(self):
+        # One ControllerStatistics per controller, with a StateCounter per relay strategy
+        statistics = {}
+        for index, controller in enumerate(self.controllers):
+            stats = ControllerStatistics(self.dt, self.relays)
+            stats.update_many(self.outputs[index],
+                              **{relay: self.relay_states[m, index] for m, relay in enumerate(self.relays)})
+            statistics[controller] = stats
+        return statistics
+
+
+class ControllerComparison:
+    def __init__(self, controllers=None, relays=None, dt=1.0, cache=None):
+        """Compare `controllers` x `relays` (names, or dicts of name -> parameter overrides).
+
+        Both default to everything registered. `cache` is an optional ArrayCache for the
+        outputs and relay states.
+        """
+        self.controllers = _selection(controllers, CONTROLLERS, "controller")
+        self.relays = _selection(relays, RELAY_STRATEGIES, "relay strategy")
+        self.dt = dt
+        self.cache = cache
+        self._outputs = np.empty(0)
+        self._states = np.empty(0, dtype=np.int8)
+
+    def _buffers(self, samples):
+        # Reuse flat buffers (growing them only for a longer trace) and hand out contiguous
+        # (controllers, samples) and (relays, controllers, samples) views of their start
+        rows = len(self.controllers)
+        if rows * samples > self._outputs.size:
+            self._outputs = np.empty(rows * samples)
+            self._states = np.empty(len(self.relays) * rows * samples, dtype=np.int8)
+        return (self._outputs[:rows * samples].reshape(rows, samples),
+                self._states[:len(self.relays) * rows * samples].reshape(len(self.relays), rows, samples))
+
+    def run(self, solar_power, trace_key=None):
+        """Run the comparison on `solar_power`.
+
+        With a cache, `trace_key` can be array_key(solar_power) computed once by the caller, so
+        a sweep does not hash the same trace for every run.
+        """
+        solar_power = np.asarray(solar_power, dtype=float)
+        outputs, states = self._buffers(len(solar_power))
+        cache = self.cache
+        key = cached = None
+        if cache is not None:
+            # Keyed by what the arrays are computed from (names only label the rows)
+            if trace_key is None:
+                trace_key = array_key(solar_power)
+            key = array_key(trace_key, [(function, params) for _, function, params in self.controllers])
+            cached = cache.get(key)
+        if cached is None:
+            for row, (name, function, params) in zip(outputs, self.controllers):
+                function(solar_power, row, **params)
+            if cache is not None:
+                cache.put(key, outputs.copy())
+        else:
+            outputs = cached
+        for out, (name, function, params) in zip(states, self.relays):
+            relay_key = cached = None
+            if cache is not None:
+                relay_key = array_key(key, function, params, self.dt)
+                cached = cache.get(relay_key)
+            if cached is None:
+                function(outputs, out, self.dt, **params)
+                if cache is not None:
+                    cache.put(relay_key, out.copy())
+            else:
+                out[...] = cached
+        return ComparisonResult([name for name, _, _ in self.controllers],
+                                [name for name, _, _ in self.relays], outputs, states, self.dt)
@@ -0,0 +1,215 @@
+# Event-Driven Simulation - skip steady-state intervals of the battery/switching model
+#
+# Description:
+# Advances the SolarBatterySimulator battery/switching model from event to event instead
+# of tick by tick. Inputs are piecewise constant (solar power and AC load held between
+# given times, e.g. an overnight outage at constant load), and between two events the
+# battery follows
+#     dSOC/dt = 100 * P / (3600 * capacity * V(SOC))
+# (P = net battery power, scaled by the charging efficiency when charging; V = OCV curve).
+# Because the OCV curve is piecewise linear, E(SOC) = integral of V dSOC is piecewise
+# quadratic, so the time to reach a given SOC and the SOC after a given time are both
+# closed-form. Work is only done at events:
+# - input changes (start of a new solar/load segment),
+# - SOC reaching switch_threshold_low on the inverter (switch to mains),
+# - SOC reaching switch_threshold_high on mains, and PWM timer expiry (switch back),
+# - the battery becoming full or empty.
+# The fixed-step model is the explicit Euler discretisation of the same equation, so the
+# two agree to within a step's worth of SOC change; switching instants agree to within
+# about one fixed step.
+
+import math
+
+import numpy as np
+
+from solar_sim_core import AC_MAINS, CHARGE_EFFICIENCY, INVERTER, SolarBatterySimulator
+
+EVENT_FIELDS = ("time", "battery_soc", "battery_voltage", "source", "kind")
+
+
+class _EnergyTable:
+    # E(SOC) = integral of the OCV curve from SOC 0, and its inverse
+    def __init__(self, soc_points, voltages, slopes):
+        points = list(soc_points)
+        volts = list(voltages)
+        slopes = list(slopes)
+        # Flat extensions so the table covers the whole 0-100% range
+        if points[0] > 0.0:
+            points.insert(0, 0.0)
+            volts.insert(0, volts[0])
+            slopes.insert(0, 0.0)
+        if points[-1] < 100.0:
+            points.append(100.0)
+            volts.append(volts[-1])
+            slopes.append(0.0)
+        self.points = np.array(points)
+        self.voltages = np.array(volts)
+        self.slopes = np.array(slopes + [0.0])
+        widths = np.diff(self.points)
+        pieces = self.voltages[:-1] * widths + 0.5 * self.slopes[:-1] * widths ** 2
+        self.energies = np.concatenate(([0.0], np.cumsum(pieces)))
+
+    def energy(self, soc):
+        soc = np.clip(soc, self.points[0], self.points[-1])
+        j = np.clip(np.searchsorted(self.points, soc, side="right") - 1, 0, len(self.points) - 2)
+        x = soc - self.points[j]
+        return self.energies[j] + self.voltages[j] * x + 0.5 * self.slopes[j] * x * x
+
+    def soc(self, energy):
+        # Inverse of energy() (stable root of the quadratic on each piece)
+        energy = np.clip(energy, self.energies[0], self.energies[-1])
+        j = np.clip(np.searchsorted(self.energies, energy, side="right") - 1, 0, len(self.points) - 2)
+        remaining = energy - self.energies[j]
+        v = self.voltages[j]
+        x = 2 * remaining / (v + np.sqrt(v * v + 2 * self.slopes[j] * remaining))
+        return np.minimum(self.points[j] + x, self.points[-1])
+
+    def voltage(self, soc):
+        return np.interp(soc, self.points, self.voltages)
+
+
+class EventDrivenSimulator:
+    def __init__(self, sim=None, **params):
+        # Works on the state and parameters of a SolarBatterySimulator (a new one by default)
+        self.sim = SolarBatterySimulator(**params) if sim is None else sim
+        self.computations = 0  # Event-loop iterations over all runs
+
+    def run(self, times, solar_power, load=None, duration=None, sample_every=None):
+        """Advance through piecewise-constant inputs and return the events (and samples).
+
+        solar_power[i] and load[i] (default: the simulator's ac_load) hold from times[i] to
+        times[i + 1] seconds after the current sim_time; the last segment lasts until
+        `duration` (default: the last time). With `sample_every`, the state is also
+        evaluated every `sample_every` seconds, like a fixed-step run recording each step.
+        """
+        sim = self.sim
+        times = np.asarray(times, dtype=float)
+        solar_power = np.broadcast_to(np.asarray(solar_power, dtype=float), times.shape)
+        load = np.broadcast_to(np.asarray(sim.ac_load if load is None else load, dtype=float), times.shape)
+        if times.size == 0 or times[0] != 0 or np.any(np.diff(times) <= 0):
+            raise ValueError("times must start at 0 and be strictly increasing")
+        duration = float(times[-1] if duration is None else duration)
+
+        table = _EnergyTable(*sim.ocv_curve.table(sim.battery_temperature))
+        capacity = float(sim.battery_capacity)
+        inverter_scale = sim.inverter_efficiency / 100
+        low = float(sim.switch_threshold_low)
+        high = float(sim.switch_threshold_high)
+        pwm_timer = float(sim.pwm_timer)
+
+        start = float(sim.sim_time)
+        end = start + duration
+        t = start
+        soc = float(sim.battery_soc)
+        inverter = bool(sim.using_inverter)
+        last_switch = sim.last_switch_time
+
+        events = {name: [] for name in EVENT_FIELDS}
+        samples = {name: [] for name in ("time", "battery_soc", "solar_power", "load", "source")}
+        next_sample = 1  # Index of the next sample time (start + k * sample_every)
+
+        def record(kind):
+            events["time"].append(t)
+            events["battery_soc"].append(soc)
+            events["battery_voltage"].append(float(table.voltage(soc)))
+            events["source"].append(INVERTER if inverter else AC_MAINS)
+            events["kind"].append(kind)
+
+        for i in range(len(times)):
+            segment_end = min(end, start + (times[i + 1] if i + 1 < len(times) else duration))
+            solar = float(solar_power[i])
+            ac_load = float(load[i])
+            if t >= segment_end:
+                continue
+            record("input")
+
+            while t < segment_end:
+                self.computations += 1
+
+                # Switching decisions at the current state (as the fixed-step model makes them)
+                if inverter and soc <= low:
+                    inverter = False
+                    last_switch = t
+                    record("to_mains")
+                    continue
+                # (timer expiry compared as t >= last_switch + pwm_timer, exactly the time the
+                # "pwm_timer" event below is scheduled at, so rounding cannot leave it pending)
+                if not inverter and soc >= high and last_switch is not None and t >= last_switch + pwm_timer:
+                    inverter = True
+                    record("to_inverter")
+                    continue
+
+                # Net battery power and the rate of change of E(SOC) (in %*V per second)
+                net_power = solar - ac_load / inverter_scale if inverter else solar
+                if net_power > 0:
+                    net_power *= CHARGE_EFFICIENCY
+                rate = net_power * 100 / (3600 * capacity)
+
+                # Next SOC event: threshold, full or empty battery
+                target = None
+                kind = None
+                if rate < 0 and soc > 0.0:
+                    target, kind = (low, "threshold_low") if inverter and low > 0.0 else (0.0, "empty")
+                elif rate > 0 and soc < 100.0:
+                    target, kind = (high, "threshold_high") if not inverter and soc < high else (100.0, "full")
+                energy = float(table.energy(soc))
+                next_time = segment_end
+                next_kind = None
+                if target is not None:
+                    next_time = min(next_time, t + (float(table.energy(target)) - energy) / rate)
+                    if next_time < segment_end:
+                        next_kind = kind
+                    else:
+                        target = None
+
+                # PWM timer expiry while on mains above the high threshold
+                if not inverter and soc >= high and last_switch is not None:
+                    expiry = last_switch + pwm_timer
+                    if expiry < next_time:
+                        next_time = expiry
+                        next_kind = "pwm_timer"
+                        target = None
+
+                # Samples on the fixed grid inside (t, next_time]
+                if sample_every:
+                    grid_end = int(math.floor((next_time - start) / sample_every + 1e-9))
+                    if grid_end >= next_sample:
+                        grid = start + sample_every * np.arange(next_sample, grid_end + 1)
+                        values = table.soc(energy + rate * (grid - t)) if rate else np.full(grid.shape, soc)
+                        if target is not None:
+                            values = np.minimum(values, target) if rate > 0 else np.maximum(values, target)
+                        samples["time"].append(grid)
+                        samples["battery_soc"].append(np.clip(values, 0.0, 100.0))
+                        samples["solar_power"].append(np.full(grid.shape, solar))
+                        samples["load"].append(np.full(grid.shape, ac_load))
+                        samples["source"].append(np.full(grid.shape, INVERTER if inverter else AC_MAINS, dtype=np.int8))
+                        next_sample = grid_end + 1
+
+                # Every iteration must move time forward or land on a SOC target
+                if next_time <= t and target is None:
+                    raise RuntimeError(f"Event loop made no progress at t={t} ({next_kind or 'no event'}, "
+                                       f"SOC {soc}, {'inverter' if inverter else 'mains'})")
+
+                # Advance to the event (landing exactly on the target SOC when it is reached)
+                if target is not None:
+                    soc = target
+                elif rate:
+                    soc = float(np.clip(table.soc(energy + rate * (next_time - t)), 0.0, 100.0))
+                t = next_time
+                if next_kind is not None and next_time < segment_end:
+                    record(next_kind)
+
+        record("end")
+        sim.sim_time = t
+        sim.battery_soc = soc
+        sim.battery_voltage = float(table.voltage(soc))
+        sim.using_inverter = inverter
+        sim.last_switch_time = last_switch
+        sim.solar_power = float(solar_power[-1])
+
+        result = {"events": {name: np.asarray(values) for name, values in events.items()}}
+        if sample_every:
+            result["samples"] = {name: np.concatenate(values) if values else np.empty(0)
+                                 for name, values in samples.items()}
+            result["samples"]["battery_voltage"] = table.voltage(result["samples"]["battery_soc"])
+        return result
@@ -0,0 +1,173 @@
+# Fleet Simulation - many backup sites stepped together
+#
+# Description:
+# Vectorized version of the solar_sim_core.py battery/switching model for a fleet of N
+# sites. The state of every site (SOC, voltage, power source, last switch time) and its
+# parameters live in contiguous NumPy arrays, and each time step updates all sites in
+# one pass: solar output, battery energy balance, OCV voltage curve and hysteresis
+# switching with the PWM timer. For the same solar input each site follows the same values
+# as a SolarBatterySimulator with the same parameters (bit-for-bit when all sites share one
+# battery temperature, to floating-point rounding otherwise).
+#
+# With `weather` (a weather.WeatherGenerator for 1 or n_sites sites) the solar input of
+# every site follows that generator's irradiance instead of intensity and variability.
+
+import numpy as np
+
+from pv_models import STC_IRRADIANCE
+from solar_sim_core import AC_MAINS, CHARGE_EFFICIENCY, INVERTER, MAX_SOLAR_POWER, SolarBatterySimulator
+
+# Per-site parameters (scalars are broadcast to every site)
+SITE_PARAMETERS = (
+    "battery_capacity",
+    "mppt_efficiency",
+    "inverter_efficiency",
+    "ac_load",
+    "pwm_timer",
+    "switch_threshold_low",
+    "switch_threshold_high",
+    "sunlight_intensity",
+    "sunlight_variability",
+    "battery_temperature",
+)
+
+FLEET_FIELDS = ("battery_soc", "battery_voltage", "solar_power", "source")
+
+
+class FleetSimulator:
+    def __init__(self, n_sites, seed=None, battery_soc=70.0, battery_voltage=12.0,
+                 ocv_curve="flooded_lead_acid", weather=None, **params):
+        self.n_sites = n_sites
+        if weather is not None and weather.sites not in (1, n_sites):
+            raise ValueError("weather must generate 1 site or one per site")
+        self.weather = weather
+        defaults = SolarBatterySimulator(ocv_curve=ocv_curve)
+        self.ocv_curve = defaults.ocv_curve  # One OCV curve (chemistry) for the whole fleet
+
+        for name in params:
+            if name not in SITE_PARAMETERS:
+                raise TypeError(f"Unknown fleet parameter: {name}")
+        for name in SITE_PARAMETERS:
+            setattr(self, name, self._site_array(params.get(name, getattr(defaults, name)), name))
+
+        # Site state
+        self.battery_soc = self._site_array(battery_soc, "battery_soc")
+        self.battery_voltage = self._site_array(battery_voltage, "battery_voltage")
+        self.solar_power = np.zeros(n_sites)
+        self.using_inverter = np.ones(n_sites, dtype=bool)
+        self.last_switch_time = np.full(n_sites, np.nan)  # NaN = never switched
+        self.sim_time = 0.0
+        self.rng = np.random.default_rng(seed)
+
+        # Scratch buffers reused by every step
+        self._net_power = np.empty(n_sites)
+        self._energy = np.empty(n_sites)
+        self._change = np.empty(n_sites)
+        self._mask = np.empty(n_sites, dtype=bool)
+        self._to_mains = np.empty(n_sites, dtype=bool)
+        self._to_inverter = np.empty(n_sites, dtype=bool)
+
+    def _site_array(self, value, name):
+        array = np.array(np.broadcast_to(np.asarray(value, dtype=float), (self.n_sites,)))
+        if array.shape != (self.n_sites,):
+            raise ValueError(f"{name} must be a scalar or have one value per site")
+        return array
+
+    def calculate_solar_power(self, time=None):
+        # Solar output of every site for one tick (intensity, variability and MPPT efficiency,
+        # or the weather irradiance at `time`, default the current simulated time)
+        if self.weather is not None:
+            irradiance = self.weather.at(self.sim_time if time is None else time)
+            solar_power = irradiance * (MAX_SOLAR_POWER / STC_IRRADIANCE)
+        else:
+            base_power = (self.sunlight_intensity / 100) * MAX_SOLAR_POWER
+            variability_factor = self.rng.uniform(-self.sunlight_variability, self.sunlight_variability) / 100
+            solar_power = np.where(self.sunlight_variability > 0, base_power * (1 + variability_factor), base_power)
+        np.maximum(0, solar_power * (self.mppt_efficiency / 100), out=self.solar_power)
+        return self.solar_power
+
+    def step(self, time_delta, solar_power=None, load=None):
+        # Advance all sites by one tick; `solar_power` and `load` (a value for all sites or one
+        # per site) override the solar model and the AC load, e.g. from recorded site logs
+        start_time = self.sim_time
+        self.sim_time += time_delta
+        if load is not None:
+            self.ac_load[:] = load
+        if solar_power is None:
+            solar_power = self.calculate_solar_power(start_time)  # Weather at the start of the tick
+        else:
+            self.solar_power[:] = solar_power
+            solar_power = self.solar_power
+
+        net_power = self._net_power
+        energy = self._energy
+        change = self._change
+        mask = self._mask
+        to_mains = self._to_mains
+        to_inverter = self._to_inverter
+
+        # Power balance: in inverter mode the battery supplies the load
+        np.divide(self.ac_load, self.inverter_efficiency / 100, out=net_power)
+        np.subtract(solar_power, net_power, out=net_power)
+        np.copyto(net_power, solar_power, where=~self.using_inverter)
+
+        # Battery energy balance (charging efficiency only applies when charging)
+        np.multiply(self.battery_capacity, self.battery_voltage, out=energy)
+        np.multiply(net_power, time_delta / 3600, out=change)
+        np.greater(net_power, 0, out=mask)
+        np.multiply(change, CHARGE_EFFICIENCY, out=change, where=mask)
+
+        soc = self.battery_soc
+        np.divide(soc, 100, out=soc)
+        np.multiply(soc, energy, out=soc)
+        np.add(soc, change, out=soc)
+        np.divide(soc, energy, out=soc)
+        np.multiply(soc, 100, out=soc)
+        np.clip(soc, 0, 100, out=soc)
+
+        self.battery_voltage[:] = self.ocv_curve.voltage(soc, self.battery_temperature)
+
+        # Switch to mains at the low threshold, back to the inverter at the high threshold
+        # once the PWM timer has elapsed (both decided from the state before this tick)
+        np.less_equal(soc, self.switch_threshold_low, out=to_mains)
+        to_mains &= self.using_inverter
+
+        np.greater_equal(soc, self.switch_threshold_high, out=to_inverter)
+        to_inverter &= ~self.using_inverter
+        np.subtract(self.sim_time, self.last_switch_time, out=change)
+        to_inverter &= change >= self.pwm_timer
+
+        self.last_switch_time[to_mains] = self.sim_time
+        self.using_inverter ^= to_mains | to_inverter
+
+        return solar_power
+
+    def source(self):
+        return np.where(self.using_inverter, INVERTER, AC_MAINS).astype(np.int8)
+
+    def run(self, duration, dt=1.0, record_every=1, solar_power=None, load=None):
+        """Run all sites for `duration` simulated seconds at a fixed `dt`.
+
+        Returns time (steps,) and battery_soc, battery_voltage, solar_power, source arrays of
+        shape (steps, n_sites), keeping every `record_every`-th step. `solar_power` and `load`
+        may be (steps,) or (steps, n_sites) arrays of recorded input replacing the solar model
+        and the AC load (see site_logs.py).
+        """
+        steps = int(round(duration / dt))
+        recorded = steps // record_every
+        result = {"time": np.empty(recorded)}
+        for name in FLEET_FIELDS:
+            result[name] = np.empty((recorded, self.n_sites), dtype=np.int8 if name == "source" else float)
+
+        row = 0
+        for i in range(steps):
+            self.step(dt, None if solar_power is None else solar_power[i], None if load is None else load[i])
+            if (i + 1) % record_every == 0:
+                result["time"][row] = self.sim_time
+                result["battery_soc"][row] = self.battery_soc
+                result["battery_voltage"][row] = self.battery_voltage
+                result["solar_power"][row] = self.solar_power
+                result["source"][row] = self.source()
+                row += 1
+
+        return result
@@ -0,0 +1,186 @@
+# History Pyramid - multi-resolution (level-of-detail) history for zoomable plots
+#
+# Description:
+# Keeps the simulation history at several fixed resolutions (1 s, 1 min, 15 min and 1 h
+# buckets by default). Every bucket stores the min, max and mean of each column, so a
+# plot drawn from any level shows the same envelope as the full-resolution data.
+# The pyramid is maintained incrementally: append() only updates the open 1 s bucket, and
+# a closed bucket is folded into the open bucket of the next level (min of mins, max of
+# maxes, count-weighted mean), so the cost per sample stays O(1) whatever the history
+# length. Each level is a TelemetryBuffer ring of `capacity` buckets; with the default
+# 4096 the levels cover about 68 minutes, 2.8 days, 6 weeks and 5.6 months.
+#
+# query(span) picks the finest level that covers `span` seconds with at most `max_points`
+# buckets, so every zoom level renders from a bounded number of points.
+#
+# append(), clear() and query() hold one lock: the simulation thread appends while the Tk
+# thread queries, and a query must not see a bucket half-closed (its count read before its
+# sums and extrema are reset). query() returns copies, so its result stays valid after that.
+
+import math
+import threading
+
+import numpy as np
+
+from telemetry import TelemetryBuffer
+
+LEVEL_WIDTHS = (1.0, 60.0, 900.0, 3600.0)  # Bucket width of each level (seconds)
+LEVEL_CAPACITY = 4096  # Buckets kept per level
+STATISTICS = ("min", "max", "mean")
+
+
+def envelope(time, low, high):
+    # Interleave per-bucket minima and maxima into one line that draws the min/max envelope
+    return np.repeat(time, 2), np.column_stack((low, high)).ravel()
+
+
+class _Level:
+    def __init__(self, width, columns, capacity):
+        self.width = width
+        self.columns = columns
+        names = ["time", "count"] + [f"{name}_{stat}" for name in columns for stat in STATISTICS]
+        self.buffer = TelemetryBuffer(names, capacity=capacity, track_extrema=False)
+        self.key = None  # Index of the open bucket (start time / width)
+        self.count = 0
+        self.minima = [math.inf] * len(columns)
+        self.maxima = [-math.inf] * len(columns)
+        self.sums = [0.0] * len(columns)
+
+    def add(self, key, count, minima, maxima, sums):
+        # Fold samples (or a closed bucket of the level below) into the open bucket;
+        # returns the bucket this closes as (key, count, minima, maxima, sums), else None
+        closed = None
+        if key != self.key:
+            if self.key is not None and self.count:
+                closed = self.close()
+            self.key = key
+        self.count += count
+        self.minima = [value if value < low else low for low, value in zip(self.minima, minima)]
+        self.maxima = [value if value > high else high for high, value in zip(self.maxima, maxima)]
+        self.sums = [total + value for total, value in zip(self.sums, sums)]
+        return closed
+
+    def close(self):
+        key, count, minima, maxima, sums = self.key, self.count, self.minima, self.maxima, self.sums
+        row = [key * self.width, count]
+        for low, high, total in zip(minima, maxima, sums):
+            row += [low, high, total / count]
+        self.buffer.append(*row)
+        self.count = 0
+        self.minima = [math.inf] * len(self.columns)
+        self.maxima = [-math.inf] * len(self.columns)
+        self.sums = [0.0] * len(self.columns)
+        return key, count, minima, maxima, sums
+
+    def clear(self):
+        self.buffer.clear()
+        self.key = None
+        self.count = 0
+        self.minima = [math.inf] * len(self.columns)
+        self.maxima = [-math.inf] * len(self.columns)
+        self.sums = [0.0] * len(self.columns)
+
+
+class HistoryPyramid:
+    def __init__(self, columns, widths=LEVEL_WIDTHS, capacity=LEVEL_CAPACITY):
+        """History of `columns` (the first one is the sample time in seconds) at each bucket width."""
+        columns = tuple(columns)
+        if columns[0] != "time":
+            raise ValueError("The first column must be the sample time")
+        if list(widths) != sorted(widths):
+            raise ValueError("Level widths must be increasing")
+        self.columns = columns[1:]
+        self.widths = tuple(float(width) for width in widths)
+        self.levels = [_Level(width, self.columns, capacity) for width in self.widths]
+        self.samples = 0
+        self._lock = threading.Lock()
+
+    def append(self, time, *values):
+        # One sample, same call as TelemetryBuffer.append (time first, then the other columns)
+        if len(values) != len(self.columns):
+            raise ValueError(f"Expected {len(self.columns) + 1} values, got {len(values) + 1}")
+        with self._lock:
+            self.samples += 1
+            level = self.levels[0]
+            closed = level.add(math.floor(time / level.width), 1, values, values, values)
+            index = 1
+            # Cascade closed buckets up the pyramid (rare: once per bucket of the level below)
+            while closed is not None and index < len(self.levels):
+                key, count, minima, maxima, sums = closed
+                level = self.levels[index]
+                start = key * self.levels[index - 1].width
+                closed = level.add(math.floor(start / level.width), count, minima, maxima, sums)
+                index += 1
+
+    def clear(self):
+        with self._lock:
+            for level in self.levels:
+                level.clear()
+            self.samples = 0
+
+    def __len__(self):
+        return self.samples
+
+    def level_for(self, span, max_points=2000):
+        # Finest level showing `span` seconds in at most `max_points` buckets that still holds
+        # the whole span (the coarsest level otherwise)
+        for index, level in enumerate(self.levels):
+            if span / level.width <= max_points and level.buffer.capacity * level.width >= span:
+                return index
+        return len(self.levels) - 1
+
+    def _pending(self, index):
+        # Samples not yet in a closed bucket of level `index` sit in the open buckets of that
+        # level and the levels below; merge them into rows of that level's width
+        width = self.levels[index].width
+        buckets = {}
+        for level in self.levels[index::-1]:
+            if not level.count:
+                continue
+            key = math.floor(level.key * level.width / width)
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = [level.count, list(level.minima), list(level.maxima), list(level.sums)]
+            else:
+                bucket[0] += level.count
+                bucket[1] = [min(low, value) for low, value in zip(bucket[1], level.minima)]
+                bucket[2] = [max(high, value) for high, value in zip(bucket[2], level.maxima)]
+                bucket[3] = [total + value for total, value in zip(bucket[3], level.sums)]
+        rows = []
+        for key in sorted(buckets):
+            count, minima, maxima, sums = buckets[key]
+            row = [key * width, count]
+            for low, high, total in zip(minima, maxima, sums):
+                row += [low, high, total / count]
+            rows.append(row)
+        return rows
+
+    def query(self, span, end=None, max_points=2000, level=None):
+        """Buckets covering the `span` seconds before `end` (default: the latest sample).
+
+        Returns (bucket width, dict of arrays): "time" (bucket start), "count" and
+        "<column>_min/_max/_mean" per column, including the open bucket of that level.
+        """
+        index = self.level_for(span, max_points) if level is None else level
+        with self._lock:
+            return self._query(index, span, end)
+
+    def _query(self, index, span, end):
+        level = self.levels[index]
+        buffer = level.buffer
+        names = buffer.columns
+        pending = self._pending(index)
+        if end is None:
+            end = pending[-1][0] + level.width if pending else (buffer.latest("time") or 0.0) + level.width
+        start = end - span
+
+        closed = buffer.window(buffer.count_since("time", start - level.width)) if len(buffer) else None
+        if closed is not None:
+            keep = closed[0] < end
+            closed = closed[:, keep]
+        rows = [closed] if closed is not None and closed.shape[1] else []
+        pending = [row for row in pending if start - level.width <= row[0] < end]
+        if pending:
+            rows.append(np.array(pending, dtype=float).T)
+        data = np.concatenate(rows, axis=1) if rows else np.empty((len(names), 0))
+        return level.width, dict(zip(names, data))
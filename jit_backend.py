@@ -0,0 +1,77 @@
+# JIT Backend - optional compiled stepping kernels
+#
+# Description:
+# The sequential hot loops of the simulation (battery/switching integration in
+# solar_sim_core.py, MPPT tracking in pv_models.py, relay timers in relay_engine.py) are
+# written as plain Python functions that only use scalar arithmetic and indexing, so the
+# same source runs either as pure Python or compiled with Numba. compiled() returns the
+# Numba version of such a kernel, compiling it once per process (and caching the machine
+# code on disk), or None when the pure-Python implementation should be used instead.
+#
+# The backend is chosen at runtime:
+# - "auto" (default): compile with Numba when it is installed, otherwise fall back to Python,
+# - "numba": require Numba (ImportError when it is missing),
+# - "python": never compile (reference implementation, or to rule out the compiler).
+# Select it with set_backend(), the use_backend() context manager, or the SOLACE_JIT_BACKEND
+# environment variable.
+
+import os
+from contextlib import contextmanager
+
+BACKENDS = ("auto", "numba", "python")
+BACKEND_ENV = "SOLACE_JIT_BACKEND"
+
+_backend = "auto"
+_kernels = {}  # Python function -> compiled function (False when Numba is missing)
+
+
+def set_backend(name):
+    # Select the backend for all kernels; returns the previous one
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown JIT backend: {name} (choose from {', '.join(BACKENDS)})")
+    previous = _backend
+    _backend = name
+    return previous
+
+
+def get_backend():
+    return _backend
+
+
+@contextmanager
+def use_backend(name):
+    previous = set_backend(name)
+    try:
+        yield
+    finally:
+        set_backend(previous)
+
+
+def numba_available():
+    try:
+        import numba  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def compiled(function):
+    """Numba-compiled `function`, or None when the pure-Python version should run."""
+    if _backend == "python":
+        return None
+    kernel = _kernels.get(function)
+    if kernel is None:
+        try:
+            import numba
+        except ImportError:
+            kernel = False
+        else:
+            kernel = numba.njit(cache=True)(function)
+        _kernels[function] = kernel
+    if not kernel and _backend == "numba":
+        raise ImportError("The numba JIT backend requires the numba package")
+    return kernel or None
+
+
+set_backend(os.environ.get(BACKEND_ENV, "auto"))
@@ -0,0 +1,114 @@
+# Live Plot - blitted rendering helpers for the Tk dashboard
+#
+# Description:
+# Cheaper redraws for the live plots in Solar_System_GUI_Plot_Simulation.py:
+# - BlitRenderer caches the static background (axes, grid, labels) and only redraws the
+#   data lines on top of it; a full canvas draw happens only when axis limits change or
+#   the window is resized.
+# - sliding_limits moves the visible time window in steps instead of every frame, so the
+#   x-limits (and with them the cached background) stay valid for many frames.
+# - decimate_minmax reduces long windows to a min/max pair per pixel column, which draws
+#   the same envelope as the full data at a bounded cost.
+# Frame times are recorded so the achieved rate can be checked against the frame budget.
+
+import math
+import time
+from collections import deque
+
+import numpy as np
+
+
+def decimate_minmax(x, y, columns):
+    # Reduce (x, y) to a min and a max point per pixel column; short inputs are returned as-is
+    n = len(y)
+    columns = max(1, int(columns))
+    if n <= 2 * columns:
+        return x, y
+    edges = np.linspace(0, n, columns + 1).astype(np.intp)[:-1]
+    low = np.minimum.reduceat(y, edges)
+    high = np.maximum.reduceat(y, edges)
+    centre = x[np.minimum(edges + np.diff(edges, append=n) // 2, n - 1)]
+    return np.repeat(centre, 2), np.column_stack((low, high)).ravel()
+
+
+def sliding_limits(latest, span=120.0, margin=5.0, step=None):
+    # X-limits showing the last `span` seconds; the right edge advances in `step` jumps
+    step = span / 10 if step is None else step
+    x_max = math.ceil(max(latest, 0.0) / step) * step + margin
+    x_min = max(0.0, x_max - margin - span)
+    return x_min, x_max
+
+
+class BlitRenderer:
+    def __init__(self, canvas, lines, frame_budget=0.1, history=300):
+        self.canvas = canvas
+        self.figure = canvas.figure
+        self.lines = list(lines)
+        self.frame_budget = frame_budget  # Seconds allowed per frame
+        self.frame_times = deque(maxlen=history)
+        self.frames = 0
+        self.late_frames = 0
+        self._background = None
+        self._stale = True
+
+        for line in self.lines:
+            line.set_animated(True)
+        self._draw_cid = canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _on_draw(self, event):
+        # Any full draw (first frame, limit change, resize) refreshes the cached background
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        for line in self.lines:
+            line.axes.draw_artist(line)
+
+    def disconnect(self):
+        self.canvas.mpl_disconnect(self._draw_cid)
+        for line in self.lines:
+            line.set_animated(False)
+
+    def set_limits(self, ax, xlim=None, ylim=None):
+        # Only touch the axes (and force a full redraw) when the limits actually change
+        if xlim is not None and tuple(ax.get_xlim()) != tuple(xlim):
+            ax.set_xlim(*xlim)
+            self._stale = True
+        if ylim is not None and tuple(ax.get_ylim()) != tuple(ylim):
+            ax.set_ylim(*ylim)
+            self._stale = True
+
+    def invalidate(self):
+        self._stale = True
+
+    def render(self, data):
+        """Draw one frame; `data` maps each line to its (x, y) arrays. Returns the frame time (s)."""
+        start = time.perf_counter()
+        for line, (x, y) in data.items():
+            line.set_data(x, y)
+
+        if self._stale or self._background is None:
+            self.canvas.draw()
+            self._stale = False
+        else:
+            self.canvas.restore_region(self._background)
+            for line in self.lines:
+                line.axes.draw_artist(line)
+            self.canvas.blit(self.figure.bbox)
+
+        elapsed = time.perf_counter() - start
+        self.frame_times.append(elapsed)
+        self.frames += 1
+        if elapsed > self.frame_budget:
+            self.late_frames += 1
+        return elapsed
+
+    def frame_stats(self):
+        # Achieved frame times (milliseconds) over the recent history
+        if not self.frame_times:
+            return {"frames": 0, "late_frames": 0, "last_ms": 0.0, "mean_ms": 0.0, "max_ms": 0.0}
+        times = np.asarray(self.frame_times) * 1000
+        return {
+            "frames": self.frames,
+            "late_frames": self.late_frames,
+            "last_ms": float(times[-1]),
+            "mean_ms": float(times.mean()),
+            "max_ms": float(times.max()),
+        }
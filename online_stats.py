@@ -0,0 +1,190 @@
+# Online Statistics - O(1) per sample accumulators for long and streamed runs
+#
+# Description:
+# Running statistics that are updated one sample (or one chunk) at a time and can be read
+# at any moment without keeping the trace:
+# - RunningStats: count, mean, variance (Welford; chunks merged with Chan et al.'s
+#   parallel formula), min and max,
+# - StateCounter: switch count and time spent in each state of a 0/1 signal (a relay, or
+#   the power source with INVERTER/AC_MAINS),
+# - ControllerStatistics: output power, energy harvested and one StateCounter per relay
+#   strategy of a charge controller, with the relay wear reduction between strategies,
+# - SimulationStatistics: SOC, solar power, energy and time on mains of a
+#   SolarBatterySimulator run, fed with the chunks of iter_chunks()/iter_replay().
+# Chunk updates give the same counts as the per-sample updates and the same moments up to
+# floating-point rounding.
+
+import math
+
+import numpy as np
+
+from solar_sim_core import AC_MAINS
+
+
+class RunningStats:
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0  # Sum of squared deviations from the mean
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def update(self, value):
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+
+    def update_many(self, values):
+        values = np.asarray(values, dtype=float)
+        count = values.size
+        if count == 0:
+            return
+        mean = float(values.mean())
+        m2 = float(np.square(values - mean).sum())
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self._m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+
+    @property
+    def variance(self):
+        # Population variance (as np.var)
+        return self._m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def as_dict(self):
+        empty = self.count == 0
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "std": self.std,
+            "min": None if empty else self.minimum,
+            "max": None if empty else self.maximum,
+        }
+
+
+class StateCounter:
+    def __init__(self, dt=1.0, initial=None):
+        self.dt = dt  # Seconds per sample
+        self.state = initial  # Last state seen (None until the first sample)
+        self.switches = 0
+        self.samples = 0
+        self.samples_on = 0  # Samples in state 1 (relay ON / INVERTER)
+
+    def update(self, state):
+        state = int(state)
+        if self.state is not None and state != self.state:
+            self.switches += 1
+        self.state = state
+        self.samples += 1
+        self.samples_on += state
+
+    def update_many(self, states):
+        states = np.asarray(states)
+        if states.size == 0:
+            return
+        if self.state is not None:
+            self.switches += int(states[0] != self.state)
+        self.switches += int(np.count_nonzero(states[1:] != states[:-1]))
+        self.state = int(states[-1])
+        self.samples += states.size
+        self.samples_on += int(np.count_nonzero(states))
+
+    def time_in(self, state):
+        # Seconds spent in `state` (0 or 1)
+        samples = self.samples_on if state else self.samples - self.samples_on
+        return samples * self.dt
+
+
+class ControllerStatistics:
+    def __init__(self, dt=1.0, relays=("simple", "advanced")):
+        self.dt = dt
+        self.power = RunningStats()
+        self.energy_wh = 0.0
+        self.relays = {name: StateCounter(dt) for name in relays}
+
+    def update(self, power, **relay_states):
+        # One sample: controller output power (W) and the state of each relay strategy
+        self.power.update(power)
+        self.energy_wh += float(power) * self.dt / 3600
+        for name, state in relay_states.items():
+            self.relays[name].update(state)
+
+    def update_many(self, power, **relay_states):
+        power = np.asarray(power, dtype=float)
+        self.power.update_many(power)
+        self.energy_wh += float(power.sum()) * self.dt / 3600
+        for name, states in relay_states.items():
+            self.relays[name].update_many(states)
+
+    def switches(self, relay):
+        return self.relays[relay].switches
+
+    def wear_reduction(self, baseline="simple", relay="advanced"):
+        # Percentage fewer switching operations with `relay` than with `baseline`
+        base = self.relays[baseline].switches
+        if base == 0:
+            return 0  # Prevent division by zero
+        return (base - self.relays[relay].switches) / base * 100
+
+    def summary(self):
+        return {
+            "power": self.power.as_dict(),
+            "energy_wh": self.energy_wh,
+            "switches": {name: counter.switches for name, counter in self.relays.items()},
+            "time_on_s": {name: counter.time_in(1) for name, counter in self.relays.items()},
+        }
+
+
+class SimulationStatistics:
+    def __init__(self, dt=1.0, initial_source=None):
+        self.dt = dt
+        self.battery_soc = RunningStats()
+        self.solar_power = RunningStats()
+        self.solar_energy_wh = 0.0
+        self.load_energy_wh = 0.0
+        self.source = StateCounter(dt, initial_source)
+        self.final_soc = None
+
+    def update_chunk(self, chunk):
+        # One dict of arrays from SolarBatterySimulator.iter_chunks() / iter_replay()
+        self.battery_soc.update_many(chunk["battery_soc"])
+        self.solar_power.update_many(chunk["solar_power"])
+        self.solar_energy_wh += float(np.sum(chunk["solar_power"])) * self.dt / 3600
+        self.load_energy_wh += float(np.sum(chunk["load"])) * self.dt / 3600
+        self.source.update_many(chunk["source"])
+        if len(chunk["battery_soc"]):
+            self.final_soc = float(chunk["battery_soc"][-1])
+
+    @property
+    def time_on_mains(self):
+        return self.source.time_in(AC_MAINS)
+
+    @property
+    def mains_fraction(self):
+        return self.time_on_mains / (self.source.samples * self.dt) if self.source.samples else 0.0
+
+    def summary(self):
+        return {
+            "steps": self.source.samples,
+            "time_on_mains_s": self.time_on_mains,
+            "mains_fraction": self.mains_fraction,
+            "switch_events": self.source.switches,
+            "battery_soc": self.battery_soc.as_dict(),
+            "final_soc": self.final_soc,
+            "solar_power": self.solar_power.as_dict(),
+            "solar_energy_wh": self.solar_energy_wh,
+            "load_energy_wh": self.load_energy_wh,
+        }
@@ -0,0 +1,218 @@
+# Monte Carlo Parameter Sweep
+#
+# Description:
+# Runs the headless battery/switching model (solar_sim_core.py) over a grid of parameters
+# (battery capacity, SOC thresholds, PWM timer, load, sunlight intensity/variability)
+# and many random seeds, spread across all CPU cores with a ProcessPoolExecutor.
+# Every case is reduced to a few outcome metrics while it runs (time on mains, switch
+# events, SOC range, ...) so no trace is kept in memory, and each finished case is
+# appended to a CSV file straight away. aggregate_results() then summarises the file
+# per parameter combination across seeds. With --trace-dir, every case also archives its
+# trace (every --trace-every-th step, with the case parameters) as a compressed run file
+# (run_store.py) named after its case_id.
+#
+# Usage (from the repository root):
+#   python parameter_sweep.py --grid '{"battery_capacity": [100, 200], "pwm_timer": [5, 10, 20]}' \
+#       --seeds 50 --duration 604800 --output sweep.csv
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from online_stats import SimulationStatistics
+from run_store import RunWriter, archive_run
+from solar_sim_core import SolarBatterySimulator
+
+SWEEP_PARAMETERS = (
+    "battery_capacity",
+    "switch_threshold_low",
+    "switch_threshold_high",
+    "pwm_timer",
+    "ac_load",
+    "sunlight_intensity",
+    "sunlight_variability",
+)
+
+METRICS = (
+    "time_on_mains_s",
+    "mains_fraction",
+    "switch_events",
+    "min_soc",
+    "final_soc",
+    "mean_solar_w",
+)
+
+# Cases queued per worker; keeps every core busy without building a huge backlog of futures
+QUEUE_DEPTH = 4
+
+
+def expand_grid(grid):
+    # Cartesian product of the parameter lists, skipping threshold pairs the GUI would not allow
+    for name in grid:
+        if name not in SWEEP_PARAMETERS:
+            raise ValueError(f"Cannot sweep unknown parameter: {name}")
+    names = list(grid)
+    for values in itertools.product(*(grid[name] for name in names)):
+        params = dict(zip(names, values))
+        low = params.get("switch_threshold_low", 30.0)
+        high = params.get("switch_threshold_high", 40.0)
+        if low < high:
+            yield params
+
+
+def iter_cases(grid, seeds, base_seed=0):
+    # One case per parameter combination and seed
+    case_id = 0
+    for params in expand_grid(grid):
+        for seed in range(base_seed, base_seed + seeds):
+            yield {"case_id": case_id, "seed": seed, **params}
+            case_id += 1
+
+
+def run_case(case, duration, dt=1.0, trace_dir=None, trace_every=60):
+    # Simulate one case and reduce it to outcome metrics chunk by chunk
+    params = {name: value for name, value in case.items() if name in SWEEP_PARAMETERS}
+    sim = SolarBatterySimulator(seed=case["seed"], **params)
+    stats = SimulationStatistics(dt, initial_source=1 if sim.using_inverter else 0)
+    min_soc = sim.battery_soc
+
+    # Optional decimated trace, written while running (staged in a new directory of its own,
+    # so nothing already in trace_dir is touched) and packed into one archive at the end
+    trace = staging = None
+    if trace_dir is not None:
+        os.makedirs(trace_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".case_", dir=trace_dir)
+        trace = RunWriter(os.path.join(staging, "run"),
+                          parameters={**case, "duration": duration, "dt": dt, "trace_every": trace_every})
+    done = 0
+
+    try:
+        for chunk in sim.iter_chunks(duration, dt):
+            stats.update_chunk(chunk)
+            if trace is not None:
+                # Keep steps trace_every - 1, 2 * trace_every - 1, ... across chunk boundaries
+                first = (trace_every - 1 - done) % trace_every
+                trace.append({name: values[first::trace_every] for name, values in chunk.items()})
+                done += len(chunk["time"])
+
+        if trace is not None:
+            trace.close()
+            archive_run(trace.path, os.path.join(trace_dir, f"case_{case['case_id']:06d}.npz"))
+    finally:
+        if staging is not None:
+            shutil.rmtree(staging)
+
+    return {
+        **case,
+        "time_on_mains_s": stats.time_on_mains,
+        "mains_fraction": stats.mains_fraction,
+        "switch_events": stats.source.switches,
+        "min_soc": min(min_soc, stats.battery_soc.minimum),
+        "final_soc": sim.battery_soc,
+        "mean_solar_w": stats.solar_power.mean if stats.solar_power.count else 0.0,
+    }
+
+
+def run_sweep(grid, seeds, output_path, duration, dt=1.0, max_workers=None, base_seed=0,
+              trace_dir=None, trace_every=60):
+    """Run every grid combination for `seeds` seeds and stream one CSV row per case.
+
+    Rows are written in completion order (use case_id to sort). Returns the number of cases.
+    With `trace_dir`, each case also archives its trace as <trace_dir>/case_<case_id>.npz.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    fieldnames = ["case_id", "seed", *[name for name in SWEEP_PARAMETERS if name in grid], *METRICS]
+    cases = iter_cases(grid, seeds, base_seed)
+    completed = 0
+    if trace_dir is not None:
+        os.makedirs(trace_dir, exist_ok=True)
+
+    with open(output_path, "w", newline="") as output, ProcessPoolExecutor(max_workers) as executor:
+        writer = csv.DictWriter(output, fieldnames=fieldnames)
+        writer.writeheader()
+
+        pending = set()
+        for case in itertools.islice(cases, max_workers * QUEUE_DEPTH):
+            pending.add(executor.submit(run_case, case, duration, dt, trace_dir, trace_every))
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                writer.writerow(future.result())
+                completed += 1
+            output.flush()
+
+            # Refill the queue as cases finish
+            for case in itertools.islice(cases, len(done)):
+                pending.add(executor.submit(run_case, case, duration, dt, trace_dir, trace_every))
+
+    return completed
+
+
+def aggregate_results(path):
+    # Mean/min/max of every metric per parameter combination (across seeds), read row by row
+    groups = {}
+    with open(path, newline="") as results:
+        reader = csv.DictReader(results)
+        names = [name for name in reader.fieldnames if name in SWEEP_PARAMETERS]
+        for row in reader:
+            key = tuple(float(row[name]) for name in names)
+            stats = groups.setdefault(key, {"runs": 0, **{metric: [0.0, np.inf, -np.inf] for metric in METRICS}})
+            stats["runs"] += 1
+            for metric in METRICS:
+                value = float(row[metric])
+                total, low, high = stats[metric]
+                stats[metric] = [total + value, min(low, value), max(high, value)]
+
+    summary = []
+    for key, stats in groups.items():
+        entry = dict(zip(names, key))
+        entry["runs"] = stats["runs"]
+        for metric in METRICS:
+            total, low, high = stats[metric]
+            entry[f"{metric}_mean"] = total / stats["runs"]
+            entry[f"{metric}_min"] = low
+            entry[f"{metric}_max"] = high
+        summary.append(entry)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo parameter sweep of the battery/switching model")
+    parser.add_argument("--grid", required=True,
+                        help="JSON object (or path to a JSON file) mapping parameter names to value lists")
+    parser.add_argument("--seeds", type=int, default=10, help="random seeds per parameter combination")
+    parser.add_argument("--base-seed", type=int, default=0)
+    parser.add_argument("--duration", type=float, default=86_400, help="simulated seconds per case")
+    parser.add_argument("--dt", type=float, default=1.0, help="timestep (seconds)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--output", default="sweep_results.csv")
+    parser.add_argument("--trace-dir", default=None, help="archive every case's trace in this directory")
+    parser.add_argument("--trace-every", type=int, default=60, help="steps between archived trace samples")
+    args = parser.parse_args()
+
+    if os.path.exists(args.grid):
+        with open(args.grid) as grid_file:
+            grid = json.load(grid_file)
+    else:
+        grid = json.loads(args.grid)
+
+    count = run_sweep(grid, args.seeds, args.output, args.duration, args.dt, args.workers, args.base_seed,
+                      args.trace_dir, args.trace_every)
+    print(f"{count} cases written to {args.output}")
+
+    for entry in aggregate_results(args.output):
+        params = ", ".join(f"{name}={entry[name]:g}" for name in SWEEP_PARAMETERS if name in entry)
+        print(f"{params}: mains {entry['mains_fraction_mean'] * 100:.1f}%, "
+              f"switches {entry['switch_events_mean']:.1f}, min SOC {entry['min_soc_min']:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# Profiling - opt-in per-stage timing for the dashboard
+#
+# Description:
+# StageProfiler collects wall-clock timings of named stages (model step, telemetry append,
+# status refresh, plot update, frame draw, ...) into fixed log-spaced histograms, together
+# with simple counters such as late and dropped frames. summary() reports count, mean,
+# max and approximate percentiles per stage, and export() writes the same as JSON.
+#
+# Instrumentation stays in place permanently: when the profiler is disabled, stage()
+# returns one shared no-op context manager and record()/count() return immediately, so the
+# cost is a method call per stage. Each stage should be recorded from one thread only
+# (the simulation thread and the Tk thread use different stage names).
+
+import json
+import time
+from bisect import bisect_right
+
+# Histogram bucket edges: 1 us to 10 s, 8 buckets per decade
+HISTOGRAM_EDGES = [10 ** (exponent / 8) for exponent in range(-48, 9)]
+LATE_FACTOR = 1.5  # A frame is late when its interval exceeds this x the target
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _StageStats:
+    __slots__ = ("count", "total", "maximum", "last", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.last = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_EDGES) + 1)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+        self.buckets[bisect_right(HISTOGRAM_EDGES, seconds)] += 1
+
+    def percentile(self, fraction):
+        # Upper edge of the bucket holding the requested fraction of samples (capped at the max)
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= target:
+                return min(HISTOGRAM_EDGES[index], self.maximum) if index < len(HISTOGRAM_EDGES) else self.maximum
+        return self.maximum
+
+
+class StageProfiler:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._stages = {}
+        self._counters = {}
+        self._marks = {}
+        self.started = time.time()
+
+    def stage(self, name):
+        """Context manager timing one run of stage `name` (a shared no-op when disabled)."""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def record(self, name, seconds):
+        if not self.enabled:
+            return
+        stats = self._stages.get(name)
+        if stats is None:
+            stats = self._stages.setdefault(name, _StageStats())
+        stats.add(seconds)
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def interval(self, name, target=None):
+        """Record the time since the previous call with the same name (e.g. frame-to-frame).
+
+        With a `target` interval (seconds), intervals over LATE_FACTOR x target count as a late
+        frame under "<name>.late" and the frames missed meanwhile under "<name>.dropped".
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        previous = self._marks.get(name)
+        self._marks[name] = now
+        if previous is None:
+            return
+        elapsed = now - previous
+        self.record(name, elapsed)
+        if target and elapsed > LATE_FACTOR * target:
+            self.count(f"{name}.late")
+            self.count(f"{name}.dropped", int(elapsed / target) - 1)
+
+    def reset(self):
+        self._stages.clear()
+        self._counters.clear()
+        self._marks.clear()
+        self.started = time.time()
+
+    def summary(self):
+        stages = {}
+        for name, stats in list(self._stages.items()):
+            if not stats.count:
+                continue
+            stages[name] = {
+                "count": stats.count,
+                "total_s": stats.total,
+                "mean_ms": stats.total / stats.count * 1000,
+                "last_ms": stats.last * 1000,
+                "max_ms": stats.maximum * 1000,
+                "p50_ms": stats.percentile(0.5) * 1000,
+                "p95_ms": stats.percentile(0.95) * 1000,
+                "p99_ms": stats.percentile(0.99) * 1000,
+                "histogram": {"edges_s": HISTOGRAM_EDGES, "counts": list(stats.buckets)},
+            }
+        return {
+            "started": self.started,
+            "duration_s": time.time() - self.started,
+            "stages": stages,
+            "counters": dict(self._counters),
+        }
+
+    def format_summary(self, limit=4):
+        # Short text for the dashboard: the stages with the most total time
+        stages = self.summary()["stages"]
+        busiest = sorted(stages.items(), key=lambda item: item[1]["total_s"], reverse=True)[:limit]
+        lines = [f"{name}: {stats['mean_ms']:.2f} ms avg, p95 {stats['p95_ms']:.2f}, max {stats['max_ms']:.1f}"
+                 for name, stats in busiest]
+        late = {name: value for name, value in self._counters.items() if name.endswith((".late", ".dropped"))}
+        if late:
+            lines.append(", ".join(f"{name} {value}" for name, value in sorted(late.items())))
+        return "\n".join(lines) if lines else "No samples yet"
+
+    def export(self, path):
+        summary = self.summary()
+        with open(path, "w") as output:
+            json.dump(summary, output, indent=2)
+        return summary
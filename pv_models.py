@@ -0,0 +1,227 @@
+# PV Models - single-diode panel curves and MPPT trackers
+#
+# Description:
+# A photovoltaic array described by the single-diode model
+#   I = Iph - I0 * (exp((V + I*Rs) / (n*Ns*Vt)) - 1) - (V + I*Rs) / Rsh
+# and two maximum power point trackers that move the operating voltage along its I-V
+# curve one tick at a time:
+# - perturb and observe (P&O): keep stepping in the same direction while power rises,
+#   reverse when it falls,
+# - incremental conductance: compare dI/dV with -I/V (the slope of the power curve is zero
+#   at the maximum power point) and step towards the point where they are equal.
+#
+# Solving the implicit diode equation on every tick would dominate long runs, so the curve
+# is tabulated once per temperature (rounded to `temperature_step`) on a grid of
+# irradiance buckets x operating voltages, with a vectorized Newton solve for the whole
+# grid. Trackers then read the current with a bilinear lookup in that table, in a tight loop
+# over plain floats that is compiled with Numba when it is installed (see jit_backend.py).
+# The array current is scaled so that the maximum power point at 1000 W/m2 and 25 C equals
+# `rated_power`.
+
+import math
+
+import numpy as np
+
+from jit_backend import compiled as jit_compiled
+
+BOLTZMANN = 1.380649e-23  # J/K
+ELEMENTARY_CHARGE = 1.602176634e-19  # C
+BAND_GAP = 1.12  # eV (crystalline silicon)
+STC_IRRADIANCE = 1000.0  # W/m2, standard test conditions
+STC_TEMPERATURE = 25.0  # C
+
+PERTURB_OBSERVE = 0  # Tracker codes used by the tracking loop
+INCREMENTAL_CONDUCTANCE = 1
+TRACKER_METHODS = {"perturb_observe": PERTURB_OBSERVE, "incremental_conductance": INCREMENTAL_CONDUCTANCE}
+
+NEWTON_ITERATIONS = 100
+NEWTON_TOLERANCE = 1e-12  # A
+
+
+class PVArray:
+    def __init__(self, rated_power=1000.0, cells=60, short_circuit_current=8.9, saturation_current=1e-10,
+                 ideality=1.0, series_resistance=0.3, shunt_resistance=300.0,
+                 current_temperature_coefficient=0.0005, irradiance_step=10.0, max_irradiance=1400.0,
+                 voltage_points=256, temperature_step=1.0):
+        # Single-diode parameters of one string at STC
+        self.cells = cells
+        self.short_circuit_current = short_circuit_current  # A (~ photocurrent at STC)
+        self.saturation_current = saturation_current  # A, diode saturation current at STC
+        self.ideality = ideality
+        self.series_resistance = series_resistance  # Ohm
+        self.shunt_resistance = shunt_resistance  # Ohm
+        self.current_temperature_coefficient = current_temperature_coefficient  # 1/C
+
+        # Curve table resolution
+        self.irradiance_step = irradiance_step  # W/m2 between irradiance buckets
+        self.max_irradiance = max_irradiance
+        self.voltage_points = voltage_points
+        self.temperature_step = temperature_step  # C between cached tables
+
+        self.current_scale = 1.0
+        stc_voltage = np.linspace(0, self.open_circuit_voltage(STC_IRRADIANCE), 4096)
+        stc_power = stc_voltage * self.current(stc_voltage, STC_IRRADIANCE)
+        self.current_scale = rated_power / stc_power.max()
+        self.rated_power = rated_power
+
+        self._tables = {}
+        self._table_lists = {}
+
+    def _diode_terms(self, irradiance, temperature):
+        kelvin = temperature + 273.15
+        stc_kelvin = STC_TEMPERATURE + 273.15
+        thermal_voltage = self.ideality * self.cells * BOLTZMANN * kelvin / ELEMENTARY_CHARGE
+        photocurrent = (self.short_circuit_current * (np.asarray(irradiance, dtype=float) / STC_IRRADIANCE)
+                        * (1 + self.current_temperature_coefficient * (temperature - STC_TEMPERATURE)))
+        saturation = (self.saturation_current * (kelvin / stc_kelvin) ** 3
+                      * math.exp(BAND_GAP / (self.ideality * BOLTZMANN / ELEMENTARY_CHARGE)
+                                 * (1 / stc_kelvin - 1 / kelvin)))
+        return photocurrent, saturation, thermal_voltage
+
+    def open_circuit_voltage(self, irradiance, temperature=STC_TEMPERATURE):
+        # Ignoring the shunt path (a small overestimate, fine as a table bound)
+        photocurrent, saturation, thermal_voltage = self._diode_terms(irradiance, temperature)
+        return thermal_voltage * np.log1p(photocurrent / saturation)
+
+    def current(self, voltage, irradiance, temperature=STC_TEMPERATURE):
+        """Array current (A) at the given voltage(s) and irradiance(s), solved by Newton's method."""
+        photocurrent, saturation, thermal_voltage = self._diode_terms(irradiance, temperature)
+        voltage, photocurrent = np.broadcast_arrays(np.asarray(voltage, dtype=float), photocurrent)
+        rs = self.series_resistance
+        rsh = self.shunt_resistance
+
+        # f(I) is decreasing and concave, so Newton from I = Iph converges monotonically
+        current = photocurrent.copy()
+        for _ in range(NEWTON_ITERATIONS):
+            diode_voltage = voltage + current * rs
+            exponential = np.exp(np.minimum(diode_voltage / thermal_voltage, 200.0))
+            residual = photocurrent - saturation * (exponential - 1) - diode_voltage / rsh - current
+            derivative = -saturation * exponential * rs / thermal_voltage - rs / rsh - 1
+            delta = residual / derivative
+            current = current - delta
+            if np.max(np.abs(delta), initial=0.0) < NEWTON_TOLERANCE:
+                break
+        # A blocking diode stops reverse current above the open-circuit voltage
+        return np.maximum(current, 0.0) * self.current_scale
+
+    def table(self, temperature=STC_TEMPERATURE, as_lists=False):
+        """(irradiance_step, voltage_step, currents) with currents[irradiance bucket, voltage point],
+        cached per temperature bucket (as nested lists for the pure-Python loop with `as_lists`)."""
+        bucket = round(float(temperature) / self.temperature_step) * self.temperature_step
+        if as_lists:
+            cached = self._table_lists.get(bucket)
+            if cached is None:
+                irradiance_step, voltage_step, currents = self.table(bucket)
+                cached = (irradiance_step, voltage_step, currents.tolist())
+                self._table_lists[bucket] = cached
+            return cached
+        cached = self._tables.get(bucket)
+        if cached is None:
+            irradiance = np.arange(0.0, self.max_irradiance + self.irradiance_step / 2, self.irradiance_step)
+            max_voltage = float(self.open_circuit_voltage(self.max_irradiance, bucket)) * 1.02
+            voltage = np.linspace(0.0, max_voltage, self.voltage_points)
+            currents = self.current(voltage[np.newaxis, :], irradiance[:, np.newaxis], bucket)
+            cached = (self.irradiance_step, voltage[1], currents)
+            self._tables[bucket] = cached
+        return cached
+
+    def max_power(self, irradiance, temperature=STC_TEMPERATURE):
+        # Power available at the maximum power point (on the table grid), for tracking efficiency
+        irradiance_step, voltage_step, currents = self.table(temperature)
+        peaks = (currents * (voltage_step * np.arange(currents.shape[1]))).max(axis=1)
+        return np.interp(irradiance, irradiance_step * np.arange(len(peaks)), peaks)
+
+
+def _track(method, irradiance, count, state, params, currents, irradiance_step, voltage_step, out_power):
+    # Sequential MPPT loop over `count` ticks. Works on lists (pure Python) or NumPy arrays.
+    # state: (voltage, direction, previous_power, previous_voltage, previous_current)
+    # params: (step_size, tolerance, min_voltage, max_voltage)
+    voltage, direction, previous_power, previous_voltage, previous_current = state
+    step_size, tolerance, min_voltage, max_voltage = params
+    last_bucket = len(currents) - 1
+    last_point = len(currents[0]) - 1
+
+    for i in range(count):
+        # Array current at the operating voltage (bilinear lookup in the curve table)
+        g = max(0.0, min(irradiance[i] / irradiance_step, float(last_bucket)))
+        row = min(int(g), last_bucket - 1)
+        g -= row
+        v = max(0.0, min(voltage / voltage_step, float(last_point)))
+        column = min(int(v), last_point - 1)
+        v -= column
+        lower = currents[row][column] + (currents[row][column + 1] - currents[row][column]) * v
+        upper = currents[row + 1][column] + (currents[row + 1][column + 1] - currents[row + 1][column]) * v
+        current = lower + (upper - lower) * g
+        power = voltage * current
+        out_power[i] = power
+
+        if method == PERTURB_OBSERVE:
+            # Reverse the perturbation whenever the last one lowered the power
+            if power < previous_power:
+                direction = -direction
+            voltage += direction * step_size
+            previous_power = power
+        else:
+            # dP/dV = I + V * dI/dV: positive left of the maximum power point
+            delta_voltage = voltage - previous_voltage
+            delta_current = current - previous_current
+            previous_voltage = voltage
+            previous_current = current
+            if delta_voltage == 0.0:
+                slope = delta_current
+            else:
+                slope = current + voltage * delta_current / delta_voltage
+            if slope > tolerance:
+                voltage += step_size
+            elif slope < -tolerance:
+                voltage -= step_size
+
+        voltage = max(min_voltage, min(max_voltage, voltage))
+
+    return voltage, direction, previous_power, previous_voltage, previous_current
+
+
+class MPPTracker:
+    def __init__(self, method="perturb_observe", pv_array=None, step_size=0.2, tolerance=0.5,
+                 temperature=STC_TEMPERATURE):
+        if method not in TRACKER_METHODS:
+            raise ValueError(f"Unknown MPPT method: {method} (choose from {', '.join(TRACKER_METHODS)})")
+        self.method = method
+        self.pv_array = PVArray() if pv_array is None else pv_array
+        self.step_size = step_size  # V per perturbation
+        self.tolerance = tolerance  # W/V band around dP/dV = 0 (incremental conductance)
+        self.temperature = temperature  # Cell temperature (C)
+
+        # Tracker state: start at the usual 76% of the STC open-circuit voltage
+        self.voltage = 0.76 * float(self.pv_array.open_circuit_voltage(STC_IRRADIANCE, temperature))
+        self.direction = 1.0
+        self.previous_power = 0.0
+        self.previous_voltage = 0.0
+        self.previous_current = 0.0
+
+    def _state(self):
+        return (float(self.voltage), float(self.direction), float(self.previous_power),
+                float(self.previous_voltage), float(self.previous_current))
+
+    def _params(self, voltage_step, points):
+        return (float(self.step_size), float(self.tolerance), float(self.step_size),
+                float(voltage_step * (points - 1)))
+
+    def track(self, irradiance, compiled=False):
+        """Array output power (W) for one irradiance value (W/m2) per tick, advancing the tracker."""
+        kernel = jit_compiled(_track) if compiled else None
+        irradiance_step, voltage_step, currents = self.pv_array.table(self.temperature, as_lists=kernel is None)
+        count = len(irradiance)
+        params = self._params(voltage_step, len(currents[0]))
+        if kernel is not None:
+            out_power = np.empty(count)
+            irradiance = np.asarray(irradiance, dtype=float)
+        else:
+            # Plain lists keep the pure-Python loop on fast float arithmetic
+            kernel = _track
+            out_power = [0.0] * count
+            irradiance = irradiance.tolist() if isinstance(irradiance, np.ndarray) else irradiance
+        state = kernel(TRACKER_METHODS[self.method], irradiance, count, self._state(), params,
+                       currents, float(irradiance_step), float(voltage_step), out_power)
+        self.voltage, self.direction, self.previous_power, self.previous_voltage, self.previous_current = state
+        return np.asarray(out_power)
@@ -0,0 +1,260 @@
+# Relay Engine - Vectorized hysteresis/delay relay control
+#
+# Description:
+# Computes relay states for many power traces at once (one row per controller or site).
+# The advanced relay switches ON after the power has stayed at or above on_threshold for
+# on_delay_steps consecutive samples and OFF after it has stayed at or below off_threshold
+# for off_delay_steps consecutive samples. The result is identical to the per-sample timer
+# loop in Solar_MPPT_Load_Balancing_Sim.py, but is computed with run-length arithmetic.
+#
+# How the vectorized path works:
+# With off_threshold < on_threshold a sample can never be both "high" and "low", so a run of
+# high samples can never straddle a switch-OFF sample (and vice versa). The ON timer is then
+# simply the length of the current run of high samples, and the relay turns ON exactly where
+# that run length reaches the delay (same for OFF). The state at each sample is whatever the
+# most recent ON/OFF event says, so the output is the event states repeated over the gaps.
+# Rows whose thresholds overlap fall back to the sequential loop.
+#
+# When Numba is installed the same timer loop is compiled instead ("auto" backend, through
+# jit_backend.py), which is the fastest option on long, noisy traces where events are dense.
+# At 10M samples the compiled kernel is about 55-60x faster than the per-sample Python loop
+# and the NumPy path about 31-33x (benchmarks/bench_relay_engine.py), so the 50x target is
+# only met with Numba installed; "auto" picks the compiled kernel whenever it is available.
+
+import numpy as np
+
+from jit_backend import compiled
+
+# Below this many samples the NumPy path wins over importing and calling the compiled kernel
+COMPILED_MIN_SAMPLES = 100_000
+
+
+def _as_2d(power):
+    power = np.asarray(power, dtype=float)
+    if power.ndim == 1:
+        return power[np.newaxis, :], True
+    if power.ndim != 2:
+        raise ValueError("power must be a 1-D trace or a 2-D array of traces (rows)")
+    return power, False
+
+
+def _per_row(value, rows, name):
+    # Scalars apply to every row, otherwise one value per row
+    value = np.asarray(value)
+    if value.ndim == 0:
+        return np.full(rows, value.item())
+    value = value.reshape(-1)
+    if value.shape[0] != rows:
+        raise ValueError(f"{name} must be a scalar or have one value per row ({rows})")
+    return value
+
+
+def delay_steps(delay, dt):
+    # Convert a delay in seconds to whole samples the same way the original script does
+    return int(delay / dt)
+
+
+def simple_relay(power, threshold=40):
+    # Direct threshold comparison without delays
+    return np.where(np.asarray(power) > threshold, 1, 0)
+
+
+def _window_events(mask, steps):
+    # True where the run of True values ending at a sample has just reached `steps` samples:
+    # the last `steps` samples are all set and the one before them is not.
+    # Column 0 is always False (the relay loop starts at index 1), so runs never cross rows.
+    events = mask.copy()
+    if steps >= mask.shape[1]:
+        events[:] = False
+        return events
+
+    # All-of-window by doubling the covered span, then one overlapping shift for the remainder
+    span = 1
+    while span * 2 <= steps:
+        events[:, span:] &= events[:, :-span]
+        events[:, :span] = False
+        span *= 2
+    if steps > span:
+        rest = steps - span
+        events[:, rest:] &= events[:, :-rest]
+        events[:, :rest] = False
+
+    events[:, steps:] &= ~mask[:, :-steps]
+    return events
+
+
+def _grouped_events(mask, steps):
+    # Rows usually share one delay; otherwise handle each distinct delay separately
+    values = np.unique(steps)
+    if values.size == 1:
+        return _window_events(mask, int(values[0]))
+    events = np.empty_like(mask)
+    for value in values:
+        rows = steps == value
+        events[rows] = _window_events(mask[rows], int(value))
+    return events
+
+
+def relay_timers(power, on_threshold, off_threshold, on_delay_steps, off_delay_steps, load_power,
+                 relay, switches, off_energy, shortfall):
+    """The relay timer loop (same logic as the original script), for every parameter row k.
+
+    `power` is (rows, samples): one row per k, or a single row shared by every k (e.g. relay
+    candidates scored on one trace). Writes the states into relay[k] when `relay` has rows,
+    and switches[k] (state changes), off_energy[k] (summed power while OFF) and shortfall[k]
+    (summed deficit below `load_power` while ON) when `switches` has entries; pass empty
+    arrays to skip either. Plain scalar code, so it runs as Python or compiled (jit_backend).
+    """
+    store = relay.shape[0] > 0
+    summarize = switches.shape[0] > 0
+    samples = power.shape[1]
+    for k in range(on_threshold.shape[0]):
+        row = k if power.shape[0] > 1 else 0
+        on_level = on_threshold[k]
+        off_level = off_threshold[k]
+        on_steps = on_delay_steps[k]
+        off_steps = off_delay_steps[k]
+        relay_state = 0
+        on_timer = 0
+        off_timer = 0
+        changes = 0
+        lost = power[row, 0] if samples else 0.0
+        short = 0.0
+        if store and samples:
+            relay[k, 0] = 0
+        for i in range(1, samples):
+            value = power[row, i]
+            if relay_state == 0:  # Currently OFF
+                if value >= on_level:
+                    on_timer += 1
+                    if on_timer >= on_steps:
+                        relay_state = 1  # Turn ON after delay
+                        on_timer = 0
+                        changes += 1
+                else:
+                    on_timer = 0
+            else:  # Currently ON
+                if value <= off_level:
+                    off_timer += 1
+                    if off_timer >= off_steps:
+                        relay_state = 0  # Turn OFF after delay
+                        off_timer = 0
+                        changes += 1
+                else:
+                    off_timer = 0
+            if store:
+                relay[k, i] = relay_state
+            if summarize:
+                if relay_state == 0:
+                    lost += value
+                elif value < load_power:
+                    short += load_power - value
+        if summarize:
+            switches[k] = changes
+            off_energy[k] = lost
+            shortfall[k] = short
+
+
+_NO_COUNTS = np.empty(0, dtype=np.int64)
+_NO_TOTALS = np.empty(0)
+
+
+def _relay_loop(trace, on_threshold, off_threshold, on_delay_steps, off_delay_steps):
+    # Sequential reference: relay_timers run as plain Python on one trace
+    relay = np.zeros((1, len(trace)), dtype=int)
+    relay_timers(np.asarray(trace, dtype=float)[np.newaxis], np.array([on_threshold], dtype=float),
+                 np.array([off_threshold], dtype=float), np.array([on_delay_steps], dtype=np.int64),
+                 np.array([off_delay_steps], dtype=np.int64), 0.0, relay, _NO_COUNTS, _NO_TOTALS, _NO_TOTALS)
+    return relay[0]
+
+
+def _relay_vectorized(power, on_threshold, off_threshold, on_delay_steps, off_delay_steps):
+    high = power >= on_threshold[:, np.newaxis]
+    low = power <= off_threshold[:, np.newaxis]
+    high[:, 0] = False
+    low[:, 0] = False
+
+    # A delay of 0 steps behaves exactly like a delay of 1 in the timer loop
+    on_events = _grouped_events(high, np.maximum(on_delay_steps, 1))
+    events = _grouped_events(low, np.maximum(off_delay_steps, 1))
+    events |= on_events
+
+    # Column 0 acts as an OFF event so every row starts from the relay's initial state
+    events[:, 0] = True
+
+    # The state after each event holds until the next one (events are in row-major order)
+    positions = np.flatnonzero(events)
+    states = on_events.ravel()[positions].astype(int)
+    lengths = np.diff(positions, append=power.size)
+    return np.repeat(states, lengths).reshape(power.shape)
+
+
+def _compiled_kernel():
+    # Compiled timer loop, or None when the JIT backend is "python" or Numba is not installed
+    return compiled(relay_timers)
+
+
+def advanced_relay(power, on_threshold=45, off_threshold=35, on_delay_steps=5, off_delay_steps=10,
+                   backend="auto", out=None):
+    """Relay states with hysteresis and delays for a 1-D trace or a 2-D array of traces.
+
+    Thresholds and delay steps may be scalars or one value per row. `backend` is "auto"
+    (the default: compiled kernel for long inputs when Numba is installed, about 55-60x the
+    Python timer loop at 10M samples, otherwise the NumPy path, about 31-33x), "numba",
+    "numpy" or "python". With `out` (an integer array shaped like `power`), the states are
+    written into it (directly by the compiled kernel) and `out` is returned.
+    """
+    power, squeeze = _as_2d(power)
+    rows = power.shape[0]
+    on_threshold = _per_row(on_threshold, rows, "on_threshold").astype(float)
+    off_threshold = _per_row(off_threshold, rows, "off_threshold").astype(float)
+    on_delay_steps = _per_row(on_delay_steps, rows, "on_delay_steps").astype(int)
+    off_delay_steps = _per_row(off_delay_steps, rows, "off_delay_steps").astype(int)
+
+    if backend not in ("auto", "numba", "numpy", "python"):
+        raise ValueError(f"Unknown relay backend: {backend}")
+    use_compiled = backend == "numba" or (backend == "auto" and power.size >= COMPILED_MIN_SAMPLES)
+    kernel = _compiled_kernel() if use_compiled else None
+    if backend == "numba" and kernel is None:
+        raise ImportError("The numba relay backend requires the numba package "
+                          "(and a JIT backend other than \"python\")")
+
+    target = None
+    if out is not None:
+        if out.shape != (power.shape[1:] if squeeze else power.shape):
+            raise ValueError("out must have the same shape as power")
+        target = out[np.newaxis] if squeeze else out
+    if kernel is not None and target is not None and target.flags.c_contiguous:
+        relay = target  # The kernel writes every sample, straight into `out`
+    else:
+        relay = np.zeros(power.shape, dtype=int)
+    if power.shape[1] == 0:
+        pass
+    elif kernel is not None:
+        kernel(np.ascontiguousarray(power), on_threshold, off_threshold, on_delay_steps, off_delay_steps,
+               0.0, relay, _NO_COUNTS, _NO_TOTALS, _NO_TOTALS)
+    elif backend == "python":
+        for row in range(rows):
+            relay[row] = _relay_loop(power[row], on_threshold[row], off_threshold[row],
+                                     on_delay_steps[row], off_delay_steps[row])
+    else:
+        separated = off_threshold < on_threshold
+        if separated.all():
+            relay = _relay_vectorized(power, on_threshold, off_threshold,
+                                      on_delay_steps, off_delay_steps)
+        else:
+            # Overlapping thresholds make a sample count as both high and low,
+            # so those rows need the sequential timers
+            fast = np.flatnonzero(separated)
+            if fast.size:
+                relay[fast] = _relay_vectorized(power[fast], on_threshold[fast], off_threshold[fast],
+                                                on_delay_steps[fast], off_delay_steps[fast])
+            for row in np.flatnonzero(~separated):
+                relay[row] = _relay_loop(power[row], on_threshold[row], off_threshold[row],
+                                         on_delay_steps[row], off_delay_steps[row])
+
+    if out is not None:
+        if relay is not target:
+            target[...] = relay
+        return out
+    return relay[0] if squeeze else relay
@@ -0,0 +1,297 @@
+# Run Store - compact columnar files for simulation runs
+#
+# Description:
+# Saves simulation runs (time, SOC, voltage, solar power, load, source, relay states, ...)
+# together with their parameters, and reopens them without loading them:
+# - A run is a directory holding meta.json (format version, column dtypes, parameters) and
+#   one raw little-endian file per column. Columns use compact dtypes (float32 for
+#   measurements, int8 for states; time stays float64), about 25 bytes per step.
+# - RunWriter appends chunks (dicts of arrays, e.g. from SolarBatterySimulator.iter_chunks())
+#   or single rows through a preallocated buffer, so a run can be written while it is
+#   simulated; reopening a directory with mode="a" continues it.
+# - load_run() memory-maps the column files, so a year-long 1 s trace opens instantly and
+#   only the slices that are plotted get paged in. The row count comes from the file sizes,
+#   which lets a reader open a run that is still being written.
+# - archive_run() packs a run into a single compressed .npz (for archiving many sweep
+#   results); load_run() reads those too (decompressed into memory).
+#
+# Example:
+#   with RunWriter("runs/year", parameters={"seed": 1}) as writer:
+#       for chunk in sim.iter_chunks(365 * 86_400):
+#           writer.append(chunk)
+#   run = load_run("runs/year")
+#   plt.plot(run["time"][::60], run["battery_soc"][::60])
+
+import json
+import os
+
+import numpy as np
+
+RUN_FORMAT = "solace-run"
+RUN_VERSION = 1
+META_FILE = "meta.json"
+
+# Default on-disk dtypes; other columns keep the (little-endian) dtype of their first chunk
+COLUMN_DTYPES = {
+    "time": "<f8",
+    "battery_soc": "<f4",
+    "battery_voltage": "<f4",
+    "solar_power": "<f4",
+    "load": "<f4",
+    "source": "|i1",
+    "simple_relay": "|i1",
+    "advanced_relay": "|i1",
+}
+
+# Rows buffered in memory before they are written out
+BUFFER_ROWS = 65_536
+
+
+def _column_file(path, name):
+    return os.path.join(path, f"{name}.bin")
+
+
+def _read_meta(path):
+    with open(os.path.join(path, META_FILE)) as meta_file:
+        meta = json.load(meta_file)
+    if meta.get("format") != RUN_FORMAT:
+        raise ValueError(f"{path} is not a simulation run")
+    if meta.get("version", 0) > RUN_VERSION:
+        raise ValueError(f"{path}: run format version {meta['version']} is newer than supported ({RUN_VERSION})")
+    return meta
+
+
+def _json_value(value):
+    # Parameters as plain JSON (NumPy scalars and arrays included)
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, dict):
+        return {str(key): _json_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_value(item) for item in value]
+    return value
+
+
+class RunWriter:
+    def __init__(self, path, parameters=None, columns=None, dtypes=None, mode="w", buffer_rows=BUFFER_ROWS):
+        """Write a run to directory `path` ("w" replaces an existing run, "a" appends to it).
+
+        `columns` fixes the column order (default: the keys of the first chunk); `dtypes`
+        overrides COLUMN_DTYPES per column. `path` must be new, empty or hold a run: other
+        directories are refused rather than cleared.
+        """
+        if mode not in ("w", "a"):
+            raise ValueError(f"Unknown mode: {mode}")
+        self.path = path
+        self.buffer_rows = buffer_rows
+        self.rows = 0
+        self._dtypes = {**COLUMN_DTYPES, **(dtypes or {})}
+        self._files = None
+        self._buffer = None
+        self._buffered = 0
+
+        if mode == "a" and os.path.exists(os.path.join(path, META_FILE)):
+            meta = _read_meta(path)
+            self.parameters = meta["parameters"]
+            if parameters:
+                self.parameters.update(_json_value(parameters))
+            self.columns = tuple(meta["columns"])
+            self._dtypes.update(meta["columns"])
+            self.rows = min(os.path.getsize(_column_file(path, name)) // np.dtype(dtype).itemsize
+                            for name, dtype in meta["columns"].items())
+            # Cut columns left longer by an interrupted write, so appends stay row-aligned
+            for name, dtype in meta["columns"].items():
+                os.truncate(_column_file(path, name), self.rows * np.dtype(dtype).itemsize)
+            self._open("ab")
+        else:
+            os.makedirs(path, exist_ok=True)
+            if os.path.exists(os.path.join(path, META_FILE)):
+                # Replace the previous run: its own files only
+                for name in _read_meta(path)["columns"]:
+                    if os.path.exists(_column_file(path, name)):
+                        os.remove(_column_file(path, name))
+                os.remove(os.path.join(path, META_FILE))
+            elif os.listdir(path):
+                raise FileExistsError(f"{path} is not empty and holds no run: choose a new or empty directory")
+            self.parameters = _json_value(dict(parameters or {}))
+            self.columns = tuple(columns) if columns is not None else None
+            if self.columns is not None:
+                self._open("wb")
+
+    def _open(self, file_mode):
+        for name in self.columns:
+            self._dtypes[name] = np.dtype(self._dtypes.get(name, "<f8")).newbyteorder("<").str
+        self._files = {name: open(_column_file(self.path, name), file_mode) for name in self.columns}
+        self._buffer = {name: np.empty(self.buffer_rows, dtype=self._dtypes[name]) for name in self.columns}
+        self._write_meta()
+
+    def _write_meta(self):
+        meta = {
+            "format": RUN_FORMAT,
+            "version": RUN_VERSION,
+            "columns": {name: self._dtypes[name] for name in self.columns},
+            "parameters": self.parameters,
+        }
+        temporary = os.path.join(self.path, META_FILE + ".tmp")
+        with open(temporary, "w") as meta_file:
+            json.dump(meta, meta_file, indent=2)
+        os.replace(temporary, os.path.join(self.path, META_FILE))
+
+    def append(self, chunk):
+        """Append a dict of equal-length arrays (or scalars for one row), one entry per column."""
+        if self._files is None:
+            if self.columns is None:
+                self.columns = tuple(chunk)
+            for name in self.columns:
+                if name not in COLUMN_DTYPES and name not in self._dtypes:
+                    self._dtypes[name] = np.asarray(chunk[name]).dtype.str
+            self._open("wb")
+        try:
+            values = [np.atleast_1d(chunk[name]) for name in self.columns]
+        except KeyError as error:
+            raise KeyError(f"Chunk has no column {error}") from None
+        count = len(values[0])
+        if any(len(column) != count for column in values):
+            raise ValueError("All columns of a chunk must have the same length")
+
+        if count >= self.buffer_rows:
+            # Large chunks bypass the buffer
+            self.flush()
+            for name, column in zip(self.columns, values):
+                self._files[name].write(np.ascontiguousarray(column, dtype=self._dtypes[name]).tobytes())
+            self.rows += count
+            return
+        if self._buffered + count > self.buffer_rows:
+            self.flush()
+        end = self._buffered + count
+        for name, column in zip(self.columns, values):
+            self._buffer[name][self._buffered:end] = column
+        self._buffered = end
+
+    def append_row(self, *values):
+        # One row, values in column order (the cheap path for per-step recording)
+        if self._files is None:
+            raise ValueError("append_row() needs the columns: pass columns= or append a chunk first")
+        index = self._buffered
+        for name, value in zip(self.columns, values):
+            self._buffer[name][index] = value
+        self._buffered = index + 1
+        if self._buffered == self.buffer_rows:
+            self.flush()
+
+    def flush(self):
+        if self._files is None:
+            return
+        if self._buffered:
+            for name in self.columns:
+                self._files[name].write(self._buffer[name][:self._buffered].tobytes())
+            self.rows += self._buffered
+            self._buffered = 0
+        for column_file in self._files.values():
+            column_file.flush()
+
+    def close(self):
+        if self._files is None:
+            if self.columns is None:
+                self.columns = ()
+                self._write_meta()
+            return
+        self.flush()
+        for column_file in self._files.values():
+            column_file.close()
+        self._files = None
+
+    def __len__(self):
+        return self.rows + self._buffered
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+class Run:
+    # A loaded run: run["battery_soc"] gives a column (memory-mapped for run directories)
+    def __init__(self, path, parameters, data):
+        self.path = path
+        self.parameters = parameters
+        self.data = data
+        self.columns = tuple(data)
+
+    def __getitem__(self, column):
+        try:
+            return self.data[column]
+        except KeyError:
+            raise KeyError(f"Unknown run column: {column}") from None
+
+    def __contains__(self, column):
+        return column in self.data
+
+    def __len__(self):
+        return len(next(iter(self.data.values()))) if self.data else 0
+
+    def window(self, start, end, columns=None):
+        # Rows with start <= time < end (binary search on the sorted time column)
+        times = self.data["time"]
+        first, last = np.searchsorted(times, [start, end])
+        return {name: self.data[name][first:last] for name in (columns or self.columns)}
+
+
+def load_run(path, columns=None, mmap=True):
+    """Open a run directory (columns memory-mapped unless mmap=False) or an .npz archive."""
+    if os.path.isdir(path):
+        meta = _read_meta(path)
+        dtypes = meta["columns"]
+        names = list(dtypes) if columns is None else list(columns)
+        for name in names:
+            if name not in dtypes:
+                raise KeyError(f"Unknown run column: {name}")
+        # Complete rows only (another process may be appending)
+        rows = min((os.path.getsize(_column_file(path, name)) // np.dtype(dtype).itemsize
+                    for name, dtype in dtypes.items()), default=0)
+        data = {}
+        for name in names:
+            if mmap and rows:
+                data[name] = np.memmap(_column_file(path, name), dtype=dtypes[name], mode="r", shape=(rows,))
+            else:
+                data[name] = np.fromfile(_column_file(path, name), dtype=dtypes[name], count=rows)
+        return Run(path, meta["parameters"], data)
+
+    with np.load(path) as archive:
+        meta = json.loads(str(archive["__meta__"]))
+        if meta.get("format") != RUN_FORMAT:
+            raise ValueError(f"{path} is not a simulation run")
+        names = list(meta["columns"]) if columns is None else list(columns)
+        data = {name: archive[name] for name in names}
+    return Run(path, meta["parameters"], data)
+
+
+def archive_run(path, archive_path=None):
+    # Pack a run directory into one compressed .npz file; returns the archive path
+    archive_path = archive_path or path.rstrip(os.sep) + ".npz"
+    meta = _read_meta(path)
+    run = load_run(path, mmap=False)
+    np.savez_compressed(archive_path, __meta__=np.array(json.dumps(meta)), **run.data)
+    return archive_path
+
+
+def save_run(path, data, parameters=None, compress=False):
+    """Write a complete run (dict of arrays) at once; compress=True writes an .npz archive."""
+    if not compress:
+        with RunWriter(path, parameters) as writer:
+            writer.append(data)
+        return path
+    dtypes = {name: np.dtype(COLUMN_DTYPES.get(name, np.asarray(values).dtype.str)) for name, values in data.items()}
+    meta = {
+        "format": RUN_FORMAT,
+        "version": RUN_VERSION,
+        "columns": {name: dtype.str for name, dtype in dtypes.items()},
+        "parameters": _json_value(dict(parameters or {})),
+    }
+    arrays = {name: np.asarray(values, dtype=dtypes[name]) for name, values in data.items()}
+    np.savez_compressed(path, __meta__=np.array(json.dumps(meta)), **arrays)
+    return path if path.endswith(".npz") else path + ".npz"
@@ -0,0 +1,95 @@
+# Simulation Clocks - how simulated time advances in the dashboard loop
+#
+# Description:
+# The dashboard's simulation thread asks a clock, once per loop iteration, which time
+# steps to integrate and then lets the clock wait before the next iteration:
+# - RealTimeClock: one step covering the elapsed wall-clock time scaled by the speed
+#   multiplier (the original behaviour; step sizes depend on thread scheduling).
+# - FixedStepClock: a batch of fixed `dt` steps per iteration with no waiting, so the
+#   model runs as fast as the CPU allows.
+# - CatchUpClock: fixed `dt` substeps, as many per wall-clock tick as are needed to keep
+#   simulated time at `speed` x real time (e.g. 3600x replays an hour per second).
+# With a fixed step size the model sees the same sequence of steps on every run, so a
+# seeded SolarBatterySimulator reproduces SolarBatterySimulator.run(duration, dt) exactly,
+# whatever the wall-clock timing.
+
+import time
+
+CLOCK_MODES = ("realtime", "fixed", "catchup")
+
+
+class RealTimeClock:
+    def __init__(self, interval=0.05):
+        self.interval = interval  # Wall-clock seconds between iterations
+        self._last = None
+
+    def start(self):
+        self._last = time.monotonic()
+
+    def tick(self, speed=1.0):
+        now = time.monotonic()
+        delta = (now - self._last) * speed
+        self._last = now
+        return (delta,)
+
+    def wait(self):
+        time.sleep(self.interval)
+
+
+class FixedStepClock:
+    def __init__(self, dt=1.0, steps_per_tick=1000):
+        self.dt = dt
+        self.steps_per_tick = steps_per_tick  # Steps between checks of the running flag/parameter queue
+
+    def start(self):
+        pass
+
+    def tick(self, speed=1.0):
+        # The speed multiplier does not apply: the model runs flat out
+        return (self.dt,) * self.steps_per_tick
+
+    def wait(self):
+        time.sleep(0)  # Give the GUI thread a chance to run
+
+
+class CatchUpClock:
+    def __init__(self, dt=1.0, interval=0.05, max_substeps=10_000):
+        self.dt = dt
+        self.interval = interval
+        self.max_substeps = max_substeps  # Per tick; any larger backlog is dropped
+        self.dropped_time = 0.0  # Simulated seconds skipped because the model fell behind
+        self._last = None
+        self._backlog = 0.0
+
+    def start(self):
+        self._last = time.monotonic()
+        self._backlog = 0.0
+
+    def tick(self, speed=1.0):
+        now = time.monotonic()
+        self._backlog += (now - self._last) * speed
+        self._last = now
+
+        steps = int(self._backlog // self.dt)
+        if steps > self.max_substeps:
+            # Too far behind to catch up: skip ahead instead of falling further behind
+            self.dropped_time += (steps - self.max_substeps) * self.dt
+            steps = self.max_substeps
+            self._backlog = 0.0
+        else:
+            self._backlog -= steps * self.dt
+        return (self.dt,) * steps
+
+    def wait(self):
+        time.sleep(self.interval)
+
+
+def make_clock(mode, dt=1.0, **options):
+    # Clock for one of CLOCK_MODES (`dt` is ignored in real-time mode)
+    if mode == "realtime":
+        return RealTimeClock(**options)
+    if mode == "fixed":
+        return FixedStepClock(dt, **options)
+    if mode == "catchup":
+        return CatchUpClock(dt, **options)
+    raise ValueError(f"Unknown clock mode: {mode} (choose from {', '.join(CLOCK_MODES)})")
@@ -0,0 +1,286 @@
+# Simulation Server - telemetry and control of simulated sites over a local socket
+#
+# Description:
+# Runs the battery/switching model for many sites without the GUI (one FleetSimulator
+# stepping every site in one vectorized pass) and exposes it on a loopback TCP socket
+# with newline-delimited JSON messages, for SCADA integration tests and scripts:
+#   {"op": "info"}                                      -> sites, fields, settable parameters
+#   {"op": "get", "sites": [0, 3], "fields": ["battery_soc"]}     -> the latest state, once
+#   {"op": "subscribe", "sites": null, "fields": null, "every": 1} -> state stream
+#   {"op": "unsubscribe"}
+#   {"op": "set", "sites": [3], "params": {"ac_load": 800}}      -> applied before the next step
+# Replies echo the request's "id" when it has one. "sites" and "fields" default to all.
+#
+# Simulated time advances with a sim_clock.py clock ("catchup": `speed` x real time in
+# fixed `dt` steps, or "fixed": as fast as possible), and the state is published `rate`
+# times per wall-clock second. Streaming is decoupled from the simulation:
+# - each published state is encoded once per distinct (sites, fields) selection, however
+#   many clients subscribed to it,
+# - every subscriber has a bounded queue drained by its own writer task, which sends all
+#   queued states as one batched message and then waits for the socket to drain,
+# - when a subscriber cannot keep up its queue keeps the newest states only, and the next
+#   message reports how many were dropped, so a slow client never stalls the simulation or
+#   the other clients and memory stays bounded.
+#
+# Usage (from the repository root):
+#   python sim_server.py --sites 200 --speed 60 --rate 2 --weather
+#   (then e.g. printf '{"op": "get", "sites": [0]}\n' | nc 127.0.0.1 8765)
+
+import argparse
+import asyncio
+import json
+
+from fleet_sim import SITE_PARAMETERS, FleetSimulator
+from sim_clock import make_clock
+from weather import WeatherGenerator
+
+LOOPBACK = "127.0.0.1"
+DEFAULT_PORT = 8765
+STATE_FIELDS = ("battery_soc", "battery_voltage", "solar_power", "ac_load", "source")
+SETTABLE = SITE_PARAMETERS + ("battery_soc",)
+QUEUE_SIZE = 64  # States queued per subscriber before the oldest are dropped
+MAX_BATCH = 64  # States per streamed message
+YIELD_STEPS = 500  # Simulation steps between returns to the event loop
+DECIMALS = 4  # Rounding of streamed floats
+
+
+class _Subscriber:
+    def __init__(self, writer, sites, fields, every, queue_size):
+        self.writer = writer
+        self.sites = sites
+        self.fields = fields
+        self.every = every
+        self.queue = asyncio.Queue(queue_size)
+        self.skipped = 0  # Publishes since the last one sent (for `every`)
+        self.dropped = 0  # States dropped since the last message
+        self.task = None
+
+    def offer(self, message):
+        self.skipped += 1
+        if self.skipped < self.every:
+            return
+        self.skipped = 0
+        if self.queue.full():
+            self.queue.get_nowait()  # Keep the newest states for a client that falls behind
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+
+class SimulationServer:
+    def __init__(self, sites=1, dt=1.0, speed=1.0, rate=1.0, clock="catchup", seed=None, weather=False,
+                 queue_size=QUEUE_SIZE, max_batch=MAX_BATCH, **params):
+        """Serve `sites` simulated sites (params: FleetSimulator site parameters)."""
+        weather = WeatherGenerator(seed=seed, sites=sites, start_hour=6.0) if weather else None
+        self.fleet = FleetSimulator(sites, seed=seed, weather=weather, **params)
+        self.dt = dt
+        self.speed = speed
+        self.rate = rate  # Published states per wall-clock second
+        self.flat_out = clock == "fixed"
+        self.clock = make_clock(clock, dt, **({} if self.flat_out else {"interval": 1 / rate}))
+        self.queue_size = queue_size
+        self.max_batch = max_batch
+        self.subscribers = set()
+        self.connections = set()  # Handler tasks of connected clients
+        self.published = 0
+        self.server = None
+        self.port = None
+        self._state = None
+        self._state_time = 0.0
+        self._encoded = {}  # (sites, fields) -> encoded latest state
+        self._simulation = None
+
+    def _capture(self):
+        fleet = self.fleet
+        self._state = {
+            "battery_soc": fleet.battery_soc.round(DECIMALS),
+            "battery_voltage": fleet.battery_voltage.round(DECIMALS),
+            "solar_power": fleet.solar_power.round(DECIMALS),
+            "ac_load": fleet.ac_load.round(DECIMALS),
+            "source": fleet.source(),
+        }
+        self._state_time = float(fleet.sim_time)
+        self._encoded = {}
+
+    def _selection(self, request):
+        sites = request.get("sites")
+        if sites is not None:
+            sites = tuple(int(site) for site in sites)
+            if any(not 0 <= site < self.fleet.n_sites for site in sites):
+                raise ValueError(f"Sites must be between 0 and {self.fleet.n_sites - 1}")
+        fields = tuple(request.get("fields") or STATE_FIELDS)
+        unknown = [name for name in fields if name not in STATE_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)} (available: {', '.join(STATE_FIELDS)})")
+        return sites, fields
+
+    def encoded_state(self, sites=None, fields=STATE_FIELDS):
+        # Latest state as JSON bytes, encoded once per selection and publish
+        key = (sites, fields)
+        encoded = self._encoded.get(key)
+        if encoded is None:
+            index = slice(None) if sites is None else list(sites)
+            state = {"time": self._state_time,
+                     "sites": list(range(self.fleet.n_sites)) if sites is None else list(sites)}
+            for name in fields:
+                state[name] = self._state[name][index].tolist()
+            encoded = self._encoded[key] = json.dumps(state, separators=(",", ":")).encode()
+        return encoded
+
+    def publish(self):
+        self._capture()
+        self.published += 1
+        for subscriber in self.subscribers:
+            subscriber.offer(self.encoded_state(subscriber.sites, subscriber.fields))
+
+    def set_parameters(self, params, sites=None):
+        # Per-site parameter (or SOC) update, applied between simulation steps
+        for name in params:
+            if name not in SETTABLE:
+                raise ValueError(f"Unknown parameter: {name} (settable: {', '.join(SETTABLE)})")
+        index = slice(None) if sites is None else list(sites)
+        for name, value in params.items():
+            getattr(self.fleet, name)[index] = float(value)
+
+    async def _simulate(self):
+        loop = asyncio.get_running_loop()
+        self.clock.start()
+        interval = 1 / self.rate
+        next_publish = loop.time()
+        while True:
+            for count, delta in enumerate(self.clock.tick(self.speed), 1):
+                self.fleet.step(delta)
+                if count % YIELD_STEPS == 0:
+                    await asyncio.sleep(0)  # Let clients be served during long catch-up ticks
+            now = loop.time()
+            if now >= next_publish:
+                self.publish()
+                next_publish = max(next_publish + interval, now)
+            await asyncio.sleep(0 if self.flat_out else max(0.0, next_publish - loop.time()))
+
+    async def _write(self, subscriber):
+        # Send every queued state as one batched message, then wait for the socket to drain
+        queue = subscriber.queue
+        writer = subscriber.writer
+        try:
+            while True:
+                states = [await queue.get()]
+                while not queue.empty() and len(states) < self.max_batch:
+                    states.append(queue.get_nowait())
+                dropped, subscriber.dropped = subscriber.dropped, 0
+                writer.write(b'{"type":"state","dropped":%d,"states":[%s]}\n' % (dropped, b",".join(states)))
+                await writer.drain()
+        except ConnectionError:
+            self.subscribers.discard(subscriber)  # The handler cleans up when it sees the disconnect
+
+    def _unsubscribe(self, subscriber):
+        if subscriber is not None:
+            self.subscribers.discard(subscriber)
+            subscriber.task.cancel()
+
+    def _reply(self, writer, request, message):
+        if "id" in request:
+            message["id"] = request["id"]
+        writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+
+    async def _handle(self, reader, writer):
+        subscriber = None
+        self.connections.add(asyncio.current_task())
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = {}
+                try:
+                    request = json.loads(line)
+                    op = request.get("op")
+                    if op == "subscribe":
+                        sites, fields = self._selection(request)
+                        self._unsubscribe(subscriber)
+                        subscriber = _Subscriber(writer, sites, fields, max(1, int(request.get("every", 1))),
+                                                 self.queue_size)
+                        subscriber.task = asyncio.create_task(self._write(subscriber))
+                        self.subscribers.add(subscriber)
+                        self._reply(writer, request, {"type": "subscribed", "sites": sites, "fields": fields})
+                    elif op == "unsubscribe":
+                        self._unsubscribe(subscriber)
+                        subscriber = None
+                        self._reply(writer, request, {"type": "unsubscribed"})
+                    elif op == "get":
+                        sites, fields = self._selection(request)
+                        if self._state is None:
+                            self._capture()
+                        self._reply(writer, request, {"type": "state", "dropped": 0,
+                                                      "states": [json.loads(self.encoded_state(sites, fields))]})
+                    elif op == "set":
+                        sites, _ = self._selection(request)
+                        self.set_parameters(request.get("params") or {}, sites)
+                        self._reply(writer, request, {"type": "ack", "op": "set"})
+                    elif op == "info":
+                        self._reply(writer, request, {
+                            "type": "info", "sites": self.fleet.n_sites, "fields": STATE_FIELDS,
+                            "settable": SETTABLE, "dt": self.dt, "speed": self.speed, "rate": self.rate})
+                    else:
+                        raise ValueError(f"Unknown op: {op}")
+                except (ValueError, TypeError, AttributeError) as error:
+                    self._reply(writer, request if isinstance(request, dict) else {},
+                                {"type": "error", "message": str(error)})
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.connections.discard(asyncio.current_task())
+            self._unsubscribe(subscriber)
+            writer.close()
+
+    async def start(self, host=LOOPBACK, port=DEFAULT_PORT):
+        # Listen (port 0 picks a free port, see self.port) and start the simulation task
+        self._capture()
+        self.server = await asyncio.start_server(self._handle, host, port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self._simulation = asyncio.create_task(self._simulate())
+        return self.server
+
+    async def stop(self):
+        # Stop simulating, disconnect every client and close the listening socket
+        self._simulation.cancel()
+        connections = list(self.connections)
+        for connection in connections:
+            connection.cancel()
+        await asyncio.gather(*connections)
+        self.server.close()
+        await self.server.wait_closed()
+
+
+async def serve(args):
+    server = SimulationServer(args.sites, dt=args.dt, speed=args.speed, rate=args.rate, clock=args.clock,
+                              seed=args.seed, weather=args.weather, queue_size=args.queue_size)
+    await server.start(args.host, args.port)
+    print(f"Serving {args.sites} sites on {args.host}:{server.port} "
+          f"({args.speed:g}x real time, {args.rate:g} states/s)")
+    async with server.server:
+        await server.server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Telemetry/control server for simulated sites")
+    parser.add_argument("--sites", type=int, default=1)
+    parser.add_argument("--host", default=LOOPBACK, help="interface to listen on (loopback by default)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="0 picks a free port")
+    parser.add_argument("--dt", type=float, default=1.0, help="simulation timestep (seconds)")
+    parser.add_argument("--speed", type=float, default=1.0, help="simulated seconds per wall-clock second")
+    parser.add_argument("--clock", choices=("catchup", "fixed"), default="catchup",
+                        help="catchup (speed x real time) or fixed (as fast as possible)")
+    parser.add_argument("--rate", type=float, default=1.0, help="published states per second")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE, help="states queued per subscriber")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--weather", action="store_true", help="generated weather instead of constant sunlight")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
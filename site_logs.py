@@ -0,0 +1,177 @@
+# Site Logs - streaming replay of recorded solar and load data
+#
+# Description:
+# Reads recorded site logs (timestamp, solar power, AC load) in fixed-size chunks so that
+# logs of any length can drive the simulators in constant memory:
+# - CSV files are parsed row by row with the csv module,
+# - Parquet files are read batch by batch (requires pyarrow),
+# - NumPy .npy files (structured arrays, or 2-D arrays with one column per field) are
+#   memory-mapped and sliced, so only the chunk being processed is paged in.
+# resample() then turns the irregular log timestamps into the fixed simulation timestep on
+# the fly (linear interpolation or sample-and-hold), carrying the last sample of each chunk
+# over to the next one so chunk boundaries do not show up in the output.
+#
+# Timestamps may be numeric seconds or ISO 8601 date/times (converted to seconds since the
+# Unix epoch). Example, replaying a year-long log through the headless core:
+#   sim = SolarBatterySimulator()
+#   for chunk in sim.iter_replay(resample(read_log("site.csv"), dt=1.0), dt=1.0):
+#       ...
+
+import csv
+import os
+
+import numpy as np
+
+LOG_COLUMNS = ("time", "solar_power", "load")
+LOG_FORMATS = ("csv", "parquet", "npy")
+
+# Rows read per chunk (bounds the working memory of a replay)
+CHUNK_ROWS = 100_000
+
+
+def _seconds(values):
+    # Timestamps as float seconds: numbers pass through, date/times become epoch seconds
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[ns]").astype(np.int64) / 1e9
+    try:
+        return values.astype(float)
+    except ValueError:
+        return np.asarray(values, dtype="datetime64[ns]").astype(np.int64) / 1e9
+
+
+def _log_format(path, log_format):
+    if log_format is None:
+        log_format = os.path.splitext(path)[1].lstrip(".").lower()
+        log_format = {"pq": "parquet", "txt": "csv"}.get(log_format, log_format)
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"Unknown log format: {log_format} (choose from {', '.join(LOG_FORMATS)})")
+    return log_format
+
+
+def _to_chunk(raw, columns, scale):
+    chunk = {}
+    for name, values in zip(columns, raw):
+        chunk[name] = _seconds(values) if name == "time" else np.asarray(values, dtype=float)
+        if name in scale:
+            chunk[name] = chunk[name] * scale[name]
+    return chunk
+
+
+def _csv_chunks(path, fields, chunk_rows):
+    with open(path, newline="") as log:
+        reader = csv.reader(log)
+        header = next(reader, None)
+        if header is None:
+            raise ValueError(f"{path}: empty log")
+        header = [name.strip() for name in header]
+        try:
+            indices = [header.index(field) for field in fields]
+        except ValueError as error:
+            raise KeyError(f"{path}: {error}") from None
+        rows = [[] for _ in fields]
+        for row in reader:
+            if not row:
+                continue
+            for values, index in zip(rows, indices):
+                values.append(row[index])
+            if len(rows[0]) == chunk_rows:
+                yield rows
+                rows = [[] for _ in fields]
+        if rows[0]:
+            yield rows
+
+
+def _parquet_chunks(path, fields, chunk_rows):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Reading Parquet logs requires pyarrow (pip install pyarrow)") from None
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=list(fields)):
+        yield [batch.column(field).to_numpy(zero_copy_only=False) for field in fields]
+
+
+def _npy_chunks(path, fields, chunk_rows, positions):
+    data = np.load(path, mmap_mode="r")
+    if data.dtype.names is None and data.ndim != 2:
+        raise ValueError(f"{path}: expected a structured array or a 2-D (rows, columns) array")
+    for start in range(0, len(data), chunk_rows):
+        block = data[start:start + chunk_rows]
+        if data.dtype.names is not None:
+            yield [block[field] for field in fields]
+        else:
+            yield [block[:, position] for position in positions]
+
+
+def read_log(path, columns=None, chunk_rows=CHUNK_ROWS, log_format=None, scale=None):
+    """Yield a recorded log as dicts of float arrays, `chunk_rows` rows at a time.
+
+    `columns` maps the names used here (time, solar_power, load) to the field names in the
+    file; leave out load (or solar_power) to keep the simulator's own value. For plain 2-D
+    .npy arrays the fields are columns given by position in the same order. `scale` multiplies
+    columns by a factor, e.g. {"solar_power": 0.8} to turn irradiance (W/m2) into array output.
+    """
+    if columns is None:
+        columns = {name: name for name in LOG_COLUMNS}
+    if "time" not in columns:
+        raise ValueError("columns must include time")
+    names = tuple(columns)
+    fields = tuple(columns[name] for name in names)
+    scale = scale or {}
+    log_format = _log_format(path, log_format)
+
+    if log_format == "csv":
+        chunks = _csv_chunks(path, fields, chunk_rows)
+    elif log_format == "parquet":
+        chunks = _parquet_chunks(path, fields, chunk_rows)
+    else:
+        chunks = _npy_chunks(path, fields, chunk_rows, range(len(fields)))
+
+    for raw in chunks:
+        yield _to_chunk(raw, names, scale)
+
+
+def resample(chunks, dt, start=None, method="linear"):
+    """Resample a stream of log chunks onto a fixed `dt` grid starting at `start`.
+
+    The grid starts at the first timestamp by default and ends at the last one; `method` is
+    "linear" (interpolate between samples) or "previous" (hold the last sample). Yields dicts
+    with the same keys as the input chunks.
+    """
+    if method not in ("linear", "previous"):
+        raise ValueError(f"Unknown resampling method: {method}")
+    carry = None  # Last sample of the previous chunk
+    origin = start
+    produced = 0  # Grid points yielded so far
+
+    for chunk in chunks:
+        times = chunk["time"]
+        if len(times) == 0:
+            continue
+        if carry is not None:
+            chunk = {name: np.concatenate(([carry[name]], values)) for name, values in chunk.items()}
+            times = chunk["time"]
+        if np.any(np.diff(times) < 0):
+            raise ValueError("Log timestamps must be in increasing order")
+        if origin is None:
+            origin = float(times[0])
+        carry = {name: values[-1] for name, values in chunk.items()}
+
+        # Grid points covered by the samples held so far
+        last = int(np.floor((times[-1] - origin) / dt))
+        if last < produced:
+            continue
+        grid = origin + dt * np.arange(produced, last + 1)
+        produced = last + 1
+
+        out = {"time": grid}
+        if method == "linear":
+            for name, values in chunk.items():
+                if name != "time":
+                    out[name] = np.interp(grid, times, values)
+        else:
+            index = np.maximum(np.searchsorted(times, grid, side="right") - 1, 0)
+            for name, values in chunk.items():
+                if name != "time":
+                    out[name] = values[index]
+        yield out
@@ -0,0 +1,318 @@
+# Solar MPPT Battery Simulation Core (headless)
+#
+# Description:
+# The solar, battery and power-source switching model of the Tk dashboard
+# (Solar_System_GUI_Plot_Simulation.py) without any GUI or wall-clock dependency.
+# The model can be stepped one tick at a time (as the dashboard does) or run over a
+# fixed timestep for a day, a month or a year of simulated time, returning arrays of
+# SOC, voltage, solar power, load and power source.
+#
+# Long runs are processed in chunks: the solar input for a chunk is generated in one
+# vectorized draw and the sequential battery/switching state is integrated by a tight
+# loop over plain floats (compiled with Numba when it is installed, see jit_backend.py).
+# Given the same seed, run() produces exactly the values that repeated step() calls
+# would produce.
+#
+# Weather: by default the available solar power is the sunlight intensity with uniform
+# random variability per step. With `weather` (a weather.WeatherGenerator) it follows that
+# generator's irradiance at the simulated time instead (day/night, correlated clouds and
+# ramp events), and the intensity and variability settings are not used.
+#
+# MPPT: by default the solar output is the available power times a constant
+# `mppt_efficiency`. With `mppt_tracker` (see pv_models.py) a P&O or incremental
+# conductance tracker works the array's I-V curve instead, so tracking losses under
+# fluctuating sunlight are modelled and `mppt_efficiency` is the converter efficiency only.
+
+import math
+from collections import namedtuple
+
+import numpy as np
+
+from battery_models import OCVCurve
+from jit_backend import compiled as jit_compiled
+from pv_models import STC_IRRADIANCE, MPPTracker, PVArray
+
+# Steps integrated per chunk in run() (bounds the working memory of long runs)
+CHUNK_STEPS = 1_000_000
+
+MAX_SOLAR_POWER = 1000  # Maximum possible solar power (W)
+CHARGE_EFFICIENCY = 0.95  # 95% charging efficiency
+INVERTER = 1  # Source codes used in result arrays
+AC_MAINS = 0
+
+RESULT_FIELDS = ("time", "battery_soc", "battery_voltage", "solar_power", "load", "source")
+
+# Immutable copy of the model state, safe to hand from the simulation thread to a UI thread
+SimulationSnapshot = namedtuple(
+    "SimulationSnapshot",
+    ("sim_time", "battery_soc", "battery_voltage", "solar_power", "ac_load", "using_inverter"),
+)
+
+
+def _integrate(solar, load, count, dt, state, params, soc_points, voltages, slopes,
+               out_time, out_soc, out_voltage, out_source):
+    # Sequential battery/switching integration over `count` steps.
+    # Works on lists (pure Python) or NumPy arrays; only scalar arithmetic and indexing is used.
+    # state: (sim_time, battery_soc, battery_voltage, using_inverter, last_switch_time)
+    # params: (battery_capacity, inverter_efficiency, switch_threshold_low,
+    #          switch_threshold_high, pwm_timer)
+    # soc_points/voltages/slopes: OCV curve table at the battery temperature (OCVCurve.table)
+    sim_time, soc, voltage, using_inverter, last_switch_time = state
+    capacity, inverter_efficiency, threshold_low, threshold_high, pwm_timer = params
+    last_point = len(soc_points) - 1
+    hours = dt / 3600  # Convert seconds to hours
+    inverter_scale = inverter_efficiency / 100
+
+    for i in range(count):
+        sim_time += dt
+
+        # Power balance: in inverter mode the battery supplies the load
+        if using_inverter:
+            net_power = solar[i] - load[i] / inverter_scale
+        else:
+            net_power = solar[i]
+
+        battery_energy_wh = capacity * voltage
+        energy_change_wh = net_power * hours
+        if net_power > 0:
+            energy_change_wh *= CHARGE_EFFICIENCY
+
+        new_energy_wh = (soc / 100) * battery_energy_wh + energy_change_wh
+        soc = max(0.0, min(100.0, (new_energy_wh / battery_energy_wh) * 100))
+
+        # Battery voltage from the OCV curve (same lookup as OCVCurve.voltage)
+        if soc < soc_points[0]:
+            voltage = voltages[0]
+        elif soc >= soc_points[last_point]:
+            voltage = voltages[last_point]
+        else:
+            j = 0
+            while soc >= soc_points[j + 1]:
+                j += 1
+            voltage = slopes[j] * (soc - soc_points[j]) + voltages[j]
+
+        # Switch to mains at the low threshold, back to the inverter at the high
+        # threshold once the PWM timer has elapsed (NaN = never switched)
+        if using_inverter and soc <= threshold_low:
+            using_inverter = False
+            last_switch_time = sim_time
+        elif not using_inverter and soc >= threshold_high:
+            if (sim_time - last_switch_time) >= pwm_timer:
+                using_inverter = True
+
+        out_time[i] = sim_time
+        out_soc[i] = soc
+        out_voltage[i] = voltage
+        out_source[i] = INVERTER if using_inverter else AC_MAINS
+
+    return sim_time, soc, voltage, using_inverter, last_switch_time
+
+
+class SolarBatterySimulator:
+    def __init__(self, seed=None, **params):
+        # System parameters
+        self.solar_power = 0  # Current solar panel output (W)
+        self.battery_voltage = 12.0  # Battery voltage (V)
+        self.battery_capacity = 100.0  # Ah
+        self.battery_soc = 70.0  # State of charge (%)
+        self.mppt_efficiency = 95.0  # MPPT efficiency (%)
+        self.inverter_efficiency = 90.0  # Inverter efficiency (%)
+        self.ac_load = 500.0  # AC load power (W)
+        self.using_inverter = True  # True if using inverter, False if using mains
+        self.pwm_timer = 10.0  # PWM timer for switching (seconds)
+        self.switch_threshold_low = 30.0  # Battery SOC threshold for switching to mains (%)
+        self.switch_threshold_high = 40.0  # Battery SOC threshold for switching back to inverter (%)
+        self.sunlight_intensity = 70.0  # Sunlight intensity (%)
+        self.sunlight_variability = 20.0  # Sunlight variability (%)
+        self.battery_temperature = 25.0  # Battery temperature (C)
+        self.ocv_curve = "flooded_lead_acid"  # OCVCurve or chemistry preset name
+        self.mppt_tracker = None  # None (constant MPPT efficiency), MPPTracker or tracker method name
+        self.weather = None  # None (intensity and variability) or a weather.WeatherGenerator
+
+        for name, value in params.items():
+            if not hasattr(self, name):
+                raise TypeError(f"Unknown simulation parameter: {name}")
+            setattr(self, name, value)
+
+        if isinstance(self.ocv_curve, str):
+            self.ocv_curve = OCVCurve.preset(self.ocv_curve)
+        if isinstance(self.mppt_tracker, str):
+            self.mppt_tracker = MPPTracker(self.mppt_tracker, PVArray(rated_power=MAX_SOLAR_POWER))
+
+        # Simulation state
+        self.sim_time = 0
+        self.last_switch_time = None
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.profiler = None  # Optional profiling.StageProfiler timing the stages of step()
+
+    def reseed(self, seed=None):
+        # Restart the solar random stream (from the constructor seed by default)
+        if seed is not None:
+            self.seed = seed
+        self.rng = np.random.default_rng(self.seed)
+        if self.weather is not None:
+            self.weather.reset()
+
+    def calculate_solar_power(self):
+        # Simulate solar panel output based on intensity and variability
+        base_power = (self.sunlight_intensity / 100) * MAX_SOLAR_POWER
+
+        # Add variability (or follow the weather)
+        if self.weather is not None:
+            solar_power = self.weather.at(self.sim_time)[0] * (MAX_SOLAR_POWER / STC_IRRADIANCE)
+        elif self.sunlight_variability > 0:
+            variability_factor = self.rng.uniform(-self.sunlight_variability, self.sunlight_variability) / 100
+            solar_power = base_power * (1 + variability_factor)
+        else:
+            solar_power = base_power
+
+        # Power actually drawn from the array by the tracker (irradiance scales with the
+        # available power; the array is rated MAX_SOLAR_POWER at STC)
+        if self.mppt_tracker is not None:
+            solar_power = self.mppt_tracker.track([solar_power * (STC_IRRADIANCE / MAX_SOLAR_POWER)])[0]
+
+        # Apply MPPT efficiency
+        self.solar_power = max(0, solar_power * (self.mppt_efficiency / 100))
+        return self.solar_power
+
+    def solar_power_series(self, steps, dt=1.0):
+        # Vectorized equivalent of `steps` calls to calculate_solar_power, `dt` apart (same
+        # random stream)
+        base_power = (self.sunlight_intensity / 100) * MAX_SOLAR_POWER
+        if self.weather is not None:
+            # Step times accumulated exactly as the integration loop advances sim_time
+            times = np.cumsum(np.concatenate(([float(self.sim_time)], np.full(max(steps - 1, 0), float(dt)))))
+            solar_power = self.weather.at(times[:steps])[0] * (MAX_SOLAR_POWER / STC_IRRADIANCE)
+        elif self.sunlight_variability > 0:
+            variability_factor = self.rng.uniform(-self.sunlight_variability, self.sunlight_variability, steps) / 100
+            solar_power = base_power * (1 + variability_factor)
+        else:
+            solar_power = np.full(steps, float(base_power))
+        if self.mppt_tracker is not None:
+            solar_power = self.mppt_tracker.track(solar_power * (STC_IRRADIANCE / MAX_SOLAR_POWER), compiled=True)
+        return np.maximum(0, solar_power * (self.mppt_efficiency / 100))
+
+    def snapshot(self):
+        return SimulationSnapshot(float(self.sim_time), float(self.battery_soc), float(self.battery_voltage),
+                                  float(self.solar_power), float(self.ac_load), bool(self.using_inverter))
+
+    def step(self, time_delta):
+        # Advance the model by one tick of `time_delta` simulated seconds
+        if self.profiler is None:
+            solar_power = self.calculate_solar_power()
+            self._advance([solar_power], [self.ac_load], 1, time_delta)
+            return solar_power
+
+        with self.profiler.stage("solar_power"):
+            solar_power = self.calculate_solar_power()
+        with self.profiler.stage("battery_switching"):
+            self._advance([solar_power], [self.ac_load], 1, time_delta)
+        return solar_power
+
+    def iter_chunks(self, duration, dt=1.0, chunk_steps=CHUNK_STEPS):
+        """Integrate `duration` simulated seconds at a fixed `dt`, yielding one dict of arrays
+        (time, battery_soc, battery_voltage, solar_power, load, source) per chunk.
+
+        Only one chunk is held in memory at a time, so callers can reduce arbitrarily long runs.
+        """
+        steps = int(round(duration / dt))
+        done = 0
+        while done < steps:
+            count = min(chunk_steps, steps - done)
+            solar = self.solar_power_series(count, dt)
+            load = np.full(count, float(self.ac_load))
+            done += count
+            yield self._integrate_chunk(solar, load, dt)
+
+    def iter_replay(self, samples, dt=1.0):
+        """Integrate recorded input instead of the solar model, one chunk per input chunk.
+
+        `samples` yields dicts with solar_power and/or load arrays, one value per `dt` step
+        (e.g. site_logs.resample()); a missing column keeps the simulator's own value.
+        Yields the same dicts of arrays as iter_chunks().
+        """
+        for sample in samples:
+            count = len(sample["time"])
+            if count == 0:
+                continue
+            solar = sample.get("solar_power")
+            solar = np.full(count, float(self.solar_power)) if solar is None else np.asarray(solar, dtype=float)
+            load = sample.get("load")
+            load = np.full(count, float(self.ac_load)) if load is None else np.asarray(load, dtype=float)
+            chunk = self._integrate_chunk(solar, load, dt)
+            self.ac_load = float(load[-1])
+            yield chunk
+
+    def _integrate_chunk(self, solar, load, dt):
+        chunk = self._advance(solar, load, len(solar), dt, compiled=True)
+        self.solar_power = float(solar[-1])
+        chunk = {name: np.asarray(values) for name, values in chunk.items()}
+        chunk["solar_power"] = solar
+        chunk["load"] = load
+        chunk["source"] = chunk["source"].astype(np.int8, copy=False)
+        return chunk
+
+    def run(self, duration, dt=1.0, record_every=1):
+        """Run `duration` simulated seconds at a fixed `dt` as fast as possible.
+
+        Returns a dict of arrays (time, battery_soc, battery_voltage, solar_power, load, source)
+        holding every `record_every`-th step; use a larger value for year-long runs.
+        """
+        recorded = int(round(duration / dt)) // record_every
+        result = {name: np.empty(recorded, dtype=np.int8 if name == "source" else float)
+                  for name in RESULT_FIELDS}
+
+        done = 0
+        filled = 0
+        for chunk in self.iter_chunks(duration, dt):
+            count = len(chunk["time"])
+
+            # Keep every record_every-th step counted from the start of the run
+            first = (record_every - 1 - done) % record_every
+            keep = slice(first, count, record_every)
+            taken = len(range(first, count, record_every))
+            for name in RESULT_FIELDS:
+                result[name][filled:filled + taken] = chunk[name][keep]
+            filled += taken
+            done += count
+
+        return result
+
+    def _state(self):
+        last_switch_time = math.nan if self.last_switch_time is None else self.last_switch_time
+        return (float(self.sim_time), float(self.battery_soc), float(self.battery_voltage),
+                bool(self.using_inverter), float(last_switch_time))
+
+    def _params(self):
+        return (float(self.battery_capacity), float(self.inverter_efficiency),
+                float(self.switch_threshold_low), float(self.switch_threshold_high),
+                float(self.pwm_timer))
+
+    def _advance(self, solar, load, count, dt, compiled=False):
+        kernel = jit_compiled(_integrate) if compiled else None
+        curve = self.ocv_curve.table(self.battery_temperature)
+        if kernel is not None:
+            curve = tuple(np.asarray(values) for values in curve)
+            chunk = {
+                "time": np.empty(count),
+                "battery_soc": np.empty(count),
+                "battery_voltage": np.empty(count),
+                "source": np.empty(count, dtype=np.int8),
+            }
+        else:
+            # Plain lists keep the pure-Python loop on fast float arithmetic
+            kernel = _integrate
+            solar = solar.tolist() if isinstance(solar, np.ndarray) else solar
+            load = load.tolist() if isinstance(load, np.ndarray) else load
+            chunk = {
+                "time": [0.0] * count,
+                "battery_soc": [0.0] * count,
+                "battery_voltage": [0.0] * count,
+                "source": [0] * count,
+            }
+        state = kernel(solar, load, count, float(dt), self._state(), self._params(), *curve,
+                       chunk["time"], chunk["battery_soc"], chunk["battery_voltage"], chunk["source"])
+        self.sim_time, self.battery_soc, self.battery_voltage, self.using_inverter, last_switch_time = state
+        self.last_switch_time = None if math.isnan(last_switch_time) else last_switch_time
+        return chunk
@@ -0,0 +1,125 @@
+# Telemetry Buffer - preallocated columnar ring buffer
+#
+# Description:
+# Fixed-capacity history of simulation samples (one column per quantity) for live
+# plotting. Appends are O(1) and write straight into a preallocated NumPy array, and the
+# most recent N samples of any column can be read as a contiguous zero-copy view.
+#
+# Layout: every sample is written twice, at slot i and i + size of a (columns, 2 * size)
+# array, so the latest N samples always form one contiguous slice. The ring holds a few
+# more slots than `capacity` (the slack) so a view taken by the reader is not overwritten
+# by the next appends from the simulation thread. When more than `slack` samples arrived
+# between two window() calls (a fast clock such as --clock catchup), the writer would also
+# overrun a view while it is drawn, so window() returns a copy instead until it slows
+# down again. The running min/max of each column over the buffered samples is kept with
+# monotonic deques (amortised O(1) per append; can be switched off with track_extrema=False).
+
+from collections import deque
+
+import numpy as np
+
+
+class TelemetryBuffer:
+    def __init__(self, columns, capacity=600, slack=None, dtype=float, track_extrema=True):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.columns = tuple(columns)
+        self._index = {name: i for i, name in enumerate(self.columns)}
+        self.capacity = capacity
+        self._slack = max(16, capacity // 8) if slack is None else slack
+        self._size = capacity + self._slack
+        self._data = np.zeros((len(self.columns), 2 * self._size), dtype=dtype)
+        self._count = 0  # Total samples ever appended (published last, after the data)
+        self._read_count = 0  # _count at the previous window() call
+        # Running min/max per column (minimum()/maximum() return their default when disabled)
+        self._track_extrema = track_extrema
+        self._minima = [deque() for _ in self.columns]
+        self._maxima = [deque() for _ in self.columns]
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    def _column(self, column):
+        try:
+            return self._index[column]
+        except KeyError:
+            raise KeyError(f"Unknown telemetry column: {column}") from None
+
+    def append(self, *values):
+        # Add one sample (one value per column, in column order)
+        if len(values) != len(self.columns):
+            raise ValueError(f"Expected {len(self.columns)} values, got {len(values)}")
+        count = self._count
+        slot = count % self._size
+        self._data[:, slot] = values
+        self._data[:, slot + self._size] = values
+        if not self._track_extrema:
+            self._count = count + 1
+            return
+
+        # Monotonic deques of (sample number, value): front is the min/max of the window
+        oldest = count + 1 - self.capacity
+        for minima, maxima, value in zip(self._minima, self._maxima, values):
+            while minima and minima[-1][1] >= value:
+                minima.pop()
+            minima.append((count, value))
+            if minima[0][0] < oldest:
+                minima.popleft()
+            while maxima and maxima[-1][1] <= value:
+                maxima.pop()
+            maxima.append((count, value))
+            if maxima[0][0] < oldest:
+                maxima.popleft()
+
+        self._count = count + 1
+
+    def clear(self):
+        self._count = 0
+        self._read_count = 0
+        for extrema in self._minima + self._maxima:
+            extrema.clear()
+
+    def _recent(self, count, last):
+        n = min(count, self.capacity) if last is None else min(last, count, self.capacity)
+        end = count % self._size + self._size
+        return self._data[:, end - n:end]
+
+    def window(self, last=None):
+        """(columns, n) array of the latest `last` samples (all buffered samples by default).
+
+        A zero-copy view, valid while fewer than `slack` further samples are appended; a copy
+        when more than `slack` samples were appended since the previous call.
+        """
+        count = self._count
+        arrived = count - self._read_count
+        self._read_count = count
+        window = self._recent(count, last)
+        return window.copy() if arrived > self._slack else window
+
+    def view(self, column, last=None):
+        # Zero-copy view of one column, for immediate use (e.g. a search)
+        return self._recent(self._count, last)[self._column(column)]
+
+    def latest(self, column):
+        if self._count == 0:
+            return None
+        return self._data[self._column(column), (self._count - 1) % self._size].item()
+
+    def count_since(self, column, value):
+        # Number of latest samples whose (increasing) column value is >= value, e.g. a time window
+        values = self.view(column)
+        return len(values) - int(np.searchsorted(values, value, side="left"))
+
+    def minimum(self, column, default=None):
+        extrema = self._minima[self._column(column)]
+        try:
+            return extrema[0][1]
+        except IndexError:
+            return default
+
+    def maximum(self, column, default=None):
+        extrema = self._maxima[self._column(column)]
+        try:
+            return extrema[0][1]
+        except IndexError:
+            return default
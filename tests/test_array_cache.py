@@ -0,0 +1,69 @@
+# Array Cache Tests
+#
+# Description:
+# Cache keys must change with what the cached arrays were computed by, not only with the
+# keyed function's own bytecode: the source of its module and of the simulation modules it
+# calls into, and the active JIT backend.
+#
+# Usage (from the repository root):
+#   python -m pytest tests/test_array_cache.py
+
+import numpy as np
+import pytest
+
+import array_cache
+from array_cache import array_key
+from jit_backend import numba_available, use_backend
+from relay_engine import advanced_relay
+
+TRACE = np.linspace(0, 80, 50)
+
+
+def key():
+    return array_key(TRACE, advanced_relay, {"on_threshold": 45})
+
+
+def test_key_is_stable():
+    assert key() == key()
+
+
+@pytest.mark.skipif(not numba_available(), reason="needs Numba for a second backend")
+def test_key_changes_with_backend():
+    with use_backend("python"):
+        python_key = key()
+    with use_backend("numba"):
+        assert key() != python_key
+
+
+def test_key_changes_with_callee_source(monkeypatch):
+    before = key()
+    # As if a module the keyed function calls into had been edited
+    monkeypatch.setitem(array_cache._sources, "solar_sim_core", "edited")
+    assert key() != before
+
+
+def test_key_changes_with_function_module_source(monkeypatch):
+    # Only the keyed function's own module: a helper it calls there was edited
+    monkeypatch.setattr(array_cache, "SOURCE_MODULES", ())
+    before = key()
+    monkeypatch.setitem(array_cache._sources, "relay_engine", "edited")
+    assert key() != before
+
+
+def test_kept_paths_are_not_evicted(tmp_path):
+    # autotune hands out the solar series' path, then caches the load series
+    cache = array_cache.ArrayCache(str(tmp_path), memory_bytes=0, disk_bytes=2000)
+    cache.put("solar", np.zeros(200))
+    solar = cache.keep("solar")
+    cache.put("load", np.zeros(200))
+    np.testing.assert_array_equal(np.load(solar), np.zeros(200))
+
+
+def test_backend_resolved_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr(array_cache, "_backends", {})
+    monkeypatch.setattr(array_cache, "numba_available", lambda: calls.append(1) or False)
+    with use_backend("auto"):
+        first = key()
+        assert key() == first
+    assert len(calls) == 1
@@ -0,0 +1,38 @@
+# Event-Driven Simulation Tests
+#
+# Description:
+# Regression tests for event_sim.py: PWM timer expiry must always switch back to the
+# inverter, whatever rounding last_switch + pwm_timer picks up (it used to loop forever).
+#
+# Usage (from the repository root):
+#   python -m pytest tests/test_event_sim.py
+
+import itertools
+
+import numpy as np
+import pytest
+
+from event_sim import EventDrivenSimulator
+
+
+def test_pwm_timer_expiry_after_rounding():
+    # 17.886824408468243 - 7.886824408468245 < 10.0: the expiry event must still switch
+    engine = EventDrivenSimulator(battery_capacity=0.2, pwm_timer=10.0, ac_load=1000.0)
+    events = engine.run([0.0], [665.0], duration=3600)["events"]
+    assert events["time"][-1] == 3600
+    assert engine.computations < 2000
+
+
+@pytest.mark.parametrize("capacity, pwm_timer", list(itertools.product([0.1, 0.2, 0.5, 1.0, 2.0, 5.0],
+                                                                       [1.0, 3.3, 10.0, 17.0])))
+def test_switches_back_when_timer_expires(capacity, pwm_timer):
+    events = EventDrivenSimulator(battery_capacity=capacity, pwm_timer=pwm_timer,
+                                  ac_load=1000.0).run([0.0], [665.0], duration=3600)["events"]
+    kinds = events["kind"]
+    to_mains = events["time"][kinds == "to_mains"]
+    to_inverter = events["time"][kinds == "to_inverter"]
+    assert to_mains.size > 0 and to_inverter.size > 0
+    # Each switch back happens no earlier than the timer allows, and time never goes back
+    for time in to_inverter:
+        assert time >= to_mains[to_mains <= time][-1] + pwm_timer
+    assert np.all(np.diff(events["time"]) >= 0)
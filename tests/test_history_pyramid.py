@@ -0,0 +1,41 @@
+# History Pyramid Tests
+#
+# Description:
+# The dashboard queries the pyramid on the Tk thread while the simulation thread appends to
+# it; a query must never see a bucket half-closed (zero means, mixed minima and maxima).
+#
+# Usage (from the repository root):
+#   python -m pytest tests/test_history_pyramid.py
+
+import sys
+import threading
+
+import numpy as np
+
+from history_pyramid import HistoryPyramid
+
+
+def test_query_during_appends():
+    previous = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Switch threads as often as possible
+    pyramid = HistoryPyramid(("time", "value"))
+    stop = threading.Event()
+
+    def writer():
+        time = 0.0
+        while not stop.is_set():
+            time += 0.25
+            pyramid.append(time, 5.0)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        for _ in range(500):
+            for level, span in ((0, 600), (1, 36_000)):
+                _, buckets = pyramid.query(span, level=level)
+                for statistic in ("min", "max", "mean"):
+                    np.testing.assert_array_equal(buckets[f"value_{statistic}"], 5.0)
+    finally:
+        stop.set()
+        thread.join()
+        sys.setswitchinterval(previous)
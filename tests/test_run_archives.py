@@ -0,0 +1,38 @@
+# Run Archive Tests
+#
+# Description:
+# Writing a run straight to a .npz archive (--headless --output X.npz, sweep traces) must
+# leave everything next to the archive alone, in particular a recorded run directory named
+# like the archive without its suffix.
+#
+# Usage (from the repository root):
+#   python -m pytest tests/test_run_archives.py
+
+import os
+
+import numpy as np
+
+from parameter_sweep import run_case
+from run_store import RunWriter, load_run
+from Solar_System_GUI_Plot_Simulation import run_headless
+
+
+def record(path):
+    with RunWriter(path) as writer:
+        writer.append({"time": np.arange(5.0)})
+
+
+def test_headless_archive_keeps_run_directory(tmp_path):
+    record(str(tmp_path / "results"))
+    run_headless(60, dt=1.0, seed=0, output=str(tmp_path / "results.npz"))
+    assert len(load_run(str(tmp_path / "results"))) == 5
+    assert len(load_run(str(tmp_path / "results.npz"))) == 60
+    assert sorted(os.listdir(tmp_path)) == ["results", "results.npz"]
+
+
+def test_sweep_trace_keeps_run_directory(tmp_path):
+    record(str(tmp_path / "case_000000"))
+    run_case({"case_id": 0, "seed": 0}, 600, trace_dir=str(tmp_path), trace_every=60)
+    assert len(load_run(str(tmp_path / "case_000000"))) == 5
+    assert len(load_run(str(tmp_path / "case_000000.npz"))) == 10
+    assert sorted(os.listdir(tmp_path)) == ["case_000000", "case_000000.npz"]
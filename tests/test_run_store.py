@@ -0,0 +1,59 @@
+# Run Store Tests
+#
+# Description:
+# RunWriter must not clear directories that hold something other than a run, and appending
+# to a run whose columns were left at different lengths must keep the columns row-aligned.
+#
+# Usage (from the repository root):
+#   python -m pytest tests/test_run_store.py
+
+import os
+
+import numpy as np
+import pytest
+
+from run_store import RunWriter, load_run
+
+
+def chunk(start, count):
+    time = np.arange(start, start + count, dtype=float)
+    return {"time": time, "battery_soc": time / 10, "source": (time % 2).astype(np.int8)}
+
+
+def test_refuses_directory_without_run(tmp_path):
+    (tmp_path / "notes.bin").write_bytes(b"keep me")
+    with pytest.raises(FileExistsError):
+        RunWriter(str(tmp_path))
+    with pytest.raises(FileExistsError):
+        RunWriter(str(tmp_path), mode="a")
+    assert (tmp_path / "notes.bin").read_bytes() == b"keep me"
+
+
+def test_replaces_previous_run_only(tmp_path):
+    path = str(tmp_path / "run")
+    with RunWriter(path) as writer:
+        writer.append(chunk(0, 5))
+    with open(os.path.join(path, "README.txt"), "w") as notes:
+        notes.write("kept")
+    with RunWriter(path) as writer:
+        writer.append({"time": np.arange(3.0)})
+    run = load_run(path)
+    assert run.columns == ("time",) and len(run) == 3
+    assert os.path.exists(os.path.join(path, "README.txt"))
+    assert not os.path.exists(os.path.join(path, "battery_soc.bin"))
+
+
+def test_append_truncates_torn_columns(tmp_path):
+    path = str(tmp_path / "run")
+    with RunWriter(path) as writer:
+        writer.append(chunk(0, 10))
+    # An interrupted write left two extra rows in one column only
+    with open(os.path.join(path, "time.bin"), "ab") as column:
+        column.write(np.array([98.0, 99.0]).tobytes())
+    with RunWriter(path, mode="a") as writer:
+        assert len(writer) == 10
+        writer.append(chunk(10, 5))
+    run = load_run(path)
+    expected = chunk(0, 15)
+    for name, values in expected.items():
+        np.testing.assert_array_equal(run[name], values.astype(run[name].dtype), err_msg=name)
@@ -0,0 +1,39 @@
+# Telemetry Buffer Tests
+#
+# Description:
+# window() hands out views into the ring while the writer stays within the slack between
+# reads, and copies once it appends faster than that (e.g. --clock catchup), so a window
+# being drawn is never overwritten.
+#
+# Usage (from the repository root):
+#   python -m pytest tests/test_telemetry.py
+
+import numpy as np
+
+from telemetry import TelemetryBuffer
+
+
+def fill(buffer, start, count):
+    for time in range(start, start + count):
+        buffer.append(float(time), float(time) * 2)
+
+
+def test_view_while_writer_is_slow():
+    buffer = TelemetryBuffer(("time", "value"), capacity=10, slack=4)
+    fill(buffer, 0, 4)
+    buffer.window()
+    fill(buffer, 4, 3)
+    window = buffer.window()
+    assert np.shares_memory(window, buffer._data)
+    np.testing.assert_array_equal(window[0], np.arange(7.0))
+
+
+def test_copy_while_writer_is_fast():
+    buffer = TelemetryBuffer(("time", "value"), capacity=10, slack=4)
+    fill(buffer, 0, 4)
+    buffer.window()
+    fill(buffer, 4, 20)
+    window = buffer.window()
+    fill(buffer, 24, 20)  # The writer keeps going while the window is drawn
+    np.testing.assert_array_equal(window[0], np.arange(14.0, 24.0))
+    np.testing.assert_array_equal(window[1], np.arange(14.0, 24.0) * 2)
@@ -0,0 +1,257 @@
+# Weather - seeded stochastic irradiance with correlated cloud passages
+#
+# Description:
+# Generates global horizontal irradiance (W/m2) for one or many sites in bulk, replacing
+# the white-noise sunlight variability of the simulators with something that looks like
+# real weather:
+# - a clear-sky envelope from the solar elevation (latitude, day of year, hour; Haurwitz
+#   model), so days, nights and seasons come out of the time axis,
+# - cloud cover from an autocorrelated Gaussian process (AR(1) / Ornstein-Uhlenbeck on a
+#   coarse `cloud_step` grid with time constant `cloud_timescale`), mapped so that the
+#   sky is cloudy a `cloudiness` fraction of the time and linearly interpolated in between,
+# - ramp events: single clouds arriving as a Poisson process (`ramp_rate` per hour) that
+#   dim the sun by `ramp_depth` over `ramp_time` seconds, stay for about `ramp_duration`
+#   seconds and clear again.
+#
+# Everything is drawn from one seeded numpy.random.Generator and computed with array
+# operations over all sites at once (the AR(1) recursion included, see _ar1()). The series
+# is generated in blocks of BLOCK_SECONDS, so it does not depend on how callers chunk it:
+# chunks() streams a year of 1 s data for a fleet in bounded memory, and at() serves the
+# simulators (solar_sim_core.py, fleet_sim.py), which look the irradiance up at their own
+# step times.
+#
+# Example:
+#   weather = WeatherGenerator(seed=1, sites=1000, latitude=np.linspace(30, 60, 1000))
+#   for time, irradiance in weather.chunks(365 * 86_400):  # irradiance: (1000, steps)
+#       ...
+#   sim = SolarBatterySimulator(weather=WeatherGenerator(seed=1, start_hour=6))
+
+import math
+from statistics import NormalDist
+
+import numpy as np
+
+BLOCK_SECONDS = 3600.0  # Unit of generation (one block of samples per site at a time)
+CHUNK_VALUES = 4_000_000  # Samples x sites yielded at a time by chunks() by default
+HAURWITZ_SCALE = 1098.0  # W/m2, clear-sky irradiance model GHI = 1098 sin(a) exp(-0.057 / sin(a))
+HAURWITZ_EXTINCTION = 0.057
+CLOUD_SHARPNESS = 0.35  # Width of the clear-to-cloudy transition of the latent process
+MAX_AR_GROWTH = 1e6  # Bound on coefficient ** -n inside one vectorized AR(1) segment
+
+
+def _site_values(value, sites, name):
+    array = np.array(np.broadcast_to(np.asarray(value, dtype=float), (sites,)))
+    if array.shape != (sites,):
+        raise ValueError(f"{name} must be a scalar or have one value per site")
+    return array
+
+
+def _ar1(initial, innovations, coefficient):
+    # x[k] = coefficient * x[k-1] + innovations[k] for each row, without a Python loop:
+    # x[k] = c**k * (x0 + cumsum(innovations[i] / c**i)), in segments short enough that
+    # c**-k stays well within floating-point range
+    sites, steps = innovations.shape
+    out = np.empty((sites, steps))
+    span = max(1, int(math.log(MAX_AR_GROWTH) / -math.log(coefficient))) if coefficient < 1 else steps
+    state = initial
+    for start in range(0, steps, span):
+        end = min(start + span, steps)
+        powers = coefficient ** np.arange(1, end - start + 1)
+        segment = np.cumsum(innovations[:, start:end] / powers, axis=1)
+        segment += state[:, np.newaxis]
+        segment *= powers
+        out[:, start:end] = segment
+        state = segment[:, -1]
+    return out
+
+
+def clear_sky(time, latitude, day_of_year=172, start_hour=0.0):
+    """Clear-sky irradiance (W/m2) at `time` seconds after `start_hour` of `day_of_year`.
+
+    `latitude` (degrees) is a scalar or one value per site; returns (sites, len(time)).
+    """
+    hours = start_hour + np.asarray(time, dtype=float) / 3600
+    whole_days = np.floor(hours / 24)
+    hour_angle = np.radians(15.0) * (hours - 24 * whole_days - 12)  # (float % is much slower)
+    # The declination only changes from day to day: evaluate it once per day in the range
+    day = whole_days.astype(int)
+    days = day_of_year + np.arange(day.min(), day.max() + 1) if len(day) else np.empty(0)
+    declination = np.radians(23.45) * np.sin(2 * np.pi * (284 + days) / 365)
+    day -= day.min() if len(day) else 0
+    latitude = np.radians(np.atleast_1d(np.asarray(latitude, dtype=float)))[:, np.newaxis]
+    # Sine of the solar elevation, zero below the horizon
+    elevation = np.sin(latitude) * np.sin(declination)[day]
+    elevation += np.cos(latitude) * (np.cos(declination)[day] * np.cos(hour_angle))
+    np.maximum(elevation, 0, out=elevation)
+    extinction = np.maximum(elevation, 1e-3)
+    np.divide(-HAURWITZ_EXTINCTION, extinction, out=extinction)
+    np.exp(extinction, out=extinction)
+    elevation *= extinction
+    elevation *= HAURWITZ_SCALE
+    return elevation
+
+
+class WeatherGenerator:
+    def __init__(self, seed=None, sites=1, dt=1.0, latitude=40.0, day_of_year=172, start_hour=0.0,
+                 cloudiness=0.4, cloud_timescale=900.0, cloud_step=30.0, cloud_opacity=0.75,
+                 ramp_rate=1.0, ramp_duration=180.0, ramp_depth=(0.3, 0.8), ramp_time=(10.0, 60.0)):
+        """Irradiance for `sites` sites sampled every `dt` seconds.
+
+        latitude, cloudiness and cloud_opacity are scalars or one value per site.
+        """
+        self.seed = seed
+        self.sites = sites
+        self.dt = float(dt)
+        self.latitude = _site_values(latitude, sites, "latitude")
+        self.day_of_year = day_of_year
+        self.start_hour = start_hour
+
+        # Cloud cover: latent AR(1) process, cloudy where it exceeds the cloudiness quantile
+        cloudiness = np.clip(_site_values(cloudiness, sites, "cloudiness"), 1e-6, 1 - 1e-6)
+        self.cloud_quantile = np.array([NormalDist().inv_cdf(1 - value) for value in cloudiness])
+        self.cloud_opacity = _site_values(cloud_opacity, sites, "cloud_opacity")
+        self.cloud_step = float(cloud_step)
+        self.cloud_coefficient = math.exp(-self.cloud_step / cloud_timescale)
+
+        # Ramp events (passing clouds)
+        self.ramp_rate = ramp_rate / 3600  # Events per second per site
+        self.ramp_duration = ramp_duration
+        self.ramp_depth = ramp_depth
+        self.ramp_time = ramp_time
+
+        self.block_steps = max(1, int(round(BLOCK_SECONDS / self.dt)))
+        self.reset()
+
+    def reset(self, seed=None):
+        # Restart the weather from time 0 (with the constructor seed by default)
+        if seed is not None:
+            self.seed = seed
+        self.rng = np.random.default_rng(self.seed)
+        self.step = 0  # Index of the next sample to generate
+        self.cloud_time = 0.0  # Time of the last cloud grid point
+        # Latent process at the last two cloud grid points (cloud_time - cloud_step, cloud_time)
+        self.cloud_state = np.repeat(self.rng.standard_normal(self.sites)[:, np.newaxis], 2, axis=1)
+        self.events = np.empty((5, 0))  # site, start, end, depth, ramp of clouds still passing
+        self._time = np.empty(0)  # Samples generated but not consumed yet
+        self._irradiance = np.empty((self.sites, 0))
+
+    def _apply_clouds(self, time, irradiance):
+        # Scale by the clear-sky index (1 = clear) of every site at `time`, from the cloud cover
+        # New grid points up to the first one at or after the last sample; the samples all lie
+        # after the second-to-last known point, so interpolation starts from that one
+        points = max(0, math.ceil((time[-1] - self.cloud_time) / self.cloud_step))
+        innovations = self.rng.standard_normal((self.sites, points))
+        innovations *= math.sqrt(1 - self.cloud_coefficient ** 2)
+        latent = np.empty((self.sites, points + 2))
+        latent[:, :2] = self.cloud_state
+        latent[:, 2:] = _ar1(self.cloud_state[:, 1], innovations, self.cloud_coefficient)
+        cover = 1 / (1 + np.exp(-(latent - self.cloud_quantile[:, np.newaxis]) / CLOUD_SHARPNESS))
+        clearness = 1 - self.cloud_opacity[:, np.newaxis] * cover
+
+        position = (time - (self.cloud_time - self.cloud_step)) / self.cloud_step
+        index = np.minimum(position.astype(int), points)
+        fraction = position - index
+        lower = np.take(clearness, index, axis=1)
+        result = np.take(clearness, index + 1, axis=1)
+        result -= lower
+        result *= fraction
+        result += lower
+        irradiance *= result
+
+        self.cloud_time += points * self.cloud_step
+        self.cloud_state = latent[:, -2:]
+
+    def _apply_ramps(self, start, end, time, irradiance):
+        # Dim the samples in [start, end) under passing clouds (the deepest one where they overlap)
+        counts = self.rng.poisson(self.ramp_rate * (end - start), self.sites)
+        total = int(counts.sum())
+        arrivals = start + self.rng.random(total) * (end - start)
+        new = np.vstack((np.repeat(np.arange(self.sites), counts), arrivals,
+                         arrivals + self.rng.exponential(self.ramp_duration, total),
+                         self.rng.uniform(*self.ramp_depth, total), self.rng.uniform(*self.ramp_time, total)))
+        events = np.hstack((self.events, new))
+        site, begin, finish, depth, ramp = events
+
+        # Samples each event touches (ramping in from `begin`, out until finish + ramp)
+        first = np.maximum(np.ceil((begin - time[0]) / self.dt), 0).astype(int)
+        last = np.minimum(np.floor((finish + ramp - time[0]) / self.dt), len(time) - 1).astype(int)
+        lengths = np.maximum(last - first + 1, 0)
+        if lengths.sum():
+            owner = np.repeat(np.arange(events.shape[1]), lengths)
+            offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+            samples = first[owner] + offsets
+            t = time[samples]
+            shape = np.minimum((t - begin[owner]) / ramp[owner], (finish[owner] + ramp[owner] - t) / ramp[owner])
+            touched = (site[owner].astype(int), samples)
+            dips = np.zeros(irradiance.shape)  # Only the touched pages are ever written
+            np.maximum.at(dips, touched, depth[owner] * np.clip(shape, 0, 1))
+            irradiance[touched] *= 1 - dips[touched]
+
+        self.events = events[:, finish + ramp > end]
+
+    def _next_block(self):
+        time = (self.step + np.arange(self.block_steps)) * self.dt
+        start, end = time[0], time[0] + self.block_steps * self.dt
+        irradiance = clear_sky(time, self.latitude, self.day_of_year, self.start_hour)
+        self._apply_clouds(time, irradiance)
+        self._apply_ramps(start, end, time, irradiance)
+        self.step += self.block_steps
+        return time, irradiance
+
+    def _generate(self, count):
+        # Buffered samples plus new blocks until at least `count` samples are available
+        times, parts = [self._time], [self._irradiance]
+        available = len(self._time)
+        while available < count:
+            time, irradiance = self._next_block()
+            times.append(time)
+            parts.append(irradiance)
+            available += len(time)
+        if len(times) > 1:
+            self._time, self._irradiance = np.concatenate(times), np.concatenate(parts, axis=1)
+
+    def chunks(self, duration, chunk_steps=None):
+        """Yield (time, irradiance) for the next `duration` seconds, irradiance shaped (sites,
+        samples) with at most `chunk_steps` samples (default: CHUNK_VALUES values per chunk).
+
+        Continues where the previous call stopped."""
+        chunk_steps = chunk_steps or max(self.block_steps, CHUNK_VALUES // self.sites)
+        steps = int(round(duration / self.dt))
+        while steps > 0:
+            count = min(steps, chunk_steps)
+            self._generate(count)
+            time, irradiance = self._time[:count], self._irradiance[:, :count]
+            self._time, self._irradiance = self._time[count:], self._irradiance[:, count:]
+            steps -= count
+            yield time, irradiance
+
+    def series(self, duration):
+        # The next `duration` seconds at once: (time, irradiance of shape (sites, samples))
+        parts = list(self.chunks(duration, chunk_steps=max(1, int(round(duration / self.dt)))))
+        return parts[0] if parts else (np.empty(0), np.empty((self.sites, 0)))
+
+    def at(self, time):
+        """Irradiance of every site at `time` (seconds, scalar or non-decreasing array across
+        calls), linearly interpolated between samples: (sites,) or (sites, len(time))."""
+        scalar = np.ndim(time) == 0
+        time = np.atleast_1d(np.asarray(time, dtype=float))
+        if not len(time):
+            return np.empty((self.sites, 0))
+        if len(self._time) and time[0] < self._time[0]:
+            raise ValueError("Weather times must not go back (call reset() to restart)")
+
+        # Generate blocks until the last requested time is covered, dropping samples that
+        # are no longer needed (keeping the one just before the first requested time)
+        first = int(round(self._time[0] / self.dt)) if len(self._time) else self.step
+        self._generate(math.ceil(time[-1] / self.dt) - first + 1)
+        keep = max(0, int(np.searchsorted(self._time, time[0], side="right")) - 1)
+        if keep:
+            self._time = self._time[keep:]
+            self._irradiance = self._irradiance[:, keep:]
+
+        index = np.clip(np.searchsorted(self._time, time, side="right") - 1, 0, max(len(self._time) - 2, 0))
+        upper = np.minimum(index + 1, len(self._time) - 1)
+        span = self._time[upper] - self._time[index]
+        fraction = np.divide(time - self._time[index], span, out=np.zeros(len(time)), where=span > 0)
+        values = self._irradiance[:, index] * (1 - fraction) + self._irradiance[:, upper] * fraction
+        return values[:, 0] if scalar else values